@@ -0,0 +1,213 @@
+"""
+Minimal OpenAI-compatible chat completions server for offline benchmarking.
+
+Answers POST /v1/chat/completions with canned CodeAgent JSON:
+  - a recorded raw response from --responses-dir/<case>.json if present,
+  - otherwise the synthetic case's known-good TopModule.
+The case is identified by the "BENCH_CASE: <name>" tag in the prompt. With
+--fail-rounds N, the first N calls per case return a wrong (but compiling)
+design so repair rounds are exercised too. Usage mimics a provider prompt
+cache: every message but the last counts as cached once it has been seen.
+With --error-rate, that fraction of requests gets an HTTP 503 (to exercise
+endpoint failover); with --tail-rate, that fraction is delayed by
+--tail-latency instead of --latency (to exercise hedging). GET /v1/models
+answers health checks.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from synth_cases import CASE_TAG, SynthCase
+
+_CASE_RE = re.compile(re.escape(CASE_TAG) + r"\s*(\S+)")
+
+
+class FakeLLMServer:
+    def __init__(
+        self,
+        *,
+        cases: Dict[str, SynthCase],
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_s: float = 0.0,
+        fail_rounds: int = 0,
+        responses_dir: Optional[Path] = None,
+        error_rate: float = 0.0,
+        tail_rate: float = 0.0,
+        tail_latency_s: float = 0.0,
+        seed: int = 0,
+    ):
+        self.cases = cases
+        self.latency_s = latency_s
+        self.error_rate = error_rate
+        self.tail_rate = tail_rate
+        self.tail_latency_s = tail_latency_s
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self.fail_rounds = fail_rounds
+        self.responses_dir = responses_dir
+        self.calls: Dict[str, int] = {}
+        self._prefixes: Set[str] = set()
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_cls())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    # ------------------------- responses -------------------------
+
+    def answer(self, messages: List[Dict[str, Any]]) -> str:
+        text = "\n".join(str(m.get("content") or "") for m in messages)
+        m = _CASE_RE.search(text)
+        name = m.group(1) if m else ""
+
+        with self._lock:
+            n = self.calls.get(name, 0)
+            self.calls[name] = n + 1
+
+        if self.responses_dir is not None:
+            rec = self.responses_dir / f"{name}.json"
+            if rec.exists():
+                return rec.read_text(encoding="utf-8")
+
+        case = self.cases.get(name)
+        if case is None:
+            return json.dumps({"files": [], "notes": f"unknown bench case {name!r}"})
+        content = case.wrong_solution() if n < self.fail_rounds else case.solution()
+        return json.dumps({"files": [{"path": "TopModule.v", "content": content}], "notes": "bench"})
+
+    def usage(self, messages: List[Dict[str, Any]], content: str) -> Dict[str, Any]:
+        sizes = [len(str(m.get("content") or "")) // 4 for m in messages]
+        prefix = json.dumps(messages[:-1], sort_keys=True)
+        with self._lock:
+            hit = prefix in self._prefixes
+            self._prefixes.add(prefix)
+        prompt_tokens = sum(sizes)
+        completion_tokens = len(content) // 4
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": sum(sizes[:-1]) if hit else 0},
+        }
+
+    def _handler_cls(self):
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client gave up on this request (hedged or cancelled)
+
+            def do_GET(self) -> None:
+                if not self.path.rstrip("/").endswith("/models"):
+                    self.send_error(404)
+                    return
+                self._send_json(200, {"object": "list", "data": [{"id": "bench", "object": "model"}]})
+
+            def do_POST(self) -> None:
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length") or 0)
+                req = json.loads(self.rfile.read(length) or b"{}")
+                with server._lock:
+                    slow = server.tail_rate > 0 and server._rng.random() < server.tail_rate
+                delay = server.tail_latency_s if slow else server.latency_s
+                if delay > 0:
+                    time.sleep(delay)
+                with server._lock:
+                    fail = server.error_rate > 0 and server._rng.random() < server.error_rate
+                    server.errors += int(fail)
+                if fail:
+                    self._send_json(503, {"error": {"message": "bench: injected overload", "type": "server_error"}})
+                    return
+                messages = req.get("messages") or []
+                content = server.answer(messages)
+                self._send_json(
+                    200,
+                    {
+                        "id": "chatcmpl-bench",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": req.get("model") or "bench",
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {"role": "assistant", "content": content},
+                                "finish_reason": "stop",
+                            }
+                        ],
+                        "usage": server.usage(messages, content),
+                    },
+                )
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return _Handler
+
+
+def main() -> None:
+    from synth_cases import make_cases, solutions
+
+    parser = argparse.ArgumentParser(description="Serve canned CodeAgent answers over an OpenAI-compatible API.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cases", type=int, default=20, help="Number of synthetic cases to know answers for.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to sleep per request.")
+    parser.add_argument("--fail-rounds", type=int, default=0, help="Wrong answers before the correct one, per case.")
+    parser.add_argument("--responses-dir", type=Path, default=None, help="Directory of recorded <case>.json raw answers.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 503.")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="Fraction of requests delayed by --tail-latency.")
+    parser.add_argument("--tail-latency", type=float, default=0.0, help="Seconds to sleep for the slow --tail-rate requests.")
+    args = parser.parse_args()
+
+    srv = FakeLLMServer(
+        cases=solutions(make_cases(args.cases)),
+        port=args.port,
+        latency_s=args.latency,
+        fail_rounds=args.fail_rounds,
+        responses_dir=args.responses_dir,
+        error_rate=args.error_rate,
+        tail_rate=args.tail_rate,
+        tail_latency_s=args.tail_latency,
+    )
+    print(f"[bench] fake LLM listening on {srv.base_url}")
+    srv.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        srv.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Startup benchmark for each entry point.
+
+For every module, runs `python -X importtime -c "import <module>"` in a fresh
+interpreter several times and reports the median total import time, the
+median process wall time (interpreter startup included) and the heaviest
+top-level imports of the last run. Use it to check that openai/pydantic and
+optional subsystems stay off the import path of workers and step scripts.
+
+Example:
+  python eda_generation/bench/import_time.py --repeat 5
+  python eda_generation/bench/import_time.py --modules run_dataset --top 15
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+ENTRY_POINTS = ("run_dataset", "run_code_agent_step1", "run_review_step2", "run_verify_step3", "flow")
+# Must stay lazy: importing any of these is a regression for worker startup.
+HEAVY = ("openai", "pydantic", "httpx")
+
+
+def _parse_importtime(stderr: str) -> List[Tuple[int, int, str]]:
+    """[(cumulative_us, depth, name)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        try:
+            _self, cum, name = line[len("import time:"):].split("|", 2)
+        except ValueError:
+            continue
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((int(cum), depth, name.strip()))
+    return rows
+
+
+def measure(module: str, repeat: int) -> Dict[str, Any]:
+    totals: List[float] = []
+    walls: List[float] = []
+    rows: List[Tuple[int, int, str]] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        p = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=str(ROOT),
+            capture_output=True,
+            text=True,
+        )
+        walls.append(time.perf_counter() - t0)
+        if p.returncode != 0:
+            tail = p.stderr.strip().splitlines()[-1:] or [""]
+            return {"module": module, "error": tail[0]}
+        rows = _parse_importtime(p.stderr)
+        total = next((cum for cum, depth, name in rows if depth == 0 and name == module), None)
+        totals.append((total or 0) / 1000.0)
+
+    top = sorted(((cum, name) for cum, depth, name in rows if depth == 1), reverse=True)
+    loaded = {name.split(".")[0] for _cum, _depth, name in rows}
+    return {
+        "module": module,
+        "import_ms": statistics.median(totals),
+        "wall_ms": statistics.median(walls) * 1000.0,
+        "top": [{"name": name, "ms": cum / 1000.0} for cum, name in top],
+        "heavy_loaded": sorted(loaded.intersection(HEAVY)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure import time of each entry point.")
+    parser.add_argument("--modules", nargs="*", default=list(ENTRY_POINTS), help="Modules to import (run from eda_generation/).")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module; medians are reported.")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest direct imports listed per module.")
+    parser.add_argument("--json-out", type=Path, default=None, help="Write the results as JSON.")
+    args = parser.parse_args()
+
+    results = [measure(m, max(1, args.repeat)) for m in args.modules]
+
+    print(f"{'module':<24}{'import_ms':>11}{'wall_ms':>10}  heavy deps loaded")
+    for r in results:
+        if "error" in r:
+            print(f"{r['module']:<24}  import failed: {r['error']}")
+            continue
+        heavy = ",".join(r["heavy_loaded"]) or "-"
+        print(f"{r['module']:<24}{r['import_ms']:>11.1f}{r['wall_ms']:>10.1f}  {heavy}")
+        for t in r["top"][: args.top]:
+            print(f"    {t['name']:<36}{t['ms']:>9.1f} ms")
+
+    if args.json_out is not None:
+        args.json_out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
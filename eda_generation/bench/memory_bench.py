@@ -0,0 +1,207 @@
+"""
+Memory benchmark for one long-lived process running many flows.
+
+Runs synthetic cases in this process (threads, like run_dataset.py --jobs)
+against the fake LLM server and bench/fake_docker.py, and reports:
+  - the per-case footprint of the final shared dict (deep size, with shared
+    objects such as interned strings counted once), split by top-level key,
+    next to what the same state takes as the plain dicts/lists/strings it
+    used to be (full log tails and raw LLM output in memory);
+  - the process RSS after every case, and its growth per case after warm-up,
+    which should stay near zero across a sweep.
+--keep-shared holds every case's shared dict until the end, as a process with
+that many flows in flight would.
+
+Example:
+  python eda_generation/bench/memory_bench.py --cases 60 --jobs 4 --fail-rounds 2
+  python eda_generation/bench/memory_bench.py --cases 200 --keep-shared --samples 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import gc
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from queue import SimpleQueue
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fake_llm_server import FakeLLMServer  # noqa: E402
+from synth_cases import make_cases, solutions, write_dataset  # noqa: E402
+from run_dataset import run_case  # noqa: E402
+from utils.feedback import Blob, LogTail, Record, unstash_feedback  # noqa: E402
+
+FAKE_DOCKER = Path(__file__).resolve().parent / "fake_docker.py"
+_PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_kb() -> int:
+    """Current (not peak) resident set size."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE // 1024
+    except OSError:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def deep_size(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, int, float, bool, type(None), Path)):
+        return size
+    if isinstance(obj, dict):
+        return size + sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(deep_size(v, seen) for v in obj)
+    for cls in type(obj).__mro__:
+        for slot in getattr(cls, "__slots__", ()):
+            if hasattr(obj, slot):
+                size += deep_size(getattr(obj, slot), seen)
+    if hasattr(obj, "__dict__"):
+        size += deep_size(vars(obj), seen)
+    return size
+
+
+def as_plain(obj: Any) -> Any:
+    """The same state as the plain containers it used to be stored in."""
+    if isinstance(obj, (Record, dict)) or isinstance(obj, Mapping):
+        return {k: as_plain(v) for k, v in obj.items()}
+    if isinstance(obj, LogTail):
+        return list(obj.lines())
+    if isinstance(obj, Blob):
+        return as_plain(unstash_feedback(obj)) if obj.path.name.endswith(".feedback.json") else obj.text()
+    if isinstance(obj, (list, tuple)):
+        return [as_plain(v) for v in obj]
+    return obj
+
+
+def footprint(shared: Dict[str, Any]) -> Tuple[int, Dict[str, int]]:
+    seen: Set[int] = set()
+    per_key = {k: deep_size(v, seen) for k, v in shared.items()}
+    return sys.getsizeof(shared) + sum(per_key.values()), per_key
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-case memory footprint and RSS growth of an in-process sweep.")
+    parser.add_argument("--cases", type=int, default=40, help="Number of synthetic cases.")
+    parser.add_argument("--jobs", type=int, default=1, help="Cases run concurrently (threads in this process).")
+    parser.add_argument("--samples", type=int, default=200, help="Stimulus samples per synthetic testbench.")
+    parser.add_argument("--fail-rounds", type=int, default=1, help="Wrong LLM answers per case before the right one (longer feedback history).")
+    parser.add_argument("--warmup", type=int, default=5, help="Cases excluded from the RSS growth estimate.")
+    parser.add_argument("--keep-shared", action="store_true", help="Keep every case's shared dict alive until the end.")
+    parser.add_argument("--work-dir", type=Path, default=None, help="Scratch directory (default: a temp dir, removed after).")
+    parser.add_argument("--verbose", action="store_true", help="Show node prints from each case.")
+    args = parser.parse_args()
+
+    if shutil.which("iverilog") is None or shutil.which("vvp") is None:
+        raise SystemExit("iverilog/vvp not found on PATH; the benchmark runs real simulation.")
+
+    cases = make_cases(args.cases, samples=args.samples)
+    tmp = None
+    if args.work_dir is None:
+        tmp = tempfile.TemporaryDirectory(prefix="eda_membench_")
+        work_root = Path(tmp.name)
+    else:
+        work_root = args.work_dir.expanduser().resolve()
+        work_root.mkdir(parents=True, exist_ok=True)
+    dataset_root = work_root / "dataset"
+    write_dataset(dataset_root, cases)
+
+    server = FakeLLMServer(cases=solutions(cases), fail_rounds=args.fail_rounds).start()
+    os.environ["IFLOW_BASE_URL"] = server.base_url
+    os.environ.setdefault("IFLOW_API_KEY", "bench")
+    from utils.clients.iflow_client import IFlowClient
+
+    llm_client = IFlowClient()
+
+    roots: SimpleQueue = SimpleQueue()
+    for i in range(max(1, args.jobs)):
+        roots.put(work_root / "projects" / f"job_{i}")
+    kept: List[Dict[str, Any]] = []
+    sizes: List[int] = []
+    plain_sizes: List[int] = []
+    per_key_total: Dict[str, int] = {}
+    rss: List[int] = []
+    passed = 0
+    lock = threading.Lock()
+
+    def _one(case: str) -> None:
+        nonlocal passed
+        root = roots.get()
+        try:
+            shared = run_case(
+                case=case,
+                dataset_root=dataset_root,
+                project_root=root,
+                results_root=work_root / "results",
+                tb_top="tb",
+                llm_client=llm_client,
+                flow_overrides={"docker_bin": str(FAKE_DOCKER), "max_rounds": args.fail_rounds + 2},
+            )
+        finally:
+            roots.put(root)
+        total, per_key = footprint(shared)
+        plain, _ = footprint(as_plain(shared))
+        with lock:
+            sizes.append(total)
+            plain_sizes.append(plain)
+            for k, v in per_key.items():
+                per_key_total[k] = per_key_total.get(k, 0) + v
+            passed += int(bool((shared.get("verify_feedback") or {}).get("passed")))
+            if args.keep_shared:
+                kept.append(shared)
+            del shared
+            gc.collect()
+            rss.append(rss_kb())
+            n = len(rss)
+        if n % 10 == 0 or n == len(cases):
+            print(f"[mem] {n}/{len(cases)} cases rss={rss[-1] / 1024:.1f}MiB", file=sys.__stdout__)
+
+    rss0 = rss_kb()
+    t0 = time.perf_counter()
+    # Node prints go to /dev/null as a whole: redirect_stdout is process-wide, not per thread.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull if not args.verbose else sys.stdout):
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+                list(pool.map(_one, [c.name for c in cases]))
+        finally:
+            server.stop()
+    wall = time.perf_counter() - t0
+
+    n = len(sizes)
+    print(f"[mem] cases={n} jobs={args.jobs} passed={passed} wall={wall:.1f}s keep_shared={args.keep_shared}")
+    print(
+        f"[mem] shared per case: mean={statistics.fmean(sizes) / 1024:.1f}KiB max={max(sizes) / 1024:.1f}KiB "
+        f"(as plain dicts: mean={statistics.fmean(plain_sizes) / 1024:.1f}KiB max={max(plain_sizes) / 1024:.1f}KiB)"
+    )
+    print(f"{'key':<28}{'mean_KiB':>10}")
+    for k, v in sorted(per_key_total.items(), key=lambda kv: -kv[1])[:12]:
+        print(f"{k:<28}{v / n / 1024:>10.2f}")
+    steady = rss[args.warmup :] if len(rss) > args.warmup + 1 else rss
+    growth = (steady[-1] - steady[0]) / max(1, len(steady) - 1)
+    print(
+        f"[mem] rss: start={rss0 / 1024:.1f}MiB after_warmup={steady[0] / 1024:.1f}MiB "
+        f"end={rss[-1] / 1024:.1f}MiB growth={growth:.1f}KiB/case"
+    )
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Offline end-to-end throughput benchmark.
+
+Runs the full build_flow (code -> review -> verify -> finish) on synthetic
+cases with:
+  - a local fake OpenAI-compatible server instead of iFlow,
+  - bench/fake_docker.py instead of Docker SpyGlass,
+  - real iverilog/vvp for simulation.
+Reports cases/minute, per-stage latency and peak RSS at a given concurrency.
+
+Example:
+  python eda_generation/bench/run_bench.py --cases 40 --concurrency 4 --fail-rounds 1
+  python eda_generation/bench/run_bench.py --endpoints 3 --bad-endpoint-latency 2 --bad-endpoint-error-rate 0.5
+  python eda_generation/bench/run_bench.py --llm-latency 0.3 --llm-tail-rate 0.05 --llm-tail-latency 5 --hedge-percentile 0.9
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fake_llm_server import FakeLLMServer  # noqa: E402
+from synth_cases import make_cases, solutions, write_dataset  # noqa: E402
+from run_dataset import run_case  # noqa: E402
+from utils.node_hooks import wrap_node_phases  # noqa: E402
+
+FAKE_DOCKER = Path(__file__).resolve().parent / "fake_docker.py"
+
+
+class StageTimer:
+    """Phase wrapper that records per-phase and per-stage (prep+exec+post) durations."""
+
+    def __init__(self) -> None:
+        self.phases: Dict[str, List[float]] = {}
+        self.stages: Dict[str, List[float]] = {}
+
+    @contextlib.contextmanager
+    def __call__(self, name: str, phase: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            self.phases.setdefault(f"{name}.{phase}", []).append(dt)
+            per_stage = self.stages.setdefault(name, [])
+            if phase == "prep" or not per_stage:
+                per_stage.append(0.0)
+            per_stage[-1] += dt
+
+
+def _bench_one(case: str, dataset_root: str, work_root: str, quiet: bool, parallel_checks: bool = False) -> Dict[str, Any]:
+    timer = StageTimer()
+    project_root = Path(work_root) / "projects" / case
+    results_root = Path(work_root) / "results"
+
+    t0 = time.perf_counter()
+    error: Optional[str] = None
+    shared: Dict[str, Any] = {}
+    sink = io.StringIO() if quiet else None
+    with contextlib.redirect_stdout(sink) if sink is not None else contextlib.nullcontext():
+        try:
+            shared = run_case(
+                case=case,
+                dataset_root=Path(dataset_root),
+                project_root=project_root,
+                results_root=results_root,
+                tb_top="tb",
+                flow_overrides={"docker_bin": str(FAKE_DOCKER), "parallel_checks": parallel_checks},
+                flow_hook=lambda flow: wrap_node_phases(flow, timer),
+            )
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+    wall = time.perf_counter() - t0
+
+    return {
+        "case": case,
+        "wall_s": wall,
+        "passed": bool((shared.get("verify_feedback") or {}).get("passed")),
+        "rounds": (shared.get("flow_status") or {}).get("round"),
+        "error": error,
+        "stages": timer.stages,
+        "phases": timer.phases,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "max_child_rss_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    }
+
+
+def _latency_stats(samples: List[float]) -> Dict[str, float]:
+    s = sorted(samples)
+    if not s:
+        return {}
+
+    def pct(p: float) -> float:
+        return s[min(len(s) - 1, int(round(p * (len(s) - 1))))]
+
+    return {
+        "count": len(s),
+        "mean_ms": statistics.fmean(s) * 1000,
+        "p50_ms": pct(0.50) * 1000,
+        "p95_ms": pct(0.95) * 1000,
+        "max_ms": s[-1] * 1000,
+    }
+
+
+def summarize(results: List[Dict[str, Any]], *, wall_s: float, concurrency: int) -> Dict[str, Any]:
+    stages: Dict[str, List[float]] = {}
+    phases: Dict[str, List[float]] = {}
+    for r in results:
+        for k, v in r["stages"].items():
+            stages.setdefault(k, []).extend(v)
+        for k, v in r["phases"].items():
+            phases.setdefault(k, []).extend(v)
+
+    rounds = [r["rounds"] for r in results if isinstance(r.get("rounds"), int)]
+    return {
+        "cases": len(results),
+        "concurrency": concurrency,
+        "wall_s": wall_s,
+        "cases_per_min": (len(results) / wall_s * 60) if wall_s > 0 else 0.0,
+        "passed": sum(1 for r in results if r["passed"]),
+        "errors": sum(1 for r in results if r["error"]),
+        "mean_rounds": statistics.fmean(rounds) if rounds else None,
+        "case_latency": _latency_stats([r["wall_s"] for r in results]),
+        "stage_latency": {k: _latency_stats(v) for k, v in sorted(stages.items())},
+        "phase_latency": {k: _latency_stats(v) for k, v in sorted(phases.items())},
+        "peak_worker_rss_kb": max((r["max_rss_kb"] for r in results), default=0),
+        "peak_tool_rss_kb": max((r["max_child_rss_kb"] for r in results), default=0),
+        "coordinator_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def print_report(summary: Dict[str, Any]) -> None:
+    print(
+        f"[bench] cases={summary['cases']} concurrency={summary['concurrency']} "
+        f"wall={summary['wall_s']:.2f}s throughput={summary['cases_per_min']:.1f} cases/min "
+        f"passed={summary['passed']} errors={summary['errors']} mean_rounds={summary['mean_rounds']}"
+    )
+    print(
+        f"[bench] peak RSS: worker={summary['peak_worker_rss_kb'] / 1024:.1f}MiB "
+        f"tools={summary['peak_tool_rss_kb'] / 1024:.1f}MiB "
+        f"coordinator={summary['coordinator_rss_kb'] / 1024:.1f}MiB"
+    )
+    print(f"{'stage':<28}{'count':>7}{'mean_ms':>10}{'p50_ms':>10}{'p95_ms':>10}{'max_ms':>10}")
+    rows = {"case": summary["case_latency"], **summary["stage_latency"], **summary["phase_latency"]}
+    for name, st in rows.items():
+        if not st:
+            continue
+        print(
+            f"{name:<28}{st['count']:>7}{st['mean_ms']:>10.1f}{st['p50_ms']:>10.1f}"
+            f"{st['p95_ms']:>10.1f}{st['max_ms']:>10.1f}"
+        )
+    for ep in summary.get("endpoints") or []:
+        print(f"[bench] endpoint {ep['base_url']} requests={ep['requests']} injected_errors={ep['errors']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline throughput benchmark for the code/review/verify flow.")
+    parser.add_argument("--cases", type=int, default=20, help="Number of synthetic cases.")
+    parser.add_argument("--concurrency", type=int, default=1, help="Number of cases run in parallel (processes).")
+    parser.add_argument("--samples", type=int, default=200, help="Stimulus samples per synthetic testbench.")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Fake LLM response delay in seconds.")
+    parser.add_argument("--spyglass-latency", type=float, default=0.0, help="Fake SpyGlass run delay in seconds.")
+    parser.add_argument("--fail-rounds", type=int, default=0, help="Wrong LLM answers per case before the right one.")
+    parser.add_argument("--responses-dir", type=Path, default=None, help="Recorded <case>.json raw LLM answers to serve.")
+    parser.add_argument("--work-dir", type=Path, default=None, help="Scratch directory (default: a temp dir, removed after).")
+    parser.add_argument("--json-out", type=Path, default=None, help="Write the summary (and per-case results) as JSON.")
+    parser.add_argument("--parallel-checks", action="store_true", help="Run review and verify concurrently (FlowParams.parallel_checks).")
+    parser.add_argument("--endpoints", type=int, default=1, help="Fake LLM servers behind IFLOW_ENDPOINTS (load balancing/failover); --fail-rounds is counted per server.")
+    parser.add_argument("--bad-endpoint-latency", type=float, default=0.0, help="--endpoints: extra delay of the first server.")
+    parser.add_argument("--bad-endpoint-error-rate", type=float, default=0.0, help="--endpoints: HTTP 503 rate of the first server.")
+    parser.add_argument("--llm-tail-rate", type=float, default=0.0, help="Fraction of fake LLM requests delayed by --llm-tail-latency.")
+    parser.add_argument("--llm-tail-latency", type=float, default=0.0, help="Delay in seconds of the slow requests.")
+    parser.add_argument("--hedge-percentile", type=float, default=0.0, help="Hedge LLM requests slower than this percentile (IFLOW_HEDGE_PERCENTILE; 0 = off).")
+    parser.add_argument("--verbose", action="store_true", help="Show node prints from each case.")
+    args = parser.parse_args()
+
+    if shutil.which("iverilog") is None or shutil.which("vvp") is None:
+        raise SystemExit("iverilog/vvp not found on PATH; the benchmark runs real simulation.")
+
+    cases = make_cases(args.cases, samples=args.samples)
+    tmp = None
+    if args.work_dir is None:
+        tmp = tempfile.TemporaryDirectory(prefix="eda_bench_")
+        work_root = Path(tmp.name)
+    else:
+        work_root = args.work_dir.expanduser().resolve()
+        work_root.mkdir(parents=True, exist_ok=True)
+
+    dataset_root = work_root / "dataset"
+    write_dataset(dataset_root, cases)
+
+    servers = [
+        FakeLLMServer(
+            cases=solutions(cases),
+            latency_s=args.llm_latency + (args.bad_endpoint_latency if i == 0 else 0.0),
+            fail_rounds=args.fail_rounds,
+            responses_dir=args.responses_dir,
+            error_rate=args.bad_endpoint_error_rate if i == 0 else 0.0,
+            tail_rate=args.llm_tail_rate,
+            tail_latency_s=args.llm_tail_latency,
+            seed=i,
+        ).start()
+        for i in range(max(1, args.endpoints))
+    ]
+    os.environ["IFLOW_BASE_URL"] = servers[0].base_url
+    if len(servers) > 1:
+        os.environ["IFLOW_ENDPOINTS"] = ",".join(s.base_url for s in servers)
+    os.environ.setdefault("IFLOW_API_KEY", "bench")
+    if args.hedge_percentile > 0:
+        os.environ["IFLOW_HEDGE_PERCENTILE"] = str(args.hedge_percentile)
+    os.environ["FAKE_SPYGLASS_DELAY"] = str(args.spyglass_latency)
+    print(f"[bench] fake LLM at {', '.join(s.base_url for s in servers)}, work dir {work_root}")
+
+    results: List[Dict[str, Any]] = []
+    t0 = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+            futs = [
+                pool.submit(_bench_one, c.name, str(dataset_root), str(work_root), not args.verbose, args.parallel_checks)
+                for c in cases
+            ]
+            for fut in as_completed(futs):
+                r = fut.result()
+                results.append(r)
+                status = "PASS" if r["passed"] else ("ERROR " + r["error"] if r["error"] else "FAIL")
+                print(f"[bench] {len(results)}/{len(cases)} {r['case']} {r['wall_s']:.2f}s rounds={r['rounds']} {status}")
+    finally:
+        wall = time.perf_counter() - t0
+        for server in servers:
+            server.stop()
+
+    summary = summarize(results, wall_s=wall, concurrency=args.concurrency)
+    if len(servers) > 1:
+        summary["endpoints"] = [
+            {"base_url": s.base_url, "requests": sum(s.calls.values()), "errors": s.errors} for s in servers
+        ]
+    print_report(summary)
+
+    if args.json_out:
+        args.json_out.write_text(json.dumps({"summary": summary, "cases": results}, indent=2), encoding="utf-8")
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Synthetic verilog-eval style cases for the offline benchmark.
+
+Each case gets <case>_prompt.txt, <case>_ref.sv and <case>_test.sv in the
+same layout as the real dataset, plus a known-good TopModule used by the fake
+LLM server as its canned answer.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List
+
+# (name, verilog operator, English description)
+_OPS = [
+    ("and", "&", "bitwise AND"),
+    ("or", "|", "bitwise OR"),
+    ("xor", "^", "bitwise XOR"),
+    ("add", "+", "sum (modulo 2^WIDTH)"),
+    ("sub", "-", "difference a - b (modulo 2^WIDTH)"),
+]
+
+CASE_TAG = "BENCH_CASE:"
+
+
+@dataclass
+class SynthCase:
+    name: str
+    width: int
+    op: str
+    op_desc: str
+    samples: int
+
+    def prompt(self) -> str:
+        return f"""\
+I would like you to implement a module named TopModule with the following
+interface. All input and output ports are one bit unless otherwise
+specified.
+
+ - input  a   ({self.width} bits)
+ - input  b   ({self.width} bits)
+ - output out ({self.width} bits)
+
+The module should drive out with the {self.op_desc} of a and b.
+
+{CASE_TAG} {self.name}
+"""
+
+    def module(self, name: str, *, op: str | None = None) -> str:
+        return f"""\
+module {name} (
+  input  [{self.width - 1}:0] a,
+  input  [{self.width - 1}:0] b,
+  output [{self.width - 1}:0] out
+);
+  assign out = a {op or self.op} b;
+endmodule
+"""
+
+    def solution(self) -> str:
+        return self.module("TopModule")
+
+    def wrong_solution(self) -> str:
+        # Still compiles, but mismatches on most samples.
+        return self.module("TopModule", op="&" if self.op != "&" else "|")
+
+    def testbench(self) -> str:
+        w = self.width
+        return f"""\
+`timescale 1 ps/1 ps
+
+module tb();
+  reg  [{w - 1}:0] a, b;
+  wire [{w - 1}:0] out_ref, out_dut;
+  integer i;
+  integer mismatches = 0;
+  integer first_time = 0;
+
+  RefModule good1 (.a(a), .b(b), .out(out_ref));
+  TopModule top_module1 (.a(a), .b(b), .out(out_dut));
+
+  initial begin
+    for (i = 0; i < {self.samples}; i = i + 1) begin
+      a = $random;
+      b = $random;
+      #1;
+      if (out_ref !== out_dut) begin
+        if (mismatches == 0) first_time = $time;
+        mismatches = mismatches + 1;
+      end
+    end
+    if (mismatches == 0)
+      $display("Hint: Output 'out' has no mismatches.");
+    else
+      $display("Hint: Output 'out' has %0d mismatches. First mismatch occurred at time %0d.", mismatches, first_time);
+    $display("Hint: Total mismatched samples is %0d out of %0d samples", mismatches, {self.samples});
+    $display("Mismatches: %0d in %0d samples", mismatches, {self.samples});
+    $finish;
+  end
+endmodule
+"""
+
+
+def make_cases(count: int, *, samples: int = 200) -> List[SynthCase]:
+    cases: List[SynthCase] = []
+    for i in range(count):
+        op_name, op, desc = _OPS[i % len(_OPS)]
+        width = 1 + (i * 7) % 32
+        cases.append(
+            SynthCase(
+                name=f"Bench{i:04d}_{op_name}{width}",
+                width=width,
+                op=op,
+                op_desc=desc,
+                samples=samples,
+            )
+        )
+    return cases
+
+
+def write_dataset(root: Path, cases: List[SynthCase]) -> Path:
+    """Write cases + problems.txt under root; returns the problems.txt path."""
+    root.mkdir(parents=True, exist_ok=True)
+    for c in cases:
+        (root / f"{c.name}_prompt.txt").write_text(c.prompt(), encoding="utf-8")
+        (root / f"{c.name}_ref.sv").write_text(c.module("RefModule"), encoding="utf-8")
+        (root / f"{c.name}_test.sv").write_text(c.testbench(), encoding="utf-8")
+    problems = root / "problems.txt"
+    problems.write_text("\n".join(c.name for c in cases) + "\n", encoding="utf-8")
+    return problems
+
+
+def solutions(cases: List[SynthCase]) -> Dict[str, SynthCase]:
+    return {c.name: c for c in cases}
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 from pocketflow import Flow
 
@@ -9,6 +9,7 @@ from nodes.code_agent import CodeAgentNode, CodeAgentParams
 from nodes.review_agent import ReviewAgentNode, ReviewAgentParams
 from nodes.verification_agent import VerificationAgentNode, VerificationAgentParams
 from nodes.finish_node import FinishNode
+from nodes.parallel_check_node import ParallelCheckNode
 
 @dataclass
 class FlowParams:
@@ -20,6 +21,20 @@ class FlowParams:
     tb_flist: str = "tb.f"
     tb_top: str = "tb_top"
     max_rounds: int = 3
+    container_name: str = "spyglass-centos7"
+    docker_bin: str = "docker"
+    spyglass_containers: Tuple[str, ...] = ()   # 容器池（可选），配合 license 槽位使用
+    spyglass_license_slots: int = 0             # >0 时跨进程限制同时运行的 SpyGlass 数
+    verify_scratch_dir: Optional[str] = None    # 仿真中间产物放到 tmpfs（如 /dev/shm），仅保留最后一轮
+    verify_vcd_on_fail: bool = False            # 仿真失败时从 VCD 中定位 DUT 与参考模型的首次分歧
+    verify_seeds: Tuple[int, ...] = ()          # 随机激励 TB：每个种子各跑一次 vvp（+seed=N，并行），合并各种子的 mismatch；空则单次运行
+    verify_seed_jobs: int = 0                   # 同时运行的种子进程数，0 = 种子数与 CPU 数取小
+    verify_stop_on_first_fail: bool = False     # 任一种子失败即终止其余种子
+    parallel_checks: bool = False               # review 与 verify 并行跑同一候选，合并路由（lint 优先）
+    llm_models: Tuple[str, ...] = ()             # 模型梯度（快→强），第 1 轮用首个模型，失败后逐级升级；空则用客户端默认模型
+    llm_escalate_after: int = 1                 # 每个模型最多连续失败几轮后升级到下一个
+    rollback_to_best: bool = True               # 某轮得分不如之前最佳候选时，下一轮从最佳候选 PATCH
+    stall_rounds: int = 0                       # 连续 K 轮无进展（lint/编译错误、mismatch 未改善）即提前终止，0 关闭
 
 
 def build_flow(*, llm_client: Any, params: Optional[FlowParams] = None) -> Flow:
@@ -35,16 +50,25 @@ def build_flow(*, llm_client: Any, params: Optional[FlowParams] = None) -> Flow:
 
     code_agent = CodeAgentNode(
         llm_client=llm_client,
-        params=CodeAgentParams(project_root=p.project_root),
+        params=CodeAgentParams(
+            project_root=p.project_root,
+            rollback_to_best=p.rollback_to_best,
+            model_ladder=tuple(p.llm_models),
+            escalate_after=p.llm_escalate_after,
+        ),
     )
 
     review_agent = ReviewAgentNode(
         params=ReviewAgentParams(
             project_root=p.project_root,
-            container_name="spyglass-centos7",
+            container_name=p.container_name,
+            docker_bin=p.docker_bin,
+            container_names=p.spyglass_containers,
+            license_slots=p.spyglass_license_slots,
             work_subdir=".",  # 与容器挂载路径一致
             rtl_flist=p.review_rtl_flist or p.rtl_flist,
             top_rtl=p.top_rtl,
+            stall_rounds=p.stall_rounds,
         )
     )
 
@@ -55,6 +79,12 @@ def build_flow(*, llm_client: Any, params: Optional[FlowParams] = None) -> Flow:
             tb_flist=p.tb_flist,
             tb_top=p.tb_top,
             work_subdir=".",  # 与容器挂载路径一致
+            scratch_dir=p.verify_scratch_dir,
+            vcd_on_fail=p.verify_vcd_on_fail,
+            sim_seeds=tuple(p.verify_seeds),
+            seed_jobs=p.verify_seed_jobs,
+            stop_on_first_fail=p.verify_stop_on_first_fail,
+            stall_rounds=p.stall_rounds,
             require_review_passed=False,
         )
     )
@@ -62,15 +92,24 @@ def build_flow(*, llm_client: Any, params: Optional[FlowParams] = None) -> Flow:
     finish = FinishNode()
 
     # Edges
-    code_agent - "next" >> review_agent
-
-    review_agent - "syntax_ok" >> verify_agent
-    review_agent - "syntax_fail" >> code_agent
-    review_agent - "abort" >> finish
-
-    verify_agent - "verify_ok" >> finish
-    verify_agent - "verify_fail" >> code_agent
-    verify_agent - "abort" >> finish
+    if p.parallel_checks:
+        check = ParallelCheckNode(review=review_agent, verify=verify_agent)
+        code_agent - "next" >> check
+
+        check - "syntax_fail" >> code_agent
+        check - "verify_ok" >> finish
+        check - "verify_fail" >> code_agent
+        check - "abort" >> finish
+    else:
+        code_agent - "next" >> review_agent
+
+        review_agent - "syntax_ok" >> verify_agent
+        review_agent - "syntax_fail" >> code_agent
+        review_agent - "abort" >> finish
+
+        verify_agent - "verify_ok" >> finish
+        verify_agent - "verify_fail" >> code_agent
+        verify_agent - "abort" >> finish
 
     flow = Flow(start=code_agent)
 
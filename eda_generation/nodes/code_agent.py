@@ -2,12 +2,30 @@ from __future__ import annotations
 
 import json
 import re
+import time
+from collections.abc import Mapping, Sequence
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
 
 from pocketflow import Node
-from utils.clients.iflow_client import IFlowClient
+from utils.candidates import CandidateStore, best_candidate, candidate, record_candidate
+from utils.clients.transcript import transcript_key
+from utils.feedback import spill, stash_feedback, unstash_feedback
+from utils.mismatch_summary import format_mismatch_summary
+from utils.model_cascade import DEFAULT_MODEL, model_for_round
+from utils.progress import llm_round
+from utils.rtl_context import RtlContextBuilder
+from utils.vcd_diff import format_divergence
+
+if TYPE_CHECKING:
+    from utils.clients.iflow_client import IFlowClient
+
+
+# Pseudo model name for rounds replayed from the solved cache (shows up in model stats).
+CACHE_MODEL = "cache"
+# Characters of a similar solved design included as GEN context.
+_SIMILAR_DESIGN_CHARS = 6000
 
 
 @dataclass
@@ -17,6 +35,10 @@ class CodeAgentParams:
     allowed_exts: Tuple[str, ...] = (".v", ".sv")
     temperature: float = 0.2
     max_files: int = 32
+    # RTL context packing: approximate prompt-token budget for CURRENT/EXISTING RTL and
+    # how much to strip ("none" | "comments" keeps line numbers | "aggressive").
+    context_token_budget: int = 12000
+    context_strip: str = "comments"
     output_mode: str = "json_files"
     forbid_tb_edit: bool = True
     strict_json_only: bool = True
@@ -24,6 +46,16 @@ class CodeAgentParams:
     # https://help.aliyun.com/zh/model-studio/qwen-structured-output). Use a
     # factory to avoid sharing mutable defaults.
     response_format: Optional[Dict[str, Any]] = field(default_factory=lambda: {"type": "json_object"})
+    # Every round's RTL is kept content-addressed (utils/candidates.py; default
+    # <project_root>/build/candidates). With rollback_to_best, a round that scored
+    # worse than an earlier one is discarded: the next PATCH starts from the best
+    # candidate and the feedback it received.
+    candidate_dir: Optional[str] = None
+    rollback_to_best: bool = True
+    # Model cascade (utils/model_cascade.py): round 1 uses model_ladder[0], each
+    # `escalate_after` failed rounds move one model up. Empty = the client's default.
+    model_ladder: Tuple[str, ...] = ()
+    escalate_after: int = 1
 
 
 class CodeAgentNode(Node):
@@ -31,13 +63,29 @@ class CodeAgentNode(Node):
     Code Agent Node:
     - Round 1: generate RTL from spec (GEN mode).
     - Round 2+: patch existing RTL using feedback (PATCH mode), and include the current RTL in prompt.
+      The RTL patched is the best-scoring candidate so far, not necessarily the latest one.
     """
 
     def __init__(self, *, llm_client: Optional[IFlowClient] = None, params: CodeAgentParams):
         super().__init__()
-        self._llm_client = llm_client or IFlowClient()
+        if llm_client is None:
+            from utils.clients.iflow_client import IFlowClient
+
+            llm_client = IFlowClient()
+        self._llm_client = llm_client
         self._p = params
         self._root = Path(params.project_root).resolve()
+        # Shared across PocketFlow's per-round node copies, so the file index persists between rounds.
+        self._ctx = RtlContextBuilder(
+            root=self._root,
+            rtl_dir=params.rtl_dir,
+            allowed_exts=params.allowed_exts,
+            token_budget=params.context_token_budget,
+            strip_mode=params.context_strip,
+        )
+        self._candidates = CandidateStore(
+            Path(params.candidate_dir).expanduser() if params.candidate_dir else self._root / "build" / "candidates"
+        )
 
     # ------------------------- PocketFlow hooks -------------------------
 
@@ -54,6 +102,8 @@ class CodeAgentNode(Node):
         rtl_files = shared.get("rtl_files")
         if rtl_files is None:
             rtl_files = self._auto_discover_rtl_files()
+        else:
+            rtl_files = list(rtl_files)
 
         # Ensure last-round generated/edited RTL is included in context (critical for PATCH mode)
         updated = shared.get("updated_rtl_files") or []
@@ -64,39 +114,104 @@ class CodeAgentNode(Node):
         review_fb = shared.get("review_feedback")
         verify_fb = shared.get("verify_feedback")
 
-        rtl_context = self._read_files_with_context(rtl_files, max_files=self._p.max_files)
+        base_round: Optional[int] = None
+        targets: List[str] = []
+        if round_no > 1:
+            prev = round_no - 1
+            # Feedback the previous candidate received, in case a later PATCH rolls back to it
+            # (stashed in the blob store; only read back on rollback).
+            shared.setdefault("candidate_feedback", {})[prev] = stash_feedback(
+                self._candidates, review_feedback=review_fb, verify_feedback=verify_fb
+            )
+            base_round = prev
+            best = best_candidate(flow_status) if self._p.rollback_to_best else None
+            if best is not None and best["round"] != prev:
+                base_round = best["round"]
+                review_fb, verify_fb, restored = self._restore_candidate(shared, best)
+                for p in reversed(restored):
+                    if p not in rtl_files:
+                        rtl_files.insert(0, p)
+                print(f"[code] round {prev} did not beat round {base_round} {best['score']}; patching from round {base_round}")
+            flow_status["patch_base_round"] = base_round
+            # The files PATCH answers return whole; sent verbatim, never stripped or excerpted.
+            targets = list(shared.get("updated_rtl_files") or rtl_files[:1])
+
+        packed = self._ctx.pack(
+            rtl_files,
+            review_fb=review_fb,
+            verify_fb=verify_fb,
+            max_files=self._p.max_files,
+            targets=targets,
+        )
+        rtl_context = packed.text
         feedback_text = self._format_feedback(review_fb, verify_fb)
 
-        mode = "gen" if round_no == 1 else "patch"
-        prompt = self._build_prompt(
-            spec=spec,
-            rtl_context=rtl_context,
-            feedback_text=feedback_text,
-            rtl_files=rtl_files,
-            mode=mode,
-        )
+        # Round 1 replays a cached passing design when run_case found one (utils/solved_cache.py).
+        warm_start = shared.get("warm_start") if round_no == 1 else None
+        if warm_start:
+            mode = "cached"
+            # Not an LLM round: left out of the model ladder and the max_rounds budget.
+            flow_status["cached_rounds"] = 1
+            prompt: List[Dict[str, str]] = []
+        else:
+            mode = "gen" if round_no == 1 else "patch"
+            prompt = self._build_prompt(
+                spec=spec,
+                rtl_context=rtl_context,
+                feedback_text=feedback_text,
+                rtl_files=rtl_files,
+                mode=mode,
+                similar=shared.get("similar_design") if mode == "gen" else None,
+            )
 
         return {
+            "case": shared.get("case"),
             "spec": spec,
             "rtl_files": rtl_files,
             "prompt": prompt,
             "has_feedback": bool(feedback_text.strip()),
             "round": round_no,
             "mode": mode,
+            "context_tokens": packed.tokens,
+            "context_targets": packed.targets,
+            "context_excerpted": packed.excerpted,
+            "context_omitted": packed.omitted,
+            "base_round": base_round,
+            "model": model_for_round(self._p.model_ladder, llm_round(flow_status), self._p.escalate_after),
+            "warm_start": warm_start,
         }
 
     def exec(self, prep_res: Dict[str, Any]) -> Dict[str, Any]:
-        print(f"[code] invoking LLM (temp={self._p.temperature}) ...")
+        if prep_res.get("mode") == "cached":
+            warm = prep_res["warm_start"]
+            print(f"[code] warm start: re-checking the cached design solved as {warm.get('case')} (no LLM call)")
+            raw = json.dumps(
+                {
+                    "files": [{"path": "TopModule.v", "content": warm["design"]}],
+                    "notes": f"warm start from solved cache ({warm.get('case')})",
+                }
+            )
+            return {"raw": raw, "usage": {}, "model": CACHE_MODEL, "latency_s": 0.0}
+
+        model = prep_res.get("model")
+        print(f"[code] invoking LLM (model={model or DEFAULT_MODEL}, temp={self._p.temperature}) ...")
+        # Record/replay slot: one per case and round (ignored in live mode).
+        tkey = transcript_key(prep_res.get("case"), prep_res.get("round"))
         llm_kwargs: Dict[str, Any] = {}
+        if model:
+            llm_kwargs["model"] = model
+        structured_kwargs = dict(llm_kwargs)
         if self._p.response_format:
-            llm_kwargs["response_format"] = self._p.response_format
+            structured_kwargs["response_format"] = self._p.response_format
+        t0 = time.monotonic()
 
         try:
             raw = self._llm_client.chat_completion(
                 prep_res["prompt"],
                 temperature=self._p.temperature,
                 stream=False,
-                **llm_kwargs,
+                transcript_key=tkey,
+                **structured_kwargs,
             )
         except Exception as e:
             if self._p.response_format:
@@ -105,23 +220,39 @@ class CodeAgentNode(Node):
                     prep_res["prompt"],
                     temperature=self._p.temperature,
                     stream=False,
+                    transcript_key=tkey,
+                    **llm_kwargs,
                 )
             else:
                 raise
 
-        print(f"[code] LLM completed, raw length={len(raw)}")
-        return {"raw": raw}
+        latency_s = time.monotonic() - t0
+        usage = dict(getattr(self._llm_client, "last_usage", None) or {})
+        print(
+            f"[code] LLM completed in {latency_s:.1f}s, raw length={len(raw)} "
+            f"prompt_tokens={usage.get('prompt_tokens')} cached_tokens={usage.get('cached_tokens')}"
+        )
+        return {"raw": raw, "usage": usage, "model": model or DEFAULT_MODEL, "latency_s": round(latency_s, 3)}
 
     def post(self, shared: Dict[str, Any], prep_res: Dict[str, Any], exec_res: Dict[str, Any]) -> Dict[str, Any]:
         raw = exec_res["raw"]
-        shared["code_agent_output_raw"] = raw
+        # Whole-file JSON answers are kept in the blob store, not in shared.
+        shared["code_agent_output_raw"] = spill(raw, self._candidates, ".json")
 
         parsed = self._parse_llm_json(raw, strict=self._p.strict_json_only)
         files = parsed.get("files", [])
         notes = (parsed.get("notes") or "").strip()
 
         updated_paths: List[str] = []
+        written: Dict[str, str] = {}
+        partial = self._partial_paths(prep_res)
+        targets = set(prep_res.get("context_targets") or ())
         for f in files:
+            returned = Path(str(f.get("path") or "").replace("\\", "/")).as_posix()
+            if returned not in targets and (returned in partial or Path(returned).name in partial):
+                # The prompt only had an excerpt (or nothing) of it, so this "full file" is truncated.
+                print(f"[code] ignoring {returned}: only an excerpt or nothing of it was in the prompt")
+                continue
             rel = "TopModule.v"
             content = str(f.get("content") or "")
             if not rel:
@@ -132,20 +263,44 @@ class CodeAgentNode(Node):
             print(f"[code] writing file: {rel} (len={len(content)})")
             self._write_text(rel, content)
             updated_paths.append(rel)
+            written[rel] = content
 
         shared["code_agent_notes"] = notes
         shared["updated_rtl_files"] = updated_paths
 
+        flow_status = shared.setdefault("flow_status", {})
+        base = candidate(flow_status, prep_res.get("base_round"))
+        try:
+            # Files this round left untouched are carried over from the candidate it patched.
+            cand_files = {rel: self._candidates.read(blob) for rel, blob in (base or {}).get("files", {}).items()}
+            cand_files.update(written)
+            record_candidate(
+                flow_status,
+                self._candidates,
+                int(prep_res.get("round") or 0),
+                cand_files,
+                base_round=prep_res.get("base_round"),
+            )
+        except OSError as e:
+            print(f"[code] could not store candidate: {e}")
+
         shared["last_edit_summary"] = self._make_edit_summary(
             has_feedback=prep_res.get("has_feedback", False),
             updated_paths=updated_paths,
             notes=notes,
         )
 
-        flow_status = shared.get("flow_status", {})
         round_no = flow_status.get("round")
         spec = (shared.get("spec") or "").strip()
 
+        usage = exec_res.get("usage") or {}
+        totals = flow_status.setdefault("llm_usage", {})
+        for k, v in usage.items():
+            totals[k] = int(totals.get(k, 0)) + int(v or 0)
+        flow_status.setdefault("llm_rounds", []).append(
+            {"round": round_no, "model": exec_res.get("model") or DEFAULT_MODEL, "latency_s": exec_res.get("latency_s")}
+        )
+
         # Persist debug info to build/debug.log (include llm_prompt)
         try:
             debug_dir = (self._root / "build").resolve()
@@ -158,11 +313,17 @@ class CodeAgentNode(Node):
                             "stage": "code",
                             "round": round_no,
                             "mode": prep_res.get("mode"),
+                            "base_round": prep_res.get("base_round"),
                             "spec": spec,
                             "updated_files": updated_paths,
                             "notes": notes,
                             "last_edit_summary": shared.get("last_edit_summary"),
+                            "context_tokens": prep_res.get("context_tokens"),
+                            "context_omitted": prep_res.get("context_omitted"),
                             "llm_prompt": prep_res.get("prompt", ""),
+                            "llm_usage": usage,
+                            "llm_model": exec_res.get("model"),
+                            "llm_latency_s": exec_res.get("latency_s"),
                         },
                         ensure_ascii=False,
                         indent=2,
@@ -184,6 +345,8 @@ class CodeAgentNode(Node):
             "route": "next",
             "updated_rtl_files": updated_paths,
             "notes": notes,
+            "usage": usage,
+            "model": exec_res.get("model"),
         }
         return "next"
 
@@ -197,7 +360,29 @@ class CodeAgentNode(Node):
         feedback_text: str,
         rtl_files: List[str],
         mode: str,
-    ) -> str:
+        similar: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, str]]:
+        """
+        Messages laid out for provider-side prefix caching:
+          [system: static rules] + [user: spec] are identical in every round of a case,
+          only the last user message (mode, current RTL, feedback) changes.
+        """
+        return [
+            {"role": "system", "content": self._system_block()},
+            {"role": "user", "content": f"SPEC (source of truth):\n{spec}\n"},
+            {
+                "role": "user",
+                "content": self._round_block(
+                    rtl_context=rtl_context,
+                    feedback_text=feedback_text,
+                    rtl_files=rtl_files,
+                    mode=mode,
+                    similar=similar,
+                ),
+            },
+        ]
+
+    def _system_block(self) -> str:
         rules = [
             "You are a senior RTL engineer.",
             "Goal: produce synthesizable Verilog/SystemVerilog that passes the given testbench.",
@@ -207,23 +392,35 @@ class CodeAgentNode(Node):
         ]
         if self._p.strict_json_only:
             rules.append("If you cannot comply with JSON-only output, still return JSON-only output.")
+        return f"""\
+SYSTEM RULES:
+{chr(10).join(f"- {r}" for r in rules)}
+
+OUTPUT REQUIREMENTS:
+- Output ONLY JSON.
+- Each file's "content" must be a complete file (not a diff).
+"""
 
+    def _round_block(
+        self,
+        *,
+        rtl_context: str,
+        feedback_text: str,
+        rtl_files: List[str],
+        mode: str,
+        similar: Optional[Dict[str, Any]] = None,
+    ) -> str:
         existing_hint = "\n".join([f"- {p}" for p in rtl_files]) if rtl_files else "(none)"
         rtl_ctx = rtl_context.strip() or "(none)"
         fb = feedback_text.strip() or "(none)"
 
         if mode == "patch":
             return f"""\
-SYSTEM RULES:
-{chr(10).join(f"- {r}" for r in rules)}
-
 TASK MODE:
 - PATCH (do not rewrite from scratch). Make the smallest change that fixes the failures.
 
-SPEC (source of truth):
-{spec}
-
-CURRENT RTL (authoritative; patch this code):
+CURRENT RTL (authoritative; patch this code -- files marked "patch target" are verbatim, the others are
+comment-stripped read-only context):
 {rtl_ctx}
 
 VERIFICATION FEEDBACK (what failed):
@@ -237,21 +434,15 @@ PATCH GUIDANCE:
 - Pure combinational logic only (assign or always_comb), no latches.
 
 OUTPUT REQUIREMENTS:
-- Output ONLY JSON.
 - Include ONLY the RTL files that you changed.
 - Provide full file content for each changed file.
+- Do NOT return files shown only as an excerpt or listed under OMITTED; you have not seen them in full.
 """
         # GEN mode (Round 1)
         return f"""\
-SYSTEM RULES:
-{chr(10).join(f"- {r}" for r in rules)}
-
 TASK MODE:
 - GENERATE (write the required RTL from scratch based on SPEC). Keep it minimal and synthesizable.
 
-SPEC:
-{spec}
-
 EXISTING RTL FILES (relative paths):
 {existing_hint}
 
@@ -260,21 +451,32 @@ EXISTING RTL CONTENT (read-only context):
 
 FEEDBACK FROM PREVIOUS ROUND:
 {fb}
-
+{self._similar_block(similar)}
 OUTPUT REQUIREMENTS:
-- Output ONLY JSON.
 - Include ONLY the RTL files that need to be created/updated.
-- Each file's "content" must be a complete file (not a diff).
+"""
+
+    @staticmethod
+    def _similar_block(similar: Optional[Dict[str, Any]]) -> str:
+        if not similar or not similar.get("design"):
+            return ""
+        design = str(similar["design"])
+        if len(design) > _SIMILAR_DESIGN_CHARS:
+            design = design[:_SIMILAR_DESIGN_CHARS] + "\n// ... (truncated)"
+        return f"""
+REFERENCE DESIGN (read-only; passed the testbench of a similar spec, case {similar.get('case')}, similarity {similar.get('similarity')}):
+- Reuse its structure only where the SPEC above agrees; the SPEC is the source of truth.
+{design}
 """
 
     # ------------------------- Feedback formatting -------------------------
 
     def _format_feedback(self, review_fb: Any, verify_fb: Any) -> str:
         parts: List[str] = []
-        if isinstance(review_fb, dict):
+        if isinstance(review_fb, Mapping):
             parts.append("REVIEW_FEEDBACK(spyglass):")
             parts.append(self._summarize_review_feedback(review_fb))
-        if isinstance(verify_fb, dict):
+        if isinstance(verify_fb, Mapping):
             parts.append("VERIFY_FEEDBACK(iverilog):")
             parts.append(self._summarize_verify_feedback(verify_fb))
         return "\n".join([p for p in parts if p.strip()])
@@ -304,12 +506,26 @@ OUTPUT REQUIREMENTS:
             for e in (fb.get("compile_errors") or [])[:50]:
                 lines.append(f"- COMPILE_ERROR: {e.get('file')}:{e.get('line')} {e.get('message')}")
 
-        for case in (fb.get("failed_cases") or [])[:50]:
-            cname = case.get("case") or "<unknown>"
-            lines.append(f"- FAIL_CASE: {cname} {case.get('message')}")
+        summary = fb.get("mismatch_summary") or []
+        if summary:
+            # Per-signal groups replace the per-sample FAIL_CASE lines and per-output hints.
+            for ln in format_mismatch_summary(summary):
+                lines.append(f"- MISMATCH: {ln}")
+            for case in (fb.get("failed_cases") or [])[:50]:
+                cname = case.get("case") or "<unknown>"
+                if cname.startswith("sample_") or cname == "mismatch_total":
+                    continue
+                lines.append(f"- FAIL_CASE: {cname} {case.get('message')}")
+        else:
+            for case in (fb.get("failed_cases") or [])[:50]:
+                cname = case.get("case") or "<unknown>"
+                lines.append(f"- FAIL_CASE: {cname} {case.get('message')}")
+
+        for ln in format_divergence(fb.get("first_divergence") or {}):
+            lines.append(f"- WAVEFORM: {ln}")
 
         tail = fb.get("raw_log_tail") or []
-        if isinstance(tail, list) and tail:
+        if isinstance(tail, Sequence) and not isinstance(tail, str) and tail:
             if fb.get("compile_passed") is False:
                 # compile failed: raw_log_tail is compile tail -> include last N lines
                 for s in tail[-20:]:
@@ -321,6 +537,8 @@ OUTPUT REQUIREMENTS:
                 hint_lines = [
                     s for s in tail if str(s).strip().startswith(("Hint:", "Mismatches:"))
                 ]
+                if summary:
+                    hint_lines = [s for s in hint_lines if "Hint: Output" not in str(s)]
                 for s in hint_lines[-30:]:
                     lines.append(f"- {str(s).strip()}")
 
@@ -328,31 +546,28 @@ OUTPUT REQUIREMENTS:
 
     # ------------------------- File IO -------------------------
 
+    def _restore_candidate(self, shared: Dict[str, Any], cand: Dict[str, Any]) -> Tuple[Any, Any, List[str]]:
+        """Write a stored candidate back to the project and return (review_fb, verify_fb, paths)."""
+        paths: List[str] = []
+        for rel, blob in cand.get("files", {}).items():
+            self._validate_target_path(rel)
+            self._write_text(rel, self._candidates.read(blob))
+            paths.append(rel)
+        fb = unstash_feedback((shared.get("candidate_feedback") or {}).get(cand["round"]))
+        shared["updated_rtl_files"] = paths
+        return fb.get("review_feedback"), fb.get("verify_feedback"), paths
+
+    @staticmethod
+    def _partial_paths(prep_res: Dict[str, Any]) -> Set[str]:
+        """Paths (and basenames) of files sent only as excerpts or listed as omitted."""
+        paths = set(prep_res.get("context_excerpted") or ()) | set(prep_res.get("context_omitted") or ())
+        return paths | {Path(p).name for p in paths}
+
     def _auto_discover_rtl_files(self) -> List[str]:
-        rtl_root = (self._root / self._p.rtl_dir).resolve()
-        if not rtl_root.exists():
-            return []
-        out: List[str] = []
-        for p in rtl_root.rglob("*"):
-            if p.is_file() and p.suffix in self._p.allowed_exts:
-                out.append(str(p.relative_to(self._root)).replace("\\", "/"))
-        out.sort()
-        return out
+        return self._ctx.discover()
 
     def _read_files_with_context(self, rel_paths: List[str], *, max_files: int) -> str:
-        chunks: List[str] = []
-        for rel in rel_paths[:max_files]:
-            try:
-                abs_path = (self._root / rel).resolve()
-                if not abs_path.exists():
-                    continue
-                if abs_path.suffix not in self._p.allowed_exts:
-                    continue
-                text = abs_path.read_text(encoding="utf-8", errors="ignore")
-                chunks.append(f"### FILE: {rel}\n{text}\n")
-            except Exception:
-                continue
-        return "\n".join(chunks).strip()
+        return self._ctx.pack(rel_paths, max_files=max_files).text
 
     def _write_text(self, rel_path: str, content: str) -> None:
         abs_path = (self._root / rel_path).resolve()
@@ -6,6 +6,9 @@ from typing import Any, Dict
 
 from pocketflow import Node
 
+from nodes.verification_agent import persist_scratch
+from utils.feedback import jsonable
+
 
 class FinishNode(Node):
     """Terminal node to mark flow completion and allow cleanup/summary."""
@@ -21,7 +24,9 @@ class FinishNode(Node):
         shared["flow_status"].setdefault("last_reason", "finished")
         return "done"
     
-    def post(self, shared: Dict[str, Any], prep_res: Any, exec_res: str) -> Dict[str, Any]:
+    def post(self, shared: Dict[str, Any], prep_res: Any, exec_res: str) -> str:
+        # Last verify round's tmpfs artifacts (if any) into build/verify, before the snapshot.
+        persist_scratch(shared)
         # Persist final shared snapshot once per flow for postmortem comparison.
         try:
             project_root = shared.get("project_root")
@@ -34,8 +39,9 @@ class FinishNode(Node):
                 "shared": shared,
             }
             with (build_dir / "shared.log").open("a", encoding="utf-8") as f:
-                f.write(json.dumps(snap, ensure_ascii=False, indent=2))
+                f.write(json.dumps(snap, ensure_ascii=False, indent=2, default=jsonable))
                 f.write("\n")
         except Exception:
             pass
-        return shared
+        # The returned action is looked up in successors, so it must be a string.
+        return exec_res
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Tuple
+
+from pocketflow import Node
+
+from nodes.review_agent import ReviewAgentNode
+from nodes.verification_agent import VerificationAgentNode
+
+
+class ParallelCheckNode(Node):
+    """
+    Run lint (ReviewAgentNode) and simulation (VerificationAgentNode) on the same
+    candidate at the same time and merge them into one route:
+      - review abort / syntax_fail wins (lint errors take priority, and the verify
+        result is dropped just as the sequential flow would never have produced it);
+      - otherwise the verify route (verify_ok / verify_fail / abort).
+    The wrapped nodes' own prep/exec/post are called, so their feedback, status,
+    debug logs and any phase hooks (see utils/node_hooks.py) behave as in the
+    sequential flow.
+    """
+
+    def __init__(self, *, review: ReviewAgentNode, verify: VerificationAgentNode):
+        super().__init__()
+        self._review = review
+        self._verify = verify
+        self.inner_nodes = (review, verify)
+
+    def prep(self, shared: Dict[str, Any]) -> Tuple[Any, Any]:
+        return self._review.prep(shared), self._verify.prep(shared)
+
+    def exec(self, prep_res: Tuple[Any, Any]) -> Tuple[Any, Any]:
+        review_prep, verify_prep = prep_res
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="check") as pool:
+            review_fut = pool.submit(self._review._exec, review_prep)
+            verify_fut = pool.submit(self._verify._exec, verify_prep)
+            return review_fut.result(), verify_fut.result()
+
+    def post(self, shared: Dict[str, Any], prep_res: Tuple[Any, Any], exec_res: Tuple[Any, Any]) -> str:
+        review_route = self._review.post(shared, prep_res[0], exec_res[0])
+        if review_route != "syntax_ok":
+            print(f"[check] review route={review_route}; verify result discarded")
+            return review_route
+        verify_route = self._verify.post(shared, prep_res[1], exec_res[1])
+        print(f"[check] review route={review_route} verify route={verify_route}")
+        return verify_route
@@ -1,14 +1,19 @@
 from __future__ import annotations
 
+import contextlib
 import re
 import subprocess
 import json
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from pocketflow import Node
 
+from utils.feedback import Feedback, LogTail, spill_store
+from utils.progress import llm_round, record_round, stalled_rounds
+from utils.slot_lock import SlotLimiter
+
 
 @dataclass
 class ReviewAgentParams:
@@ -17,6 +22,16 @@ class ReviewAgentParams:
     container_name: str = "spyglass-centos7"
     docker_bin: str = "docker"
 
+    # Container pool + license limiter shared by every flow on this host. With
+    # license_slots > 0 each review leases a slot (flock on slot_lock_dir), runs in
+    # container_names[slot % len] (or container_name) and uses its own SpyGlass
+    # project dir, so concurrent reviews neither exceed the license count nor
+    # clobber each other's review_proj.
+    container_names: Tuple[str, ...] = ()
+    license_slots: int = 0
+    slot_lock_dir: str = "/tmp/eda_spyglass_slots"
+    slot_timeout_s: Optional[float] = None
+
     work_subdir: str = "."          # run SpyGlass under <project_root>/<work_subdir>
     rtl_flist: str = "rtl.f"                # relative to project_root (or absolute)
     top_rtl: str = "top"
@@ -34,6 +49,9 @@ class ReviewAgentParams:
     raw_tail_lines: int = 120
     max_fail_attempts: int = 3
     max_rounds: int = 3
+    # Abort once this many consecutive rounds fail to improve on the best earlier round
+    # (see utils/progress.py); 0 disables the check.
+    stall_rounds: int = 0
 
 
 class ReviewAgentNode(Node):
@@ -48,6 +66,9 @@ class ReviewAgentNode(Node):
         super().__init__()
         self._p = params
         self._root = Path(params.project_root).resolve()
+        self._slots = (
+            SlotLimiter(params.slot_lock_dir, params.license_slots) if params.license_slots > 0 else None
+        )
 
     def prep(self, shared: Dict[str, Any]) -> Dict[str, Any]:
         rtl_flist = shared.get("rtl_flist", self._p.rtl_flist)
@@ -83,10 +104,41 @@ class ReviewAgentNode(Node):
         }
 
     def exec(self, prep_res: Dict[str, Any]) -> Dict[str, Any]:
-        Path(prep_res["tcl_path"]).write_text(prep_res["tcl_text"], encoding="utf-8")
+        with self._lease() as slot:
+            return self._exec_spyglass(prep_res, slot)
+
+    @contextlib.contextmanager
+    def _lease(self) -> Iterator[Optional[int]]:
+        if self._slots is None:
+            yield None
+            return
+        with self._slots.acquire(timeout_s=self._p.slot_timeout_s) as slot:
+            yield slot
+
+    def _container_for(self, slot: Optional[int]) -> str:
+        if slot is None or not self._p.container_names:
+            return self._p.container_name
+        return self._p.container_names[slot % len(self._p.container_names)]
+
+    def _exec_spyglass(self, prep_res: Dict[str, Any], slot: Optional[int]) -> Dict[str, Any]:
+        container = self._container_for(slot)
+        tcl_text = prep_res["tcl_text"]
+        if slot is not None:
+            tcl_text = self._build_tcl(
+                rtl_flist_abs=prep_res["rtl_flist_abs"],
+                top_rtl=prep_res["top_rtl"],
+                goal=self._p.goal,
+                errors_abs=prep_res["errors_path"],
+                warnings_abs=prep_res["warnings_path"],
+                project_name=f"review_proj_s{slot}",
+            )
+        Path(prep_res["tcl_path"]).write_text(tcl_text, encoding="utf-8")
 
-        print(f"[review] starting docker start + spyglass (tcl={prep_res['tcl_path']})...")
-        start_out, start_rc = self._run_cmd([self._p.docker_bin, "start", self._p.container_name])
+        print(
+            f"[review] starting docker start + spyglass (tcl={prep_res['tcl_path']} "
+            f"container={container} slot={slot})..."
+        )
+        start_out, start_rc = self._run_cmd([self._p.docker_bin, "start", container])
 
         # Because host path == container path under /home/project mount, we can pass absolute tcl path directly.
         tcl_abs = prep_res["tcl_path"]
@@ -97,7 +149,7 @@ class ReviewAgentNode(Node):
             "exec",
             "-w",
             workdir_abs,
-            self._p.container_name,
+            container,
             "bash",
             "-lc",
             f"spyglass -shell -tcl {tcl_abs}",
@@ -114,7 +166,7 @@ class ReviewAgentNode(Node):
 
         Path(prep_res["raw_log_path"]).write_text(raw_log, encoding="utf-8", errors="ignore")
 
-        return {"raw_log": raw_log, "returncode": rc, "start_rc": start_rc}
+        return {"raw_log": raw_log, "returncode": rc, "start_rc": start_rc, "container": container, "slot": slot}
 
     def post(self, shared: Dict[str, Any], prep_res: Dict[str, Any], exec_res: Dict[str, Any]) -> Dict[str, Any]:
         err_text = self._read_text(prep_res["errors_path"])
@@ -149,19 +201,23 @@ class ReviewAgentNode(Node):
                 },
             )
 
-        feedback = {
-            "phase": "review",
-            "tool": "spyglass(docker)",
-            "passed": passed,
-            "issues": issues[: self._p.max_issues],
-            "artifacts": {
+        feedback = Feedback(
+            phase="review",
+            tool="spyglass(docker)",
+            passed=passed,
+            issues=issues[: self._p.max_issues],
+            artifacts={
                 "tcl": prep_res["tcl_path"],
                 "errors": prep_res["errors_path"],
                 "warnings": prep_res["warnings_path"],
                 "raw_log": prep_res["raw_log_path"],
+                "container": exec_res.get("container"),
+                "slot": exec_res.get("slot"),
             },
-            "raw_log_tail": exec_res.get("raw_log", "").splitlines()[-self._p.raw_tail_lines :],
-        }
+            raw_log_tail=LogTail(
+                exec_res.get("raw_log", "").splitlines()[-self._p.raw_tail_lines :], store=spill_store(shared)
+            ),
+        )
 
         shared["review_feedback"] = feedback
         flow_status = shared.setdefault("flow_status", {})
@@ -169,7 +225,8 @@ class ReviewAgentNode(Node):
         attempts = int(flow_status.get("review_attempts", 0))
         if passed:
             attempts = 0
-        else:
+        elif llm_round(flow_status) > 0:
+            # A cached warm-start design that no longer passes does not use up an attempt.
             attempts += 1
 
         route = "syntax_ok" if passed else "syntax_fail"
@@ -182,10 +239,17 @@ class ReviewAgentNode(Node):
             reason = "syntax_fail"
 
         round_cnt = int(flow_status.get("round", 0))
-        if self._p.max_rounds and round_cnt > self._p.max_rounds:
+        if self._p.max_rounds and llm_round(flow_status) > self._p.max_rounds:
             route = "abort"
             reason = "max_rounds_reached"
 
+        error_count = sum(1 for x in issues if str(x.get("severity", "")).lower() in ("fatal", "error"))
+        record_round(flow_status, round_cnt, lint_errors=error_count if error_count or passed else 1)
+        stalled = stalled_rounds(flow_status["progress"])
+        if route == "syntax_fail" and self._p.stall_rounds and stalled >= self._p.stall_rounds:
+            route = "abort"
+            reason = "no_progress"
+
         flow_status["review_attempts"] = attempts
         flow_status["last_reason"] = reason
         flow_status["last_stage"] = "review"
@@ -194,9 +258,10 @@ class ReviewAgentNode(Node):
             "stage": "review",
             "route": route,
             "passed": passed,
-            "error_count": sum(1 for x in issues if str(x.get("severity", "")).lower() in ("fatal", "error")),
+            "error_count": error_count,
             "warning_count": sum(1 for x in issues if str(x.get("severity", "")).lower() == "warning"),
             "attempts": attempts,
+            "stalled_rounds": stalled,
             "reason": reason,
         }
 
@@ -243,13 +308,14 @@ class ReviewAgentNode(Node):
         goal: str,
         errors_abs: str,
         warnings_abs: str,  # unused (kept for signature compatibility)
+        project_name: str = "review_proj",
     ) -> str:
         # We only care about Error/Fatal. Parse SpyGlass moresimple.rpt blocks.
         all_rpt_abs = f"{errors_abs}.moresimple.rpt"
 
         return "\n".join(
             [
-                "new_project review_proj -force",
+                f"new_project {project_name} -force",
                 f'set fp [open "{rtl_flist_abs}" r]',
                 "set flist_raw [read $fp]",
                 "close $fp",
@@ -268,7 +334,7 @@ class ReviewAgentNode(Node):
                 # Locate moresimple report in consolidated_reports
                 f'set __TOP "{top_rtl}"',
                 'set __GOAL [string map {"/" "_"} "' + goal + '"]',
-                'set __RPT_DIR [file normalize [format "./review_proj/consolidated_reports/%s_%s" $__TOP $__GOAL]]',
+                f'set __RPT_DIR [file normalize [format "./{project_name}/consolidated_reports/%s_%s" $__TOP $__GOAL]]',
                 'set __RPT [file join $__RPT_DIR "moresimple.rpt"]',
 
                 f'set __ERR "{errors_abs}"',
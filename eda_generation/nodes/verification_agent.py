@@ -1,14 +1,89 @@
 from __future__ import annotations
 
+import hashlib
+import os
 import re
+import shutil
+import signal
 import subprocess
 import json
+import threading
+import time
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 from pocketflow import Node
 
+from utils.feedback import Feedback, LogTail, jsonable, spill_store
+from utils.mismatch_summary import summarize_mismatches
+from utils.progress import llm_round, record_round, stalled_rounds
+from utils.vcd_diff import first_divergence
+
+
+def parse_seeds(text: str) -> Tuple[int, ...]:
+    """"1,2,7" / "1-8" / "1-4,100" -> the seeds in order, duplicates dropped."""
+    seeds: List[int] = []
+    for part in (text or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        m = re.fullmatch(r"(\d+)(?:\s*-\s*(\d+))?", part)
+        if not m:
+            raise ValueError(f"bad seed {part!r} (expected N or N-M)")
+        lo = int(m.group(1))
+        hi = int(m.group(2)) if m.group(2) else lo
+        seeds.extend(range(lo, hi + 1))
+    return tuple(dict.fromkeys(seeds))
+
+
+def persist_scratch(shared: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Move the last verify round's scratch artifacts into out_dir and remove its scratch dir.
+
+    Called once the flow is over, whatever stage it ended on (FinishNode, or run_case()
+    if the flow raised); returns the updated artifact paths, {} if nothing was in scratch.
+    """
+    info = (shared.get("flow_status") or {}).pop("verify_scratch", None)
+    if not info:
+        return {}
+    out_dir = Path(info["out_dir"])
+    moved: Dict[str, str] = {}
+    for key, src in info["files"].items():
+        if not Path(src).exists():
+            continue
+        try:
+            moved[key] = str(shutil.move(src, str(out_dir / Path(src).name)))
+        except OSError:
+            continue
+    out: Dict[str, Any] = {}
+    seed_logs: Dict[str, str] = {}
+    for seed, src in (info.get("seed_logs") or {}).items():
+        try:
+            seed_logs[seed] = str(shutil.move(src, str(out_dir / Path(src).name)))
+        except OSError:
+            continue
+    if seed_logs:
+        out["seed_logs"] = seed_logs
+    if "simv_path" in moved:
+        out["simv"] = moved["simv_path"]
+    if "compile_log" in moved:
+        out["compile_log"] = out["compile_out_full"] = moved["compile_log"]
+    if "run_log" in moved:
+        out["run_log"] = out["run_out_full"] = moved["run_log"]
+    if "vcd_path" in moved:
+        out["vcd"] = moved["vcd_path"]
+    shutil.rmtree(info["dir"], ignore_errors=True)
+
+    fb = shared.get("verify_feedback")
+    if out and isinstance(fb, Mapping) and isinstance(fb.get("artifacts"), dict):
+        fb["artifacts"].update(out)
+        if fb.get("first_divergence") and out.get("vcd"):
+            fb["first_divergence"]["vcd"] = out["vcd"]
+    return out
+
 
 @dataclass
 class VerificationAgentParams:
@@ -21,6 +96,11 @@ class VerificationAgentParams:
     work_subdir: str = "smoketest"        # run iverilog/vvp under <project_root>/<work_subdir>
     out_dir: str = "build/verify"         # store artifacts under project_root/out_dir
     sim_exe: str = "simv"
+    # Optional RAM-backed scratch (e.g. "/dev/shm/eda_verify"): simv and the compile/run
+    # logs of every round go there, each log is written once, and when the flow finishes
+    # (on any route, see persist_scratch) the last round is moved into out_dir and the
+    # scratch dir removed.
+    scratch_dir: Optional[str] = None
 
     iverilog_bin: str = "iverilog"
     vvp_bin: str = "vvp"
@@ -31,12 +111,32 @@ class VerificationAgentParams:
     context_radius_lines: int = 2
     max_errors: int = 200
     max_failed_cases: int = 200
+    mismatch_examples: int = 3  # expected-vs-got examples kept per signal in mismatch_summary
     raw_tail_lines: int = 200
 
+    # On a failing run, locate the first DUT/RefModule divergence in a VCD -- the TB's own
+    # dump if it has <name>_ref/<name>_dut, else a re-run with $dumpvars(vcd_depth, tb_top) --
+    # and report it in verify_feedback["first_divergence"].
+    vcd_on_fail: bool = False
+    vcd_depth: int = 1
+    vcd_trace_window: int = 4
+
+    # Randomized testbenches: run simv once per seed (vvp simv +seed=<n>, see seed_plusarg),
+    # up to seed_jobs processes at a time, and merge the failures of every failing seed;
+    # () keeps the single plain run. With stop_on_first_fail the seeds still running are
+    # killed (and queued ones skipped) as soon as one seed fails.
+    sim_seeds: Tuple[int, ...] = ()
+    seed_plusarg: str = "+seed={seed}"
+    seed_jobs: int = 0                    # 0 = one process per seed, capped at the CPU count
+    stop_on_first_fail: bool = False
+
     # Gate: only run verify when review passed
     require_review_passed: bool = True
     max_fail_attempts: int = 3
     max_rounds: int = 3
+    # Abort once this many consecutive rounds fail to improve on the best earlier round
+    # (see utils/progress.py); 0 disables the check.
+    stall_rounds: int = 0
 
 
 class VerificationAgentNode(Node):
@@ -56,7 +156,7 @@ class VerificationAgentNode(Node):
     def prep(self, shared: Dict[str, Any]) -> Dict[str, Any]:
         if self._p.require_review_passed:
             rf = shared.get("review_feedback")
-            if isinstance(rf, dict) and rf.get("passed") is False:
+            if isinstance(rf, Mapping) and rf.get("passed") is False:
                 # Skip verification if review failed
                 return {"skip": True, "reason": "review_failed"}
             if rf is None:
@@ -76,16 +176,25 @@ class VerificationAgentNode(Node):
         if not tb_f.exists():
             raise FileNotFoundError(f"TB flist not found: {tb_f}")
 
-        simv_path = out_dir / self._p.sim_exe
-        compile_log = out_dir / "sim_compile.log"
-        run_log = out_dir / "sim_run.log"
-        compile_out_full = out_dir / "compile_out_full.log"
-        run_out_full = out_dir / "run_out_full.log"
+        art_dir = self._scratch_dir(out_dir) or out_dir
+        simv_path = art_dir / self._p.sim_exe
+        compile_log = art_dir / "sim_compile.log"
+        run_log = art_dir / "sim_run.log"
+        if art_dir != out_dir:
+            # Scratch mode: one copy of each log.
+            compile_out_full = compile_log
+            run_out_full = run_log
+        else:
+            compile_out_full = out_dir / "compile_out_full.log"
+            run_out_full = out_dir / "run_out_full.log"
+        vcd_path = art_dir / "wave_fail.vcd"
         compile_error_log = out_dir / "compile_error.log"
         mismatch_case_log = out_dir / "mismatch_case.log"
 
         return {
             "skip": False,
+            "out_dir": str(out_dir),
+            "scratch": art_dir != out_dir,
             "workdir": str(workdir),
             "rtl_flist_abs": str(rtl_f),
             "tb_flist_abs": str(tb_f),
@@ -94,6 +203,7 @@ class VerificationAgentNode(Node):
             "run_log": str(run_log),
             "compile_out_full": str(compile_out_full),
             "run_out_full": str(run_out_full),
+            "vcd_path": str(vcd_path),
             "compile_error_log": str(compile_error_log),
             "mismatch_case_log": str(mismatch_case_log),
         }
@@ -117,8 +227,7 @@ class VerificationAgentNode(Node):
             *self._p.compile_extra_args,
         ]
         compile_out, compile_rc = self._run_cmd(compile_cmd, cwd=prep_res["workdir"])
-        Path(prep_res["compile_log"]).write_text(compile_out, encoding="utf-8", errors="ignore")
-        Path(prep_res["compile_out_full"]).write_text(compile_out, encoding="utf-8", errors="ignore")
+        self._write_log(prep_res, "compile_log", "compile_out_full", compile_out)
         print(f"[verify] compile done rc={compile_rc}")
 
         if compile_rc != 0:
@@ -132,35 +241,56 @@ class VerificationAgentNode(Node):
             }
 
         # 2) run
+        if self._p.sim_seeds:
+            seeds = self._run_seeds(prep_res)
+            self._write_log(prep_res, "run_log", "run_out_full", seeds["run_out"])
+            divergence = None
+            if self._p.vcd_on_fail and seeds["failing_seed"] is not None:
+                # Seeds share the workdir, so the TB's own dump may be another seed's: always re-run.
+                plusarg = self._p.seed_plusarg.format(seed=seeds["failing_seed"])
+                divergence = self._find_divergence(prep_res, "", time.time(), plusargs=(plusarg,))
+            return {
+                "skipped": False,
+                "compile_rc": compile_rc,
+                "compile_out": compile_out,
+                "first_divergence": divergence,
+                **seeds,
+            }
+
         print("[verify] running vvp ...")
         run_cmd = [self._p.vvp_bin, prep_res["simv_path"]]
+        run_started = time.time()
         run_out, run_rc = self._run_cmd(run_cmd, cwd=prep_res["workdir"])
-        Path(prep_res["run_log"]).write_text(run_out, encoding="utf-8", errors="ignore")
-        Path(prep_res["run_out_full"]).write_text(run_out, encoding="utf-8", errors="ignore")
+        self._write_log(prep_res, "run_log", "run_out_full", run_out)
         print(f"[verify] run done rc={run_rc}")
 
+        divergence = None
+        if self._p.vcd_on_fail and (run_rc != 0 or self._parse_failed_cases(run_out)):
+            divergence = self._find_divergence(prep_res, run_out, run_started)
+
         return {
             "skipped": False,
             "compile_rc": compile_rc,
             "compile_out": compile_out,
             "run_rc": run_rc,
             "run_out": run_out,
+            "first_divergence": divergence,
         }
 
     def post(self, shared: Dict[str, Any], prep_res: Dict[str, Any], exec_res: Dict[str, Any]) -> Dict[str, Any]:
         if exec_res.get("skipped"):
-            shared["verify_feedback"] = {
-                "phase": "verify",
-                "tool": "iverilog",
-                "passed": False,
-                "skipped": True,
-                "reason": exec_res.get("reason"),
-                "compile_passed": False,
-                "compile_errors": [],
-                "failed_cases": [],
-                "artifacts": {},
-                "raw_log_tail": [],
-            }
+            shared["verify_feedback"] = Feedback(
+                phase="verify",
+                tool="iverilog",
+                passed=False,
+                skipped=True,
+                reason=exec_res.get("reason"),
+                compile_passed=False,
+                compile_errors=[],
+                failed_cases=[],
+                artifacts={},
+                raw_log_tail=[],
+            )
             shared.setdefault("flow_status", {})["last_stage"] = "verify"
             shared.setdefault("verify_status", {})
             shared["verify_status"] = {
@@ -183,19 +313,25 @@ class VerificationAgentNode(Node):
 
         failed_cases = []
         if compile_passed:
-            failed_cases = self._parse_failed_cases(run_out)
+            failed_cases = exec_res["failed_cases"] if "failed_cases" in exec_res else self._parse_failed_cases(run_out)
 
         passed = compile_passed and (exec_res.get("run_rc", 1) == 0) and (len(failed_cases) == 0)
 
-        feedback = {
-            "phase": "verify",
-            "tool": "iverilog",
-            "passed": passed,
-            "skipped": False,
-            "compile_passed": compile_passed,
-            "compile_errors": compile_errors[: self._p.max_errors],
-            "failed_cases": failed_cases[: self._p.max_failed_cases],
-            "artifacts": {
+        mismatch_summary: List[Dict[str, Any]] = []
+        if compile_passed and not passed and run_out:
+            mismatch_summary = summarize_mismatches(run_out.splitlines(), examples=self._p.mismatch_examples)
+
+        feedback = Feedback(
+            phase="verify",
+            tool="iverilog",
+            passed=passed,
+            skipped=False,
+            compile_passed=compile_passed,
+            compile_errors=compile_errors[: self._p.max_errors],
+            failed_cases=failed_cases[: self._p.max_failed_cases],
+            mismatch_summary=mismatch_summary,
+            first_divergence=exec_res.get("first_divergence"),
+            artifacts={
                 "simv": prep_res.get("simv_path"),
                 "compile_log": prep_res.get("compile_log"),
                 "run_log": prep_res.get("run_log"),
@@ -203,9 +339,13 @@ class VerificationAgentNode(Node):
                 "run_out_full": prep_res.get("run_out_full"),
                 "compile_error_log": prep_res.get("compile_error_log"),
                 "mismatch_case_log": prep_res.get("mismatch_case_log"),
+                "vcd": (exec_res.get("first_divergence") or {}).get("vcd"),
+                **({"seed_logs": exec_res["seed_logs"]} if exec_res.get("seed_logs") else {}),
             },
-            "raw_log_tail": (run_out.splitlines()[-self._p.raw_tail_lines :] if run_out else compile_out.splitlines()[-self._p.raw_tail_lines :]),
-        }
+            raw_log_tail=LogTail(
+                (run_out or compile_out).splitlines()[-self._p.raw_tail_lines :], store=spill_store(shared)
+            ),
+        )
 
         shared["verify_feedback"] = feedback
 
@@ -214,7 +354,8 @@ class VerificationAgentNode(Node):
         attempts = int(flow_status.get("verify_attempts", 0))
         if passed:
             attempts = 0
-        else:
+        elif llm_round(flow_status) > 0:
+            # A cached warm-start design that no longer passes does not use up an attempt.
             attempts += 1
 
         route = "verify_ok" if passed else "verify_fail"
@@ -227,14 +368,39 @@ class VerificationAgentNode(Node):
             reason = "verify_fail"
 
         round_cnt = int(flow_status.get("round", 0))
-        if self._p.max_rounds and round_cnt > self._p.max_rounds:
+        if self._p.max_rounds and llm_round(flow_status) > self._p.max_rounds:
             route = "abort"
             reason = "max_rounds_reached"
 
+        mismatches: Optional[int] = None
+        if compile_passed:
+            mismatches = exec_res["mismatches"] if "mismatches" in exec_res else self._extract_mismatch_count(run_out)
+            if mismatches is None:
+                mismatches = len(failed_cases) if (failed_cases or passed) else 1
+        record_round(
+            flow_status,
+            round_cnt,
+            compile_errors=0 if compile_passed else max(1, len(compile_errors)),
+            mismatches=mismatches,
+        )
+        stalled = stalled_rounds(flow_status["progress"])
+        if route == "verify_fail" and self._p.stall_rounds and stalled >= self._p.stall_rounds:
+            route = "abort"
+            reason = "no_progress"
+
         flow_status["verify_attempts"] = attempts
         flow_status["last_reason"] = reason
         flow_status["last_stage"] = "verify"
 
+        if prep_res.get("scratch"):
+            # The flow may still end after a later review round; persist_scratch() moves these out.
+            flow_status["verify_scratch"] = {
+                "dir": str(Path(prep_res["simv_path"]).parent),
+                "out_dir": prep_res["out_dir"],
+                "files": {k: prep_res[k] for k in ("simv_path", "compile_log", "run_log", "vcd_path")},
+                "seed_logs": dict(exec_res.get("seed_logs") or {}),
+            }
+
         shared["verify_status"] = {
             "stage": "verify",
             "route": route,
@@ -243,8 +409,11 @@ class VerificationAgentNode(Node):
             "compile_error_count": len(feedback.get("compile_errors", [])),
             "failed_case_count": len(feedback.get("failed_cases", [])),
             "attempts": attempts,
+            "stalled_rounds": stalled,
             "reason": reason,
         }
+        if exec_res.get("seeds"):
+            shared["verify_status"]["seeds"] = exec_res["seeds"]
 
         # Concise print
         spec = (shared.get("spec") or "").strip().replace("\n", " ")
@@ -273,10 +442,14 @@ class VerificationAgentNode(Node):
                             "compile_passed": compile_passed,
                             "compile_errors": feedback.get("compile_errors", []),
                             "failed_cases": feedback.get("failed_cases", []),
+                            "mismatch_summary": mismatch_summary,
+                            "first_divergence": feedback.get("first_divergence"),
+                            "seeds": exec_res.get("seeds"),
                             "artifacts": feedback.get("artifacts"),
                         },
                         ensure_ascii=False,
                         indent=2,
+                        default=jsonable,
                     )
                 )
                 f.write("\n")
@@ -311,6 +484,203 @@ class VerificationAgentNode(Node):
 
         return route
 
+    # ------------------------- Seeds -------------------------
+
+    def _run_seeds(self, prep_res: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run simv once per seed, in up to seed_jobs vvp processes at a time, and merge them.
+
+        The merged run log has one status line per seed followed by the output of
+        every failing seed (or of the first passing one); failed cases are tagged
+        with their seed and the mismatch count is summed over the failing seeds.
+        Seeds killed or skipped by stop_on_first_fail count as neither.
+        """
+        seeds = list(dict.fromkeys(self._p.sim_seeds))
+        jobs = max(1, min(len(seeds), self._p.seed_jobs or (os.cpu_count() or 1)))
+        log_dir = Path(prep_res["run_log"]).parent
+        stop = threading.Event()
+        lock = threading.Lock()
+        running: Dict[int, subprocess.Popen] = {}
+        killed: set = set()
+        fail_order: List[int] = []
+
+        def _one(seed: int) -> Dict[str, Any]:
+            res: Dict[str, Any] = {"seed": seed, "status": "skipped", "rc": None, "out": "", "failed_cases": []}
+            with lock:
+                if stop.is_set():
+                    return res
+                proc = subprocess.Popen(
+                    [self._p.vvp_bin, prep_res["simv_path"], self._p.seed_plusarg.format(seed=seed)],
+                    cwd=prep_res["workdir"],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    # Own process group, so a wrapper script's children are killed with it.
+                    start_new_session=True,
+                )
+                running[seed] = proc
+            out, _ = proc.communicate()
+            with lock:
+                running.pop(seed, None)
+                if seed in killed:
+                    res.update(status="stopped", rc=proc.returncode)
+                    return res
+            failed = self._parse_failed_cases(out)
+            res.update(rc=proc.returncode, out=out, failed_cases=failed)
+            res["status"] = "fail" if proc.returncode != 0 or failed else "pass"
+            (log_dir / f"sim_run_seed{seed}.log").write_text(out, encoding="utf-8", errors="ignore")
+            if res["status"] == "fail":
+                with lock:
+                    fail_order.append(seed)
+                    if self._p.stop_on_first_fail and not stop.is_set():
+                        stop.set()
+                        for other, p in running.items():
+                            killed.add(other)
+                            self._kill_group(p)
+            return res
+
+        print(f"[verify] running vvp with {len(seeds)} seed(s), {jobs} at a time ...")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="seed") as pool:
+            runs = list(pool.map(_one, seeds))
+        wall_s = time.perf_counter() - started
+
+        failing = [r for r in runs if r["status"] == "fail"]
+        shown = failing or [r for r in runs if r["status"] == "pass"][:1]
+        lines = [f"# seed {r['seed']}: {r['status']}" + (f" rc={r['rc']}" if r["rc"] is not None else "") for r in runs]
+        for r in shown:
+            lines.append(f"# ---- seed {r['seed']} ----")
+            lines.extend(r["out"].splitlines())
+
+        failed_cases: List[Dict[str, Any]] = []
+        mismatches = 0
+        for r in failing:
+            for c in r["failed_cases"]:
+                failed_cases.append(
+                    {**c, "case": f"seed{r['seed']}/{c.get('case') or 'fail'}", "raw": f"[seed {r['seed']}] {c.get('raw') or ''}"}
+                )
+            mismatches += self._extract_mismatch_count(r["out"]) or len(r["failed_cases"]) or 1
+
+        by_status = {st: [r["seed"] for r in runs if r["status"] == st] for st in ("pass", "fail", "stopped", "skipped")}
+        summary = {
+            "seeds": seeds,
+            "jobs": jobs,
+            "passed": len(by_status["pass"]),
+            "failed": by_status["fail"],
+            "stopped": by_status["stopped"],
+            "skipped": by_status["skipped"],
+            "wall_s": round(wall_s, 3),
+        }
+        print(
+            f"[verify] seeds done passed={summary['passed']}/{len(seeds)} failed={by_status['fail']} "
+            f"stopped={len(by_status['stopped'])} skipped={len(by_status['skipped'])} wall={wall_s:.2f}s"
+        )
+        return {
+            "run_rc": next((r["rc"] for r in failing if r["rc"]), 0),
+            "run_out": "\n".join(lines) + "\n",
+            "failed_cases": failed_cases,
+            "mismatches": mismatches,
+            "failing_seed": fail_order[0] if fail_order else None,
+            "seed_logs": {str(r["seed"]): str(log_dir / f"sim_run_seed{r['seed']}.log") for r in runs if r["status"] in ("pass", "fail")},
+            "seeds": summary,
+        }
+
+    @staticmethod
+    def _kill_group(proc: subprocess.Popen) -> None:
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(proc.pid, signal.SIGKILL)
+            else:
+                proc.kill()
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    # ------------------------- Artifacts -------------------------
+
+    def _scratch_dir(self, out_dir: Path) -> Optional[Path]:
+        """Per-project scratch dir under scratch_dir (reused every round), or None."""
+        if not self._p.scratch_dir:
+            return None
+        tag = hashlib.sha1(str(out_dir).encode("utf-8")).hexdigest()[:12]
+        d = Path(self._p.scratch_dir).expanduser() / tag
+        try:
+            d.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            print(f"[verify] scratch dir unavailable ({e}); using {out_dir}")
+            return None
+        return d
+
+    def _write_log(self, prep_res: Dict[str, Any], key: str, full_key: str, text: str) -> None:
+        Path(prep_res[key]).write_text(text, encoding="utf-8", errors="ignore")
+        if prep_res[full_key] != prep_res[key]:
+            Path(prep_res[full_key]).write_text(text, encoding="utf-8", errors="ignore")
+
+    # ------------------------- Waveforms -------------------------
+
+    def _find_divergence(
+        self, prep_res: Dict[str, Any], run_out: str, since: float, *, plusargs: Tuple[str, ...] = ()
+    ) -> Dict[str, Any]:
+        res: Dict[str, Any] = {"found": False, "reason": "no VCD"}
+        tb_vcd = self._tb_vcd(prep_res, run_out, since)
+        if tb_vcd is not None:
+            res = first_divergence(tb_vcd, tb_top=self._p.tb_top, window=self._p.vcd_trace_window)
+            if res.get("found") or res.get("pairs"):
+                return res
+        vcd = self._rerun_with_vcd(prep_res, plusargs=plusargs)
+        if vcd is None:
+            return {"found": False, "reason": "VCD re-run failed"}
+        return first_divergence(vcd, tb_top=self._p.tb_top, window=self._p.vcd_trace_window)
+
+    def _tb_vcd(self, prep_res: Dict[str, Any], run_out: str, since: float) -> Optional[Path]:
+        """The VCD the testbench dumped itself during this run, if any."""
+        m = re.search(r"VCD info: dumpfile (\S+) opened", run_out)
+        if not m:
+            return None
+        p = Path(m.group(1))
+        if not p.is_absolute():
+            p = Path(prep_res["workdir"]) / p
+        try:
+            return p if p.stat().st_mtime >= since - 1 else None
+        except OSError:
+            return None
+
+    def _rerun_with_vcd(self, prep_res: Dict[str, Any], *, plusargs: Tuple[str, ...] = ()) -> Optional[str]:
+        """Recompile with an extra root module that dumps the TB scope, and run it once."""
+        print("[verify] re-running failing simulation with VCD dump ...")
+        vcd = Path(prep_res["vcd_path"])
+        vcd.unlink(missing_ok=True)
+        dump_v = vcd.with_name("vcd_dump.v")
+        dump_v.write_text(
+            "module __eda_vcd_dump;\n"
+            "  initial begin\n"
+            f'    $dumpfile("{vcd.as_posix()}");\n'
+            f"    $dumpvars({self._p.vcd_depth}, {self._p.tb_top});\n"
+            "  end\n"
+            "endmodule\n",
+            encoding="utf-8",
+        )
+        simv = str(Path(prep_res["simv_path"]).with_name(f"{self._p.sim_exe}_vcd"))
+        compile_cmd = [
+            self._p.iverilog_bin,
+            "-o",
+            simv,
+            "-s",
+            self._p.tb_top,
+            "-s",
+            "__eda_vcd_dump",
+            "-f",
+            prep_res["rtl_flist_abs"],
+            "-f",
+            prep_res["tb_flist_abs"],
+            str(dump_v),
+            *self._p.compile_extra_args,
+        ]
+        _out, rc = self._run_cmd(compile_cmd, cwd=prep_res["workdir"])
+        if rc != 0:
+            return None
+        self._run_cmd([self._p.vvp_bin, simv, *plusargs], cwd=prep_res["workdir"])
+        return str(vcd) if vcd.exists() else None
+
     # ------------------------- Parsing -------------------------
 
     def _parse_compile_errors(self, compile_out: str) -> List[Dict[str, Any]]:
@@ -392,7 +762,7 @@ class VerificationAgentNode(Node):
             )
 
             # Also capture individual sample mismatches if present.
-            sample_pat = re.compile(r"Sample\\s+(?P<idx>\\d+)\\s+mismatch\\s*:\\s*(?P<msg>.*)$", re.IGNORECASE)
+            sample_pat = re.compile(r"Sample\s+(?P<idx>\d+)\s+mismatch\s*:\s*(?P<msg>.*)$", re.IGNORECASE)
             for line in run_out.splitlines():
                 m = sample_pat.search(line)
                 if not m:
@@ -33,6 +33,11 @@ def main() -> None:
         default=0.2,
         help="Sampling temperature for the LLM.",
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile prep/exec/post (cProfile + tracemalloc) into <project-root>/build/profile.",
+    )
     args = parser.parse_args()
 
     project_root = args.project_root.resolve()
@@ -47,6 +52,12 @@ def main() -> None:
 
     llm_client = IFlowClient()  # Requires IFLOW_API_KEY in the environment.
     node = CodeAgentNode(llm_client=llm_client, params=params)
+    profiler = None
+    if args.profile:
+        from utils.profiling import NodeProfiler
+
+        profiler = NodeProfiler(project_root / "build" / "profile")
+        profiler.attach_node(node, case="step1")
 
     spec = """
     I would like you to implement a module named TopModule with the following
@@ -62,6 +73,8 @@ The module should always outputs a LOW.
     prep_res = node.prep(shared)
     exec_res = node.exec(prep_res)
     route = node.post(shared, prep_res, exec_res)
+    if profiler is not None:
+        profiler.report()
 
     print(f"[route] {route}")
     print(f"[notes] {shared.get('code_agent_notes', '')}")
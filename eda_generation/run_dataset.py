@@ -1,12 +1,43 @@
 ﻿from __future__ import annotations
 
 import argparse
+import json
+import os
 import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Tuple
+from queue import SimpleQueue
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from pocketflow import Flow
 
 from flow import build_flow, FlowParams
+from nodes.verification_agent import parse_seeds, persist_scratch
+from utils.clients.hedging import HedgePolicy
 from utils.clients.iflow_client import IFlowClient
+from utils.candidates import CandidateStore, best_candidate, scored_candidates
+from utils.feedback import blob_text
+from utils.model_cascade import format_model_report, merge_model_stats, model_stats, parse_ladder, solved_by
+from utils.case_scheduler import (
+    append_history,
+    estimate_cases,
+    load_history,
+    order_longest_first,
+    predict_makespan,
+)
+from utils.staged_executor import PoolSizes, StagedExecutor
+
+# Only needed for some roles/options; imported where used to keep worker startup short
+# (see bench/import_time.py).
+if TYPE_CHECKING:
+    from utils.dataset_manifest import DatasetManifest
+    from utils.profiling import NodeProfiler
+    from utils.retention import RetentionPolicy
+    from utils.solved_cache import SolvedCache
+    from utils.sweep_metrics import SweepMetrics
+    from utils.work_queue import WorkQueue
 
 
 def _find_first(base_dir: Path, patterns: List[str]) -> Optional[Path]:
@@ -17,7 +48,11 @@ def _find_first(base_dir: Path, patterns: List[str]) -> Optional[Path]:
     return None
 
 
-def _resolve_case_files(dataset_root: Path, case: str) -> Tuple[Path, Path, Path]:
+def _resolve_case_files(
+    dataset_root: Path, case: str, manifest: Optional[DatasetManifest] = None
+) -> Tuple[Path, Path, Path]:
+    if manifest is not None:
+        return manifest.resolve(case)
     prompt = _find_first(dataset_root, [f"{case}_prompt", f"{case}_prompt.txt"])
     ref = _find_first(dataset_root, [f"{case}_ref.sv", f"{case}_ref.v", f"{case}_ref"])
     tb = _find_first(dataset_root, [f"{case}_test.sv", f"{case}_test.v", f"{case}_test"])
@@ -47,8 +82,26 @@ def run_case(
     project_root: Path,
     results_root: Path,
     tb_top: str,
-) -> None:
-    prompt_path, ref_src, tb_src = _resolve_case_files(dataset_root, case)
+    llm_client: Optional[Any] = None,
+    flow_overrides: Optional[Dict[str, Any]] = None,
+    flow_hook: Optional[Callable[[Flow], None]] = None,
+    solved_cache: Optional[SolvedCache] = None,
+    similar_threshold: float = 0.5,
+    manifest: Optional[DatasetManifest] = None,
+) -> Dict[str, Any]:
+    """
+    Run one dataset case through the flow and copy the results out.
+
+    `flow_overrides` are extra FlowParams fields (e.g. docker_bin for a stand-in
+    SpyGlass), `flow_hook` is called with the built flow before it runs.
+    With `solved_cache`, a design that passed this spec/RefModule/testbench
+    before is re-checked first instead of generated, a similar solved spec's
+    design is given to CodeAgent as context otherwise, and passing designs are
+    stored. With `manifest`, case files come from the dataset manifest and its
+    content hashes are recorded (and key the solved cache). Returns the final
+    shared dict.
+    """
+    prompt_path, ref_src, tb_src = _resolve_case_files(dataset_root, case, manifest)
 
     spec = prompt_path.read_text(encoding="utf-8")
 
@@ -73,33 +126,83 @@ def run_case(
     _write_flist(rtl_verify, [dut_path.name, ref_path.name])
     _write_flist(tb_f, [tb_path.name])
 
+    flow_kwargs: Dict[str, Any] = {
+        "project_root": str(project_root),
+        "rtl_flist": str(rtl_review.name),
+        "review_rtl_flist": str(rtl_review.name),
+        "verify_rtl_flist": str(rtl_verify.name),
+        "tb_flist": str(tb_f.name),
+        "tb_top": tb_top,
+        "top_rtl": "TopModule",
+        "max_rounds": 3,
+    }
+    flow_kwargs.update(flow_overrides or {})
+
     flow = build_flow(
-        llm_client=IFlowClient(),
-        params=FlowParams(
-            project_root=str(project_root),
-            rtl_flist=str(rtl_review.name),
-            review_rtl_flist=str(rtl_review.name),
-            verify_rtl_flist=str(rtl_verify.name),
-            tb_flist=str(tb_f.name),
-            tb_top=tb_top,
-            top_rtl="TopModule",
-            max_rounds=3,
-        ),
+        llm_client=llm_client or IFlowClient(),
+        params=FlowParams(**flow_kwargs),
     )
+    if flow_hook is not None:
+        flow_hook(flow)
 
-    shared = {
+    shared: Dict[str, Any] = {
+        "case": case,
         "spec": spec,
         "project_root": str(project_root),
     }
-    flow.run(shared)
+    hashes = manifest.hashes(case) if manifest is not None else {}
+    if hashes:
+        shared["dataset_hashes"] = hashes
+    cache_key: Optional[str] = None
+    if solved_cache is not None:
+        if hashes:
+            cache_key = solved_cache.key_from_sha256(spec, hashes["ref"], hashes["test"])
+        else:
+            cache_key = solved_cache.key(spec, ref_path.read_bytes(), tb_path.read_bytes())
+        hit = solved_cache.get(cache_key)
+        if hit is not None:
+            shared["warm_start"] = hit
+            shared["solved_cache"] = {"status": "hit", "case": hit["case"]}
+        else:
+            similar = solved_cache.similar(spec, threshold=similar_threshold, exclude_key=cache_key)
+            if similar is not None:
+                shared["similar_design"] = similar
+                shared["solved_cache"] = {"status": "similar", "case": similar["case"], "similarity": similar["similarity"]}
+            else:
+                shared["solved_cache"] = {"status": "miss"}
+        print(f"[cache] {case}: {shared['solved_cache']}")
+    try:
+        flow.run(shared)
+    finally:
+        persist_scratch(shared)
 
-    # Save generated DUT (last attempt) to results_root
-    if dut_path.exists():
-        out_path = results_root / f"{case}{dut_path.suffix}"
+    # Save the best-scoring candidate (falls back to the last attempt) to results_root
+    fs = shared.get("flow_status") or {}
+    out_path = results_root / f"{case}{dut_path.suffix}"
+    best = best_candidate(fs)
+    best_blob = (best or {}).get("files", {}).get(dut_path.name)
+    if best_blob and fs.get("candidate_store"):
+        shutil.copyfile(CandidateStore(fs["candidate_store"]).path(best_blob), out_path)
+        if best["round"] != fs.get("round"):
+            print(f"[run] {case}: exporting round {best['round']} (best score), not the last round {fs.get('round')}")
+    elif dut_path.exists():
         shutil.copyfile(dut_path, out_path)
 
+    if cache_key is not None and (shared.get("verify_feedback") or {}).get("passed") and out_path.exists():
+        try:
+            solved_cache.put(cache_key, spec=spec, design=out_path.read_text(encoding="utf-8"), case=case)
+        except Exception as e:
+            print(f"[cache] could not store {case}: {e}")
+
+    candidates = scored_candidates(fs)
+    if candidates:
+        (results_root / f"{case}.candidates.json").write_text(
+            json.dumps({"best_round": best["round"] if best else None, "candidates": candidates}, indent=2),
+            encoding="utf-8",
+        )
+
     # Optional: also keep raw LLM output/notes per case for debugging
-    raw = shared.get("code_agent_output_raw", "")
+    raw = blob_text(shared.get("code_agent_output_raw"))
     if raw:
         (results_root / f"{case}.raw.json").write_text(raw, encoding="utf-8")
 
@@ -107,6 +210,236 @@ def run_case(
     if notes:
         (results_root / f"{case}.notes.txt").write_text(notes, encoding="utf-8")
 
+    return shared
+
+
+def case_summary(case: str, shared: Dict[str, Any], wall_s: float, error: Optional[str] = None) -> Dict[str, Any]:
+    """Small JSON-able record of one case run (used by the work queue and reports)."""
+    fs = shared.get("flow_status") or {}
+    return {
+        "case": case,
+        "passed": bool((shared.get("verify_feedback") or {}).get("passed")),
+        "rounds": fs.get("round"),
+        "reason": fs.get("last_reason"),
+        "best_round": (best_candidate(fs) or {}).get("round"),
+        "solved_cache": (shared.get("solved_cache") or {}).get("status"),
+        "inputs": shared.get("dataset_hashes"),
+        "solved_by": solved_by(fs),
+        "llm_models": model_stats(fs),
+        "wall_s": round(wall_s, 3),
+        "error": error,
+    }
+
+
+def _run_and_summarize(
+    case: str,
+    *,
+    history_path: Optional[Path] = None,
+    metrics: Optional[SweepMetrics] = None,
+    profiler: Optional[NodeProfiler] = None,
+    retention: Optional[RetentionPolicy] = None,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    if metrics is not None:
+        metrics.case_started(case)
+        kwargs["flow_hook"] = metrics.hook(case, then=kwargs.get("flow_hook"))
+    if profiler is not None:
+        # Innermost, so pool waits (--pipeline) are not part of the profiled phases.
+        kwargs["flow_hook"] = profiler.hook(case, then=kwargs.get("flow_hook"))
+    t0 = time.monotonic()
+    try:
+        shared = run_case(case=case, **kwargs)
+        summary = case_summary(case, shared, time.monotonic() - t0)
+    except Exception as e:
+        print(f"[error] case={case}: {e}")
+        summary = case_summary(case, {}, time.monotonic() - t0, error=f"{type(e).__name__}: {e}")
+    if retention is not None and retention.enabled:
+        summary["artifacts"] = _retain(retention, case, summary, kwargs["project_root"], kwargs["results_root"])
+    if history_path is not None:
+        try:
+            append_history(history_path, {**summary, "finished_at": time.time()})
+        except Exception:
+            pass
+    if metrics is not None:
+        metrics.case_finished(summary)
+    if profiler is not None:
+        try:
+            profiler.finish_case(case)
+        except OSError as e:
+            print(f"[profile] could not write profile for {case}: {e}")
+    return summary
+
+
+def _retain(
+    retention: RetentionPolicy, case: str, summary: Dict[str, Any], project_root: Path, results_root: Path
+) -> Optional[str]:
+    from utils.retention import apply_retention
+
+    try:
+        stats = apply_retention(
+            retention, case=case, passed=bool(summary["passed"]), project_root=project_root, results_root=results_root
+        )
+    except OSError as e:
+        print(f"[retention] {case}: {e}")
+        return None
+    kept = f"archived {stats['archived_bytes'] // 1024}KiB to {stats['archived']}" if stats.get("archived") else "dropped"
+    print(
+        f"[retention] {case}: build {stats['build_bytes'] // 1024}KiB {kept}"
+        f" (spyglass dirs pruned={stats['spyglass_pruned']}, old archives pruned={stats.get('archives_pruned', 0)})"
+    )
+    return stats.get("archived")
+
+
+def _case_size(dataset_root: Path, case: str, manifest: Optional[DatasetManifest] = None) -> int:
+    if manifest is not None:
+        return manifest.size(case)
+    prompt, _ref, tb = _resolve_case_files(dataset_root, case)
+    return prompt.stat().st_size + tb.stat().st_size
+
+
+def schedule_cases(
+    cases: List[str],
+    *,
+    dataset_root: Path,
+    history_path: Path,
+    workers: int,
+    policy: str,
+    manifest: Optional[DatasetManifest] = None,
+) -> Tuple[List[str], float]:
+    """Order cases per policy ("lpt" or "file"); returns (ordered cases, predicted makespan seconds)."""
+    estimates = estimate_cases(cases, load_history(history_path), lambda c: _case_size(dataset_root, c, manifest))
+    if policy == "lpt":
+        estimates = order_longest_first(estimates)
+    predicted = predict_makespan(estimates, workers)
+    known = sum(1 for e in estimates if e.source == "history")
+    print(
+        f"[schedule] policy={policy} cases={len(estimates)} with_history={known} "
+        f"workers={workers} predicted_makespan={predicted:.1f}s"
+    )
+    return [e.case for e in estimates], predicted
+
+
+def _run_coordinator(
+    queue: WorkQueue,
+    cases: List[str],
+    *,
+    reset: bool,
+    poll_s: float,
+    predicted_s: Optional[float] = None,
+    ladder: Tuple[str, ...] = (),
+) -> None:
+    t0 = time.monotonic()
+    # Cases are claimed in publish order, so publishing longest-first gives LPT list scheduling.
+    added = queue.publish(cases, reset=reset)
+    print(f"[queue] published {added} new case(s) to {queue.path} ({len(cases)} in problems.txt)")
+    last = None
+    while not queue.finished():
+        # Workers fail these in claim(); if none is left to claim, the coordinator has to.
+        expired = queue.expire_leases()
+        if expired:
+            print(f"[queue] {expired} case(s) failed after their lease expired {queue.max_attempts} time(s)")
+        counts = queue.counts()
+        if counts != last:
+            print(f"[queue] {counts}")
+            last = counts
+        time.sleep(poll_s)
+
+    results = [r for r in queue.results() if r["state"] in ("done", "failed")]
+    passed = sum(1 for r in results if (r.get("result") or {}).get("passed"))
+    print(f"[queue] sweep finished: {queue.counts()} passed={passed}/{len(results)}")
+    _report_models([r.get("result") or {} for r in results], ladder)
+    _report_makespan(predicted_s, time.monotonic() - t0)
+
+
+def _report_models(summaries: List[Dict[str, Any]], ladder: Tuple[str, ...] = ()) -> None:
+    total = merge_model_stats(summaries)
+    if not total:
+        return
+    for line in format_model_report(total, ladder):
+        print(f"[models] {line}")
+
+
+def _report_llm(llm_client: IFlowClient) -> None:
+    hedge = llm_client.hedge_stats()
+    if hedge is not None:
+        print(
+            f"[llm] hedging p{hedge['percentile'] * 100:g}: calls={hedge['calls']} hedged={hedge['hedged']} "
+            f"hedge_won={hedge['hedge_won']} cancelled={hedge['cancelled']} abandoned_done={hedge['abandoned_done']} "
+            f"wasted_tokens={hedge['wasted_tokens']} delay_s={hedge['current_delay_s']}"
+        )
+    stats = llm_client.endpoint_stats()
+    if len(stats) < 2:
+        return
+    for st in stats:
+        print(
+            f"[llm] endpoint {st['endpoint']} calls={st['calls']} errors={st['errors']} failovers={st['failovers']} "
+            f"latency_s={st['latency_s']} error_rate={st['error_rate']}{' DOWN' if st['down'] else ''}"
+        )
+
+
+def _report_makespan(predicted_s: Optional[float], actual_s: float) -> None:
+    if predicted_s is None:
+        print(f"[schedule] actual_makespan={actual_s:.1f}s")
+        return
+    err = (actual_s - predicted_s) / predicted_s * 100 if predicted_s > 0 else 0.0
+    print(f"[schedule] predicted_makespan={predicted_s:.1f}s actual_makespan={actual_s:.1f}s ({err:+.0f}%)")
+
+
+def _run_worker(
+    queue: WorkQueue,
+    *,
+    worker_id: str,
+    lease_s: float,
+    poll_s: float,
+    **case_kwargs: Any,
+) -> None:
+    done = 0
+    waiting_for_publish = False
+    while True:
+        job = queue.claim(worker_id, lease_s=lease_s)
+        if job is None:
+            if queue.finished():
+                break
+            if not waiting_for_publish and not queue.published():
+                print(f"[queue] worker {worker_id} waiting for the coordinator to publish cases to {queue.path}")
+                waiting_for_publish = True
+            # Others still hold leases (or nothing is published yet); wait in case one of them expires.
+            time.sleep(poll_s)
+            continue
+
+        print(f"===== [worker {worker_id}] case={job.case} attempt={job.attempts} =====")
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=_renew_lease,
+            args=(queue.path, job.case, worker_id, lease_s, stop),
+            daemon=True,
+        )
+        heartbeat.start()
+        try:
+            summary = _run_and_summarize(job.case, **case_kwargs)
+        finally:
+            stop.set()
+            heartbeat.join()
+
+        if not queue.complete(job.case, worker_id, ok=summary["error"] is None, result=summary):
+            print(f"[queue] lease on {job.case} was lost; result discarded")
+        done += 1
+    print(f"[queue] worker {worker_id} exiting after {done} case(s)")
+
+
+def _renew_lease(queue_path: Path, case: str, worker_id: str, lease_s: float, stop: threading.Event) -> None:
+    from utils.work_queue import WorkQueue
+
+    # sqlite3 connections are per-thread, so the heartbeat opens its own.
+    q = WorkQueue(queue_path)
+    try:
+        while not stop.wait(lease_s / 3):
+            if not q.renew(case, worker_id, lease_s=lease_s):
+                print(f"[queue] could not renew lease on {case}")
+                return
+    finally:
+        q.close()
+
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Run dataset cases through the RTL generation/review/verify flow.")
@@ -115,30 +448,303 @@ def main() -> None:
     parser.add_argument("--project-root", default="/home/eda/project/exp", help="Working project root (will be overwritten per case).")
     parser.add_argument("--results-root", default="/home/eda/project/exp/gen_result", help="Directory to store generated DUT per case.")
     parser.add_argument("--tb-top", default="tb", help="Testbench top module name for iverilog.")
+    parser.add_argument("--llm-mode", choices=["live", "record", "replay"], default=None, help="LLM transcript mode: record every request/response per case and round, or replay them without network (default: IFLOW_TRANSCRIPT_MODE or live).")
+    parser.add_argument("--llm-transcripts", default=None, help="Transcript directory for --llm-mode record/replay (default: IFLOW_TRANSCRIPT_DIR).")
+    parser.add_argument("--role", choices=["local", "coordinator", "worker"], default="local", help="local: run all cases here; coordinator: publish cases to --queue and wait; worker: pull cases from --queue.")
+    parser.add_argument("--queue", default=None, help="Shared SQLite work queue file (default: <results-root>/sweep_queue.sqlite).")
+    parser.add_argument("--reset-queue", action="store_true", help="Coordinator: drop existing queue entries before publishing.")
+    parser.add_argument("--lease-seconds", type=float, default=1800.0, help="Worker lease per case; expired leases are picked up by other workers.")
+    parser.add_argument("--poll-seconds", type=float, default=10.0, help="Queue polling interval.")
+    parser.add_argument("--worker-id", default=None, help="Worker name (default: <hostname>-<pid>).")
+    parser.add_argument("--schedule", choices=["lpt", "file"], default="lpt", help="Case order: lpt = longest expected first from sweep history (size heuristic for unseen cases); file = problems.txt order.")
+    parser.add_argument("--history", default=None, help="Sweep history JSONL used for scheduling and appended per case (default: <results-root>/sweep_history.jsonl).")
+    parser.add_argument("--jobs", type=int, default=1, help="Local role: number of cases run in parallel (each in <project-root>/job_<i>).")
+    parser.add_argument("--expected-workers", type=int, default=1, help="Coordinator: number of workers assumed for the predicted makespan.")
+    parser.add_argument("--pipeline", action="store_true", help="Local role: keep many cases in flight and gate code/review/verify exec on separate LLM/lint/sim pools.")
+    parser.add_argument("--llm-slots", type=int, default=8, help="--pipeline: concurrent LLM calls.")
+    parser.add_argument("--lint-slots", type=int, default=1, help="--pipeline: concurrent SpyGlass runs (license count).")
+    parser.add_argument("--sim-slots", type=int, default=0, help="--pipeline: concurrent iverilog/vvp runs (default: CPU count).")
+    parser.add_argument("--spyglass-licenses", type=int, default=0, help="Limit concurrent SpyGlass runs across all processes on this host to this many license slots (0 = no limit).")
+    parser.add_argument("--scratch-dir", default=None, help="Put per-round simulation artifacts on this RAM-backed dir (e.g. /dev/shm/eda_verify); only the final round is kept under build/verify.")
+    parser.add_argument("--vcd-on-fail", action="store_true", help="On a failing simulation, report the first DUT/RefModule divergence from a VCD in the verify feedback.")
+    parser.add_argument("--sim-seeds", default="", help="Run each simulation once per seed, in parallel (vvp simv +seed=N; the testbench reads it with $value$plusargs), e.g. 1-8 or 1,7,42; failures of all seeds are merged.")
+    parser.add_argument("--seed-jobs", type=int, default=0, help="--sim-seeds: seeds simulated at the same time (0 = one per seed, capped at the CPU count).")
+    parser.add_argument("--stop-on-first-fail", action="store_true", help="--sim-seeds: kill the remaining seeds as soon as one seed fails.")
+    parser.add_argument("--parallel-checks", action="store_true", help="Run SpyGlass review and iverilog verify concurrently on each candidate and merge their routes (lint errors take priority).")
+    parser.add_argument("--events-jsonl", default=None, help="Append structured sweep events (case/stage begin/end, routes, tokens) to this JSONL file.")
+    parser.add_argument("--metrics-textfile", default=None, help="Periodically rewrite sweep metrics in OpenMetrics text format to this file (e.g. for node_exporter's textfile collector).")
+    parser.add_argument("--metrics-interval", type=float, default=15.0, help="Seconds between --metrics-textfile rewrites.")
+    parser.add_argument("--profile", action="store_true", help="Profile every node phase (cProfile + tracemalloc); writes per-case/per-stage .prof files and a merged top-N report.")
+    parser.add_argument("--profile-dir", default=None, help="--profile output directory (default: <results-root>/profile).")
+    parser.add_argument("--profile-top", type=int, default=30, help="--profile: functions listed per section of the merged report.")
+    parser.add_argument("--llm-endpoints", default="", help="Comma-separated OpenAI-compatible endpoints, url[|key][|weight], balanced by latency/error rate with failover (default: env IFLOW_ENDPOINTS, else IFLOW_BASE_URL).")
+    parser.add_argument("--llm-hedge-percentile", type=float, default=0.0, help="Send a duplicate LLM request when one is slower than this latency percentile of recent calls, e.g. 0.95 (0 = off; env IFLOW_HEDGE_PERCENTILE).")
+    parser.add_argument("--llm-models", default="", help="Comma-separated model ladder, fastest first: round 1 uses the first, failed rounds escalate (default: the client's default model).")
+    parser.add_argument("--escalate-after", type=int, default=1, help="--llm-models: failed rounds on one model before moving to the next.")
+    parser.add_argument("--solved-cache", default=None, help="SQLite file of previously passing designs: re-check a cached design before generating, and give CodeAgent the design of a similar solved spec.")
+    parser.add_argument("--similar-threshold", type=float, default=0.5, help="--solved-cache: minimum estimated spec similarity (MinHash Jaccard) for the reference design.")
+    parser.add_argument("--manifest", default=None, help="Dataset manifest file (case files, sizes, sha256, RefModule ports), rebuilt when the dataset dir or problems.txt changes (default: <problems>.manifest.json next to problems.txt).")
+    parser.add_argument("--no-manifest", action="store_true", help="Probe case files per case instead of using the dataset manifest.")
+    parser.add_argument("--retention", choices=["off", "failed", "all", "none"], default="off", help="After each case: off = leave the working build/ as is; failed = archive build/ of failed cases (plus --retain-last passing ones) to --artifacts-dir; all = archive every case; none = archive nothing. Except for off, SpyGlass project dirs are pruned and build/ is emptied.")
+    parser.add_argument("--retain-last", type=int, default=0, help="--retention: also keep the artifacts of this many most recent passing cases.")
+    parser.add_argument("--artifacts-dir", default=None, help="--retention archive directory (default: <results-root>/artifacts).")
+    parser.add_argument("--no-compress-artifacts", action="store_true", help="--retention: keep archived logs uncompressed (default: gzip logs/reports).")
+    parser.add_argument("--no-rollback", action="store_true", help="PATCH from the latest attempt even when an earlier round scored better (the best candidate is still exported).")
+    parser.add_argument("--stall-rounds", type=int, default=0, help="Stop a case early after this many rounds without progress in lint errors, compile errors or mismatch count (0 = off).")
+    parser.add_argument("--spyglass-containers", default="", help="Comma-separated SpyGlass container pool; each license slot uses one (default: spyglass-centos7).")
     args = parser.parse_args()
 
     dataset_root = Path(args.dataset_root).expanduser().resolve()
     problems_path = Path(args.problems).expanduser().resolve() if args.problems else dataset_root / "problems.txt"
     project_root = Path(args.project_root).expanduser().resolve()
     results_root = Path(args.results_root).expanduser().resolve()
+    queue_path = Path(args.queue).expanduser().resolve() if args.queue else results_root / "sweep_queue.sqlite"
+    history_path = Path(args.history).expanduser().resolve() if args.history else results_root / "sweep_history.jsonl"
 
-    cases = [line.strip() for line in problems_path.read_text(encoding="utf-8").splitlines() if line.strip()]
-    if not cases:
-        raise SystemExit("No cases found in problems.txt")
+    flow_overrides: Dict[str, Any] = {}
+    containers = tuple(c.strip() for c in args.spyglass_containers.split(",") if c.strip())
+    if containers:
+        flow_overrides["container_name"] = containers[0]
+        flow_overrides["spyglass_containers"] = containers
+    if args.spyglass_licenses > 0:
+        flow_overrides["spyglass_license_slots"] = args.spyglass_licenses
+    if args.scratch_dir:
+        flow_overrides["verify_scratch_dir"] = args.scratch_dir
+    if args.vcd_on_fail:
+        flow_overrides["verify_vcd_on_fail"] = True
+    if args.sim_seeds:
+        try:
+            flow_overrides["verify_seeds"] = parse_seeds(args.sim_seeds)
+        except ValueError as e:
+            raise SystemExit(f"--sim-seeds: {e}")
+        flow_overrides["verify_seed_jobs"] = args.seed_jobs
+        flow_overrides["verify_stop_on_first_fail"] = args.stop_on_first_fail
+    if args.parallel_checks:
+        flow_overrides["parallel_checks"] = True
+    if args.stall_rounds > 0:
+        flow_overrides["stall_rounds"] = args.stall_rounds
+    if args.llm_models:
+        flow_overrides["llm_models"] = parse_ladder(args.llm_models)
+        flow_overrides["llm_escalate_after"] = args.escalate_after
+    if args.no_rollback:
+        flow_overrides["rollback_to_best"] = False
 
-    for idx, case in enumerate(cases, 1):
-        print(f"===== [{idx}/{len(cases)}] case={case} =====")
+    metrics: Optional[SweepMetrics] = None
+    if args.role != "coordinator" and (args.events_jsonl or args.metrics_textfile):
+        from utils.sweep_metrics import SweepMetrics
+        from utils.work_queue import default_worker_id
+
+        metrics = SweepMetrics(
+            events_path=args.events_jsonl,
+            textfile_path=args.metrics_textfile,
+            interval_s=args.metrics_interval,
+            worker=(args.worker_id or default_worker_id()) if args.role == "worker" else None,
+        ).start()
+    profiler: Optional[NodeProfiler] = None
+    if args.profile and args.role != "coordinator":
+        from utils.profiling import NodeProfiler
+
+        profiler = NodeProfiler(
+            Path(args.profile_dir).expanduser().resolve() if args.profile_dir else results_root / "profile",
+            top_n=args.profile_top,
+        )
+    manifest: Optional[DatasetManifest] = None
+    if not args.no_manifest:
+        from utils.dataset_manifest import DatasetManifest
+
+        manifest_file = Path(args.manifest).expanduser().resolve() if args.manifest else None
+        try:
+            manifest = DatasetManifest(dataset_root, problems_path, path=manifest_file).load()
+        except OSError as e:
+            print(f"[manifest] not available ({e}); resolving case files one by one")
+    retention: Optional[RetentionPolicy] = None
+    if args.retention != "off" and args.role != "coordinator":
+        from utils.retention import RetentionPolicy
+
+        retention = RetentionPolicy(
+            mode=args.retention,
+            archive_root=args.artifacts_dir,
+            keep_last=args.retain_last,
+            compress=not args.no_compress_artifacts,
+        )
+    solved_cache: Optional[SolvedCache] = None
+    if args.solved_cache and args.role != "coordinator":
+        from utils.solved_cache import SolvedCache
+
+        solved_cache = SolvedCache(args.solved_cache)
+        print(f"[cache] solved-spec cache {solved_cache.path}: {len(solved_cache)} design(s)")
+    try:
+        _run_role(args, metrics=metrics, profiler=profiler, flow_overrides=flow_overrides,
+                  dataset_root=dataset_root, problems_path=problems_path, project_root=project_root,
+                  results_root=results_root, queue_path=queue_path, history_path=history_path,
+                  solved_cache=solved_cache, manifest=manifest, retention=retention)
+    finally:
+        if manifest is not None:
+            # Picks up files that were edited in place during the sweep.
+            manifest.save()
+        if metrics is not None:
+            metrics.close()
+        if profiler is not None:
+            profiler.report()
+        if solved_cache is not None:
+            solved_cache.close()
+
+
+def _run_role(
+    args: argparse.Namespace,
+    *,
+    metrics: Optional[SweepMetrics],
+    profiler: Optional[NodeProfiler],
+    flow_overrides: Dict[str, Any],
+    dataset_root: Path,
+    problems_path: Path,
+    project_root: Path,
+    results_root: Path,
+    queue_path: Path,
+    history_path: Path,
+    solved_cache: Optional[SolvedCache] = None,
+    manifest: Optional[DatasetManifest] = None,
+    retention: Optional[RetentionPolicy] = None,
+) -> None:
+    if args.role in ("coordinator", "worker"):
+        from utils.work_queue import WorkQueue, default_worker_id
+
+    if args.role == "worker":
+        worker_id = args.worker_id or default_worker_id()
+        queue = WorkQueue(queue_path)
+        llm_client = IFlowClient(
+            transcript_mode=args.llm_mode,
+            transcript_dir=args.llm_transcripts,
+            endpoints=args.llm_endpoints or None,
+            hedge=HedgePolicy(percentile=args.llm_hedge_percentile) if args.llm_hedge_percentile > 0 else None,
+        )
         try:
-            run_case(
-                case=case,
+            _run_worker(
+                queue,
+                worker_id=worker_id,
+                lease_s=args.lease_seconds,
+                poll_s=args.poll_seconds,
                 dataset_root=dataset_root,
-                project_root=project_root,
+                # Several workers may share a host: give each its own working copy.
+                project_root=project_root / f"worker_{worker_id}",
                 results_root=results_root,
                 tb_top=args.tb_top,
+                llm_client=llm_client,
+                history_path=history_path,
+                metrics=metrics,
+                profiler=profiler,
+                flow_overrides=flow_overrides,
+                solved_cache=solved_cache,
+                similar_threshold=args.similar_threshold,
+                manifest=manifest,
+                retention=retention,
             )
-        except Exception as e:
-            print(f"[error] case={case}: {e}")
-            continue
+        finally:
+            queue.close()
+            _report_llm(llm_client)
+        return
+
+    if manifest is not None:
+        cases = list(manifest.cases)
+    else:
+        cases = [line.strip() for line in problems_path.read_text(encoding="utf-8").splitlines() if line.strip()]
+    if not cases:
+        raise SystemExit("No cases found in problems.txt")
+
+    executor: Optional[StagedExecutor] = None
+    if args.role == "local" and args.pipeline:
+        executor = StagedExecutor(
+            PoolSizes(llm=args.llm_slots, lint=args.lint_slots, sim=args.sim_slots or (os.cpu_count() or 4)),
+            max_in_flight=args.jobs if args.jobs > 1 else 0,
+        )
+
+    if args.role == "coordinator":
+        workers = args.expected_workers
+    elif executor is not None:
+        workers = executor.max_in_flight
+    else:
+        workers = max(1, args.jobs)
+    cases, predicted_s = schedule_cases(
+        cases,
+        dataset_root=dataset_root,
+        history_path=history_path,
+        workers=workers,
+        policy=args.schedule,
+        manifest=manifest,
+    )
+
+    if args.role == "coordinator":
+        queue = WorkQueue(queue_path)
+        try:
+            _run_coordinator(
+                queue,
+                cases,
+                reset=args.reset_queue,
+                poll_s=args.poll_seconds,
+                predicted_s=predicted_s,
+                ladder=parse_ladder(args.llm_models),
+            )
+        finally:
+            queue.close()
+        return
+
+    # One client for the whole sweep (shared connection pool and transcript store).
+    llm_client = IFlowClient(
+        transcript_mode=args.llm_mode,
+        transcript_dir=args.llm_transcripts,
+        endpoints=args.llm_endpoints or None,
+        hedge=HedgePolicy(percentile=args.llm_hedge_percentile) if args.llm_hedge_percentile > 0 else None,
+    )
+
+    def _run_one(idx: int, case: str, root: Path) -> Dict[str, Any]:
+        print(f"===== [{idx}/{len(cases)}] case={case} =====")
+        return _run_and_summarize(
+            case,
+            dataset_root=dataset_root,
+            project_root=root,
+            results_root=results_root,
+            tb_top=args.tb_top,
+            llm_client=llm_client,
+            history_path=history_path,
+            metrics=metrics,
+            profiler=profiler,
+            flow_overrides=flow_overrides,
+            flow_hook=executor.attach if executor is not None else None,
+            solved_cache=solved_cache,
+            similar_threshold=args.similar_threshold,
+            manifest=manifest,
+            retention=retention,
+        )
+
+    t0 = time.monotonic()
+    if executor is not None:
+        summaries = executor.run(cases, _run_one, project_root=project_root)
+        _report_models(summaries, parse_ladder(args.llm_models))
+        _report_llm(llm_client)
+        _report_makespan(predicted_s, time.monotonic() - t0)
+        return
+
+    # Each parallel job needs its own working copy; with --jobs 1 keep using project_root itself.
+    roots: SimpleQueue = SimpleQueue()
+    if workers == 1:
+        roots.put(project_root)
+    else:
+        for i in range(workers):
+            roots.put(project_root / f"job_{i}")
+
+    def _job(idx: int, case: str) -> Dict[str, Any]:
+        root = roots.get()
+        try:
+            return _run_one(idx, case, root)
+        finally:
+            roots.put(root)
+
+    # The pool hands out cases in submission order, i.e. longest-expected-first under --schedule lpt.
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        summaries = list(pool.map(_job, range(1, len(cases) + 1), cases))
+    _report_models(summaries, parse_ladder(args.llm_models))
+    _report_llm(llm_client)
+    _report_makespan(predicted_s, time.monotonic() - t0)
 
 
 if __name__ == "__main__":
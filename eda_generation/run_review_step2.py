@@ -41,6 +41,22 @@ def main() -> None:
         default="docker",
         help="Docker executable to invoke.",
     )
+    parser.add_argument(
+        "--license-slots",
+        type=int,
+        default=0,
+        help="Cross-process SpyGlass license slots to lease from (0 = no limit).",
+    )
+    parser.add_argument(
+        "--containers",
+        default="",
+        help="Comma-separated container pool used with --license-slots (default: --container-name).",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile prep/exec/post (cProfile + tracemalloc) into <project-root>/build/profile.",
+    )
     args = parser.parse_args()
 
     project_root = args.project_root.resolve()
@@ -54,9 +70,17 @@ def main() -> None:
         work_subdir=args.work_subdir,
         container_name=args.container_name,
         docker_bin=args.docker_bin,
+        container_names=tuple(c.strip() for c in args.containers.split(",") if c.strip()),
+        license_slots=args.license_slots,
     )
 
     node = ReviewAgentNode(params=params)
+    profiler = None
+    if args.profile:
+        from utils.profiling import NodeProfiler
+
+        profiler = NodeProfiler(project_root / "build" / "profile")
+        profiler.attach_node(node, case="step2")
 
     shared = {
         "rtl_flist": args.rtl_flist,
@@ -66,6 +90,8 @@ def main() -> None:
     prep_res = node.prep(shared)
     exec_res = node.exec(prep_res)
     route = node.post(shared, prep_res, exec_res)
+    if profiler is not None:
+        profiler.report()
 
     fb = shared.get("review_feedback", {})
 
@@ -3,7 +3,7 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
-from nodes.verification_agent import VerificationAgentNode, VerificationAgentParams
+from nodes.verification_agent import VerificationAgentNode, VerificationAgentParams, parse_seeds
 
 
 def main() -> None:
@@ -51,17 +51,53 @@ def main() -> None:
         default="vvp",
         help="vvp executable.",
     )
+    parser.add_argument(
+        "--scratch-dir",
+        default=None,
+        help="RAM-backed scratch dir (e.g. /dev/shm/eda_verify) for simv and logs; final artifacts are copied to build/verify.",
+    )
+    parser.add_argument(
+        "--vcd-on-fail",
+        action="store_true",
+        help="On failure, locate the first DUT/RefModule divergence in a VCD (re-running with a dump if needed).",
+    )
+    parser.add_argument(
+        "--sim-seeds",
+        default="",
+        help="Run simv once per seed in parallel (vvp simv +seed=N), e.g. 1-8 or 1,7,42; failures are merged.",
+    )
+    parser.add_argument(
+        "--seed-jobs",
+        type=int,
+        default=0,
+        help="Seeds simulated at the same time (0 = one per seed, capped at the CPU count).",
+    )
+    parser.add_argument(
+        "--stop-on-first-fail",
+        action="store_true",
+        help="Kill the remaining seeds as soon as one seed fails.",
+    )
     parser.add_argument(
         "--sv",
         action="store_true",
         help="Enable SystemVerilog flags (-g2012).",
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile prep/exec/post (cProfile + tracemalloc) into <project-root>/build/profile.",
+    )
     args = parser.parse_args()
 
     project_root = args.project_root.resolve()
     if not project_root.exists():
         raise SystemExit(f"project_root does not exist: {project_root}")
 
+    try:
+        seeds = parse_seeds(args.sim_seeds)
+    except ValueError as e:
+        raise SystemExit(f"--sim-seeds: {e}")
+
     compile_extra = ["-Wall"]
     if args.sv:
         compile_extra.insert(0, "-g2012")  # enable SystemVerilog
@@ -77,10 +113,21 @@ def main() -> None:
         iverilog_bin=args.iverilog_bin,
         vvp_bin=args.vvp_bin,
         compile_extra_args=tuple(compile_extra),
+        scratch_dir=args.scratch_dir,
+        vcd_on_fail=args.vcd_on_fail,
+        sim_seeds=seeds,
+        seed_jobs=args.seed_jobs,
+        stop_on_first_fail=args.stop_on_first_fail,
         require_review_passed=args.require_review_passed,
     )
 
     node = VerificationAgentNode(params=params)
+    profiler = None
+    if args.profile:
+        from utils.profiling import NodeProfiler
+
+        profiler = NodeProfiler(project_root / "build" / "profile")
+        profiler.attach_node(node, case="step3")
 
     shared = {
         "rtl_flist": args.rtl_flist,
@@ -92,6 +139,8 @@ def main() -> None:
     prep = node.prep(shared)
     exec_res = node.exec(prep)
     route = node.post(shared, prep, exec_res)
+    if profiler is not None:
+        profiler.report()
 
     fb = shared.get("verify_feedback", {})
 
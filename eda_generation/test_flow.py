@@ -3,6 +3,7 @@ import json
 
 from flow import build_flow, FlowParams
 from utils.clients.iflow_client import IFlowClient
+from utils.feedback import jsonable
 
 
 if __name__ == "__main__":
@@ -60,6 +61,7 @@ The module should always outputs a LOW.
             },
             ensure_ascii=False,
             indent=2,
+            default=jsonable,
         ),
         encoding="utf-8",
     )
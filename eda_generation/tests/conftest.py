@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Modules import each other from the eda_generation/ root (as the scripts there run).
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,87 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from utils.dataset_manifest import file_sha256, load_manifest, manifest_path, module_ports
+
+ANSI = """
+module RefModule #(parameter W = 8, parameter D = (W * 2)) (
+  input clk,              // input bogus_comment
+  input [3:0] a, b,
+  output reg [W-1:0] y,
+  output logic signed [7:0] z
+);
+endmodule
+"""
+
+NON_ANSI = """
+module Helper(input x); endmodule
+module RefModule(clk, d, q);
+  input clk;
+  input [1:0] d;
+  /* output [9:0] q; */
+  output reg [1:0] q;
+  always @(posedge clk) q <= d;
+endmodule
+"""
+
+
+def _ports(text: str):
+    return [(p["name"], p["direction"], p["range"], p["width"]) for p in module_ports(text)]
+
+
+def test_module_ports_ansi_header() -> None:
+    assert _ports(ANSI) == [
+        ("clk", "input", None, 1),
+        ("a", "input", "[3:0]", 4),
+        ("b", "input", "[3:0]", 4),
+        ("y", "output", "[W-1:0]", None),
+        ("z", "output", "[7:0]", 8),
+    ]
+
+
+def test_module_ports_non_ansi_body() -> None:
+    assert _ports(NON_ANSI) == [("clk", "input", None, 1), ("d", "input", "[1:0]", 2), ("q", "output", "[1:0]", 2)]
+    assert module_ports(NON_ANSI, "Missing") == []
+
+
+def _case(root: Path, case: str, ref: str = ANSI) -> None:
+    (root / f"{case}_prompt.txt").write_text(f"spec of {case}\n", encoding="utf-8")
+    (root / f"{case}_ref.sv").write_text(ref, encoding="utf-8")
+    (root / f"{case}_test.sv").write_text("module tb; endmodule\n", encoding="utf-8")
+
+
+def _touch(path: Path, bump_ns: int) -> None:
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump_ns))
+
+
+def test_stale_manifest_is_rebuilt_rehashing_only_changed_files(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    ds, problems = tmp_path / "ds", tmp_path / "problems.txt"
+    ds.mkdir()
+    _case(ds, "Prob001")
+    problems.write_text("Prob001\n", encoding="utf-8")
+
+    load_manifest(ds, problems)
+    assert manifest_path(problems).exists()
+    assert "(3 file(s) hashed)" in capsys.readouterr().out
+    load_manifest(ds, problems)
+    assert "1 case(s) from" in capsys.readouterr().out
+
+    _case(ds, "Prob002", NON_ANSI)
+    _touch(ds, 10**9)
+    problems.write_text("Prob001\nProb002\n", encoding="utf-8")
+    _touch(problems, 10**9)
+    m = load_manifest(ds, problems)
+    assert "(3 file(s) hashed)" in capsys.readouterr().out  # only Prob002's files
+    assert m.cases == ["Prob001", "Prob002"] and [p["name"] for p in m.ports("Prob002")] == ["clk", "d", "q"]
+
+    # Edited in place: the directory mtime does not change, resolve() re-checks the case's files.
+    ref = ds / "Prob002_ref.sv"
+    ref.write_text(NON_ANSI.replace("[1:0] d", "[3:0] d"), encoding="utf-8")
+    _touch(ref, 10**9)
+    m = load_manifest(ds, problems)
+    assert m.resolve("Prob002")[1] == ref
+    assert m.hashes("Prob002")["ref"] == file_sha256(ref)
+    assert m.ports("Prob002")[1]["width"] == 4
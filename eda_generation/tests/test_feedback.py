@@ -0,0 +1,69 @@
+import json
+from pathlib import Path
+
+from utils.candidates import CandidateStore
+from utils.feedback import (
+    SPILL_CHARS,
+    Blob,
+    Feedback,
+    FailedCase,
+    Issue,
+    LogTail,
+    jsonable,
+    spill,
+    stash_feedback,
+    unstash_feedback,
+)
+
+LINES = [f"{i:04d} " + "x" * 60 for i in range(200)]  # well over SPILL_CHARS
+
+
+def test_spill_keeps_short_text_and_dedups_long_text(tmp_path: Path) -> None:
+    store = CandidateStore(tmp_path)
+    assert spill("short", store) == "short"
+    long_text = "y" * (SPILL_CHARS + 1)
+    a, b = spill(long_text, store), spill(long_text, store)
+    assert isinstance(a, Blob) and str(a) == long_text and len(a) == len(long_text)
+    assert a.path == b.path
+    assert spill(long_text, None) == long_text
+
+
+def test_log_tail_slices_across_the_spill_boundary(tmp_path: Path) -> None:
+    tail = LogTail(LINES, store=CandidateStore(tmp_path), keep=40)
+
+    assert tail.blob is not None and len(tail) == 200
+    assert tail[-1] == LINES[-1] and tail[0] == LINES[0]
+    assert tail[150:170] == LINES[150:170]  # 150..159 from the blob, 160.. from memory
+    assert tail[170:] == LINES[170:]
+    assert tail[::50] == LINES[::50]
+    assert list(tail) == LINES
+
+
+def test_feedback_json_round_trip(tmp_path: Path) -> None:
+    fb = Feedback(
+        phase="verify",
+        passed=False,
+        compile_errors=[{"file": "rtl/TopModule.v", "line": 3, "message": "syntax error"}],
+        failed_cases=[FailedCase(case="mismatch_total", message="Mismatches reported: 2")],
+        raw_log_tail=LogTail(LINES, store=CandidateStore(tmp_path), keep=40),
+    )
+
+    data = json.loads(json.dumps(fb, default=jsonable))
+    assert data["raw_log_tail"]["lines"] == 200 and len(data["raw_log_tail"]["tail"]) == 40
+    back = Feedback.from_dict(data)
+    assert isinstance(back["compile_errors"][0], Issue) and back["compile_errors"][0]["line"] == 3
+    assert back["raw_log_tail"][155:165] == LINES[155:165]
+    assert back.to_dict() == fb.to_dict()
+
+
+def test_stash_and_unstash(tmp_path: Path) -> None:
+    review = Feedback(phase="review", passed=True, issues=[])
+    verify = Feedback(phase="verify", passed=False, failed_cases=[{"case": "c1", "message": "FAIL"}])
+    stashed = stash_feedback(CandidateStore(tmp_path), review_feedback=review, verify_feedback=verify, note=None)
+
+    back = unstash_feedback(stashed)
+    assert isinstance(back["verify_feedback"], Feedback) and back["note"] is None
+    assert back["verify_feedback"].to_dict() == verify.to_dict()
+    assert back["review_feedback"]["passed"] is True
+    assert unstash_feedback({"verify_feedback": {"passed": True}}) == {"verify_feedback": {"passed": True}}
+    assert unstash_feedback(None) == {}
@@ -0,0 +1,51 @@
+import threading
+import time
+from typing import List
+
+from utils.clients.hedging import HedgePolicy
+
+
+def _policy() -> HedgePolicy:
+    policy = HedgePolicy(min_samples=1, min_delay_s=0.05, max_ratio=1.0)
+    policy.observe(0.05)
+    return policy
+
+
+def test_sync_loser_usage_is_reported_when_it_finishes() -> None:
+    delays = iter([0.4, 0.0])  # the primary is slow, the hedge answers at once
+    late: List[str] = []
+    finished = threading.Event()
+
+    def call() -> str:
+        d = next(delays)
+        time.sleep(d)
+        return f"slept {d}"
+
+    def on_abandoned(result: str) -> None:
+        late.append(result)
+        finished.set()
+
+    policy = _policy()
+    assert policy.run(call, on_abandoned) == "slept 0.0"
+    assert finished.wait(2.0)
+    assert late == ["slept 0.4"]
+    policy.note_wasted(123)
+    stats = policy.stats()
+    assert (stats["hedged"], stats["hedge_won"], stats["cancelled"]) == (1, 1, 1)
+    assert (stats["abandoned_done"], stats["wasted_tokens"]) == (1, 123)
+
+
+def test_sync_failed_loser_is_not_reported() -> None:
+    calls = iter([0.3, 0.0])
+
+    def call() -> str:
+        d = next(calls)
+        time.sleep(d)
+        if d:
+            raise ConnectionError("dropped")
+        return "ok"
+
+    policy = _policy()
+    assert policy.run(call, lambda r: None) == "ok"
+    time.sleep(0.5)
+    assert policy.stats()["abandoned_done"] == 0
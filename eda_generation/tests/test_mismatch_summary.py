@@ -0,0 +1,42 @@
+from utils.mismatch_summary import format_mismatch_summary, summarize_mismatches
+
+LOG = """\
+VCD info: dumpfile wave.vcd opened for output.
+Sample 3 mismatch: out expected=1 got=0 at time 40
+Sample 7 mismatch: out expected=1 got=0 at time 80
+Mismatch at time 120: out exp 4'b1010 got 4'b1000
+Sample 9 mismatch: zero = 1 (expected 0)
+Hint: Output 'out' has 5 mismatches. First mismatch occurred at time 40.
+Hint: Output 'zero' has 1 mismatches. First mismatch occurred at time 90.
+Hint: Output 'done' has 0 mismatches.
+Mismatches: 6 in 200 samples
+"""
+
+
+def test_groups_by_signal_with_span_and_examples() -> None:
+    groups = summarize_mismatches(LOG.splitlines(), examples=2)
+
+    assert [g["signal"] for g in groups] == ["out", "zero"]  # 'done' reported 0: dropped
+    out, zero = groups
+    assert out["count"] == 5 and out["reported"] == 5  # the hint wins over the 3 lines seen
+    assert (out["first_time"], out["last_time"]) == (40, 120)
+    assert (out["first_sample"], out["last_sample"]) == (3, 7)
+    assert out["examples"] == [
+        {"expected": "1", "got": "0", "sample": 3, "time": 40},
+        {"expected": "1", "got": "0", "sample": 7, "time": 80},
+    ]
+    assert zero["examples"] == [{"expected": "0", "got": "1", "sample": 9}]
+    assert (zero["first_time"], zero["last_time"]) == (90, 90)
+
+
+def test_format_is_one_line_per_signal() -> None:
+    groups = summarize_mismatches(LOG.splitlines())
+    assert format_mismatch_summary(groups, max_signals=1) == [
+        "out: 5 mismatches, t=40..120, samples 3..7, e.g. sample 3 exp=1 got=0; sample 7 exp=1 got=0; "
+        "t=120 exp=4'b1010 got=4'b1000",
+        "... 1 more signals with mismatches",
+    ]
+
+
+def test_passing_log_has_no_groups() -> None:
+    assert summarize_mismatches(["Hint: Output 'out' has no mismatches.", "Mismatches: 0 in 20 samples"]) == []
@@ -0,0 +1,58 @@
+from pathlib import Path
+
+from nodes.code_agent import CodeAgentNode
+from utils.feedback import Feedback, Issue
+from utils.rtl_context import RtlContextBuilder, strip_rtl
+
+TOP = """// Top-level wrapper
+module TopModule(input a, output y);
+  assign y = ~a;  // inverted
+endmodule
+"""
+
+
+def _big_module(name: str, lines: int) -> str:
+    body = "\n".join(f"  wire w{i} = a; // filler {i}" for i in range(lines))
+    return f"module {name}(input a);\n{body}\nendmodule\n"
+
+
+def _builder(root: Path, budget: int) -> RtlContextBuilder:
+    return RtlContextBuilder(root=root, rtl_dir="rtl", allowed_exts=(".v",), token_budget=budget)
+
+
+def _write(root: Path, rel: str, text: str) -> None:
+    (root / rel).parent.mkdir(parents=True, exist_ok=True)
+    (root / rel).write_text(text, encoding="utf-8")
+
+
+def test_strip_keeps_line_numbers_and_strings() -> None:
+    src = 'a = 1; // c\n/* x\ny */ $display("//keep");\n'
+    assert strip_rtl(src, "comments") == 'a = 1;\n\n $display("//keep");\n'
+
+
+def test_patch_targets_are_verbatim_and_others_excerpted(tmp_path: Path) -> None:
+    _write(tmp_path, "rtl/TopModule.v", TOP)
+    _write(tmp_path, "rtl/big.v", _big_module("big", 400))
+    _write(tmp_path, "rtl/other.v", _big_module("other", 400))
+    review = Feedback(passed=False, issues=[Issue(file="rtl/big.v", line=200, message="W")])
+
+    packed = _builder(tmp_path, budget=200).pack(
+        ["rtl/big.v", "rtl/other.v", "rtl/TopModule.v"], review_fb=review, targets=["rtl/TopModule.v"]
+    )
+
+    assert packed.targets == ["rtl/TopModule.v"]
+    assert "### FILE: rtl/TopModule.v (patch target, verbatim)\n" + TOP.rstrip() in packed.text
+    assert packed.excerpted == ["rtl/big.v"]
+    assert "200:   wire w198 = a;" in packed.text and "// filler" not in packed.text
+    assert packed.omitted == ["rtl/other.v"]
+
+
+def test_without_targets_first_file_is_still_whole(tmp_path: Path) -> None:
+    _write(tmp_path, "rtl/big.v", _big_module("big", 400))
+    packed = _builder(tmp_path, budget=10).pack(["rtl/big.v"])
+    assert packed.included == ["rtl/big.v"] and packed.targets == []
+
+
+def test_partial_paths_cover_excerpted_and_omitted() -> None:
+    prep = {"context_excerpted": ["rtl/big.v"], "context_omitted": ["rtl/sub/other.v"]}
+    assert CodeAgentNode._partial_paths(prep) == {"rtl/big.v", "big.v", "rtl/sub/other.v", "other.v"}
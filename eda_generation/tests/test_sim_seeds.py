@@ -0,0 +1,52 @@
+import stat
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from nodes.verification_agent import VerificationAgentNode, VerificationAgentParams
+
+# Stub simulator: seeds 3 and 5 fail (4 and 2 mismatches), every other seed sleeps SLEEP_S and passes.
+VVP = """#!/bin/sh
+seed=0
+for a in "$@"; do case "$a" in +seed=*) seed=${a#+seed=};; esac; done
+case "$seed" in
+  3) sleep 0.2; echo "Hint: Output 'out' has 4 mismatches."; echo "Mismatches: 4 in 100 samples"; exit 1;;
+  5) sleep 0.2; echo "Mismatches: 2 in 100 samples"; exit 1;;
+esac
+sleep %s
+echo "Mismatches: 0 in 100 samples"
+"""
+
+
+def _run(tmp_path: Path, seeds: Tuple[int, ...], *, sleep_s: float, stop: bool) -> Dict[str, Any]:
+    vvp = tmp_path / "vvp"
+    vvp.write_text(VVP % sleep_s, encoding="utf-8")
+    vvp.chmod(vvp.stat().st_mode | stat.S_IEXEC)
+    params = VerificationAgentParams(
+        project_root=str(tmp_path), vvp_bin=str(vvp), sim_seeds=seeds, seed_jobs=len(seeds), stop_on_first_fail=stop
+    )
+    prep = {"run_log": str(tmp_path / "sim_run.log"), "simv_path": str(tmp_path / "simv"), "workdir": str(tmp_path)}
+    return VerificationAgentNode(params=params)._run_seeds(prep)
+
+
+def test_stop_on_first_fail_kills_the_other_seeds(tmp_path: Path) -> None:
+    res = _run(tmp_path, (1, 3, 7), sleep_s=30, stop=True)
+
+    summary = res["seeds"]
+    assert summary["failed"] == [3] and sorted(summary["stopped"]) == [1, 7] and summary["passed"] == 0
+    assert summary["wall_s"] < 10
+    assert "# seed 3: fail rc=1" in res["run_out"] and "# seed 1: stopped" in res["run_out"]
+    assert "# ---- seed 3 ----" in res["run_out"] and "# ---- seed 1 ----" not in res["run_out"]
+    assert res["failing_seed"] == 3 and res["mismatches"] == 4
+    assert set(res["seed_logs"]) == {"3"}
+
+
+def test_failures_of_all_seeds_are_merged(tmp_path: Path) -> None:
+    res = _run(tmp_path, (1, 3, 5), sleep_s=0.1, stop=False)
+
+    assert res["seeds"]["failed"] == [3, 5] and res["seeds"]["passed"] == 1
+    for line in ("# seed 1: pass rc=0", "# seed 3: fail rc=1", "# seed 5: fail rc=1"):
+        assert line in res["run_out"]
+    assert res["mismatches"] == 6  # 4 + 2; the passing seed's "Mismatches: 0" does not count
+    assert {c["case"] for c in res["failed_cases"]} == {"seed3/mismatch_total", "seed5/mismatch_total"}
+    assert res["run_rc"] == 1
+    assert (tmp_path / "sim_run_seed1.log").exists()
@@ -0,0 +1,44 @@
+from pathlib import Path
+
+from utils.solved_cache import SolvedCache, normalize_spec
+
+SPEC = """I would like you to implement a module named TopModule with the following interface.
+  - input  clk
+  - input  reset
+  - input  [7:0] in
+  - output [7:0] out
+The module should implement an 8-bit register that is cleared by a synchronous active high
+reset and otherwise loads the input on every positive edge of the clock. The output always
+shows the current value of the register.
+"""
+DESIGN = "module TopModule(input clk, input reset, input [7:0] in, output reg [7:0] out);\nendmodule\n"
+
+
+def test_exact_hit_ignores_whitespace_but_not_the_environment(tmp_path: Path) -> None:
+    cache = SolvedCache(tmp_path / "solved.sqlite")
+    key = SolvedCache.key(SPEC, b"module RefModule;", b"module tb;")
+    cache.put(key, spec=SPEC, design=DESIGN, case="Prob001")
+
+    respaced = "\r\n".join("  " + " ".join(line.split()) for line in SPEC.splitlines()) + "\r\n\r\n"
+    assert normalize_spec(respaced) == normalize_spec(SPEC)
+    assert cache.get(SolvedCache.key(respaced, b"module RefModule;", b"module tb;")) == {
+        "key": key,
+        "case": "Prob001",
+        "design": DESIGN,
+    }
+    assert cache.get(SolvedCache.key(SPEC, b"module RefModule;", b"module tb2;")) is None
+    assert len(cache) == 1
+
+
+def test_similar_finds_near_duplicates_only(tmp_path: Path) -> None:
+    cache = SolvedCache(tmp_path / "solved.sqlite")
+    key = SolvedCache.key(SPEC, b"ref", b"tb")
+    cache.put(key, spec=SPEC, design=DESIGN, case="Prob001")
+
+    variant = SPEC.replace("active high", "active low").replace("8-bit", "16-bit")
+    hit = cache.similar(variant, threshold=0.5)
+    assert hit is not None and hit["case"] == "Prob001" and hit["design"] == DESIGN
+    assert 0.5 <= hit["similarity"] < 1.0
+
+    assert cache.similar(SPEC, exclude_key=key) is None
+    assert cache.similar("Build a 4-to-1 multiplexer selecting one of four inputs with sel.") is None
@@ -0,0 +1,85 @@
+from pathlib import Path
+
+from utils.vcd_diff import first_divergence, format_divergence
+
+# tb drives a 4-bit q and a 1-bit y from both RefModule and TopModule. Up to t=20 every
+# difference is on a bit the reference leaves x/z; at t=25 (third rising clk) q differs.
+VCD = """\
+$date today $end
+$timescale 1ns $end
+$scope module tb $end
+$var reg 1 ! clk $end
+$var reg 4 " in [3:0] $end
+$var wire 4 # q_ref [3:0] $end
+$var wire 4 $ q_dut [3:0] $end
+$var wire 1 % y_ref $end
+$var wire 1 & y_dut $end
+$var integer 32 ( mismatches $end
+$scope module dut $end
+$var wire 4 ' state [3:0] $end
+$upscope $end
+$upscope $end
+$enddefinitions $end
+#0
+$dumpvars
+0!
+b0 "
+bx #
+b0 $
+x%
+1&
+b0 '
+$end
+#5
+1!
+b1 "
+b1 #
+b1 $
+z%
+0&
+#10
+0!
+#15
+1!
+b10 "
+b1x10 #
+b1010 $
+1%
+1&
+#20
+0!
+#25
+1!
+b11 "
+b1100 #
+b1000 $
+"""
+
+
+def _write(tmp_path: Path, text: str) -> Path:
+    path = tmp_path / "wave.vcd"
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_first_divergence_skips_dont_care_ref_bits(tmp_path: Path) -> None:
+    div = first_divergence(_write(tmp_path, VCD), tb_top="tb", window=2)
+
+    assert div["found"] and div["time"] == 25 and div["cycle"] == 3
+    assert div["signals"] == [{"signal": "q", "ref": "4'b1100", "dut": "4'b1000"}]
+    assert div["inputs"] == {"clk": "1", "in": "4'b0011"}
+    assert [s["time"] for s in div["trace"]] == [15, 20]  # the window: last two matching timestamps
+    assert div["trace"][0]["outputs"]["q"] == {"ref": "4'b1x10", "dut": "4'b1010"}
+    assert format_divergence(div)[0] == "first divergence at t=25 (cycle 3): q ref=4'b1100 dut=4'b1000 | inputs clk=1 in=4'b0011"
+
+
+def test_no_divergence_and_no_pairs(tmp_path: Path) -> None:
+    matching = VCD.replace("b1000 $", "b1100 $")
+    assert first_divergence(_write(tmp_path, matching), window=0) == {
+        "found": False,
+        "pairs": 2,
+        "reason": "outputs never diverge in the VCD",
+    }
+    unpaired = VCD.replace("q_dut", "q_out").replace("y_dut", "y_out")
+    assert first_divergence(_write(tmp_path, unpaired))["pairs"] == 0
+    assert first_divergence(tmp_path / "missing.vcd")["found"] is False
@@ -0,0 +1,25 @@
+from pathlib import Path
+
+from nodes.verification_agent import VerificationAgentNode, VerificationAgentParams
+from utils.feedback import Feedback, Issue
+from utils.rtl_context import RtlContextBuilder
+
+
+def _failing_review() -> Feedback:
+    return Feedback(
+        phase="review",
+        tool="spyglass",
+        passed=False,
+        issues=[Issue(severity="Error", file="rtl/TopModule.v", line=7, message="W123 undriven")],
+    )
+
+
+def test_verify_skips_after_failed_review(tmp_path: Path) -> None:
+    node = VerificationAgentNode(params=VerificationAgentParams(project_root=str(tmp_path)))
+    assert node.prep({"review_feedback": _failing_review()}) == {"skip": True, "reason": "review_failed"}
+
+
+def test_feedback_mentions_reads_feedback_records(tmp_path: Path) -> None:
+    mentions = RtlContextBuilder(root=tmp_path, rtl_dir=".", allowed_exts=(".v",)).feedback_mentions(_failing_review(), None)
+    assert mentions == {"rtl/TopModule.v": {7}}
+
@@ -0,0 +1,61 @@
+import threading
+from pathlib import Path
+from typing import List
+
+from utils.work_queue import WorkQueue
+
+
+def test_concurrent_claims_never_share_a_case(tmp_path: Path) -> None:
+    db = tmp_path / "queue.sqlite"
+    cases = [f"Prob{i:03d}" for i in range(40)]
+    WorkQueue(db).publish(cases)
+    claimed: List[str] = []
+    lock = threading.Lock()
+
+    def worker(n: int) -> None:
+        q = WorkQueue(db)  # one connection per worker, as on separate hosts
+        while (job := q.claim(f"w{n}", lease_s=60)) is not None:
+            with lock:
+                claimed.append(job.case)
+            q.complete(job.case, f"w{n}", ok=True, result={})
+        q.close()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(claimed) == cases
+    assert WorkQueue(db).finished()
+
+
+def test_late_complete_after_takeover_is_rejected(tmp_path: Path) -> None:
+    q = WorkQueue(tmp_path / "queue.sqlite")
+    q.publish(["Prob001"])
+    assert q.claim("slow", lease_s=-1).case == "Prob001"  # lease already expired
+    job = q.claim("fast", lease_s=60)
+    assert job is not None and job.attempts == 2
+
+    assert not q.renew("Prob001", "slow", lease_s=60)
+    assert not q.complete("Prob001", "slow", ok=False, result={"error": "late"})
+    assert q.complete("Prob001", "fast", ok=True, result={"passed": True})
+    assert q.results()[0]["state"] == "done" and q.results()[0]["worker"] == "fast"
+
+
+def test_case_fails_after_max_attempts_expiries(tmp_path: Path) -> None:
+    q = WorkQueue(tmp_path / "queue.sqlite", max_attempts=2)
+    q.publish(["Poison"])
+    assert q.claim("w1", lease_s=-1) is not None
+    assert q.claim("w2", lease_s=-1) is not None
+
+    assert q.claim("w3", lease_s=60) is None
+    assert q.counts()["failed"] == 1 and q.finished()
+    assert q.results()[0]["result"] == {"error": "lease expired too many times"}
+
+
+def test_unpublished_queue_is_not_finished(tmp_path: Path) -> None:
+    q = WorkQueue(tmp_path / "queue.sqlite")
+    assert q.claim("w1", lease_s=60) is None and not q.finished()
+    q.publish([])
+    assert q.finished()
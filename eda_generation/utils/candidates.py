@@ -0,0 +1,85 @@
+"""
+Best-so-far candidate tracking.
+
+Every round's RTL is kept content-addressed under the candidate store
+(<store>/<sha256[:16]><suffix>, so identical attempts share one blob) and
+listed in flow_status["candidates"] as {"round", "base_round", "files": {rel:
+blob}}. A candidate's score is its round's progress record (utils/progress.py):
+the best candidate is the round with the lowest (lint errors, compile errors,
+mismatches), the latest one on ties.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from utils.progress import round_score
+
+
+class CandidateStore:
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+
+    def put(self, content: str, suffix: str = ".v") -> str:
+        """Store one file's content and return its blob name."""
+        blob = hashlib.sha256(content.encode("utf-8")).hexdigest()[:16] + suffix
+        path = self.root / blob
+        if not path.exists():
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f".{blob}.{os.getpid()}.tmp")
+            tmp.write_text(content, encoding="utf-8")
+            os.replace(tmp, path)
+        return blob
+
+    def path(self, blob: str) -> Path:
+        return self.root / blob
+
+    def read(self, blob: str) -> str:
+        return self.path(blob).read_text(encoding="utf-8")
+
+
+def record_candidate(
+    flow_status: Dict[str, Any],
+    store: CandidateStore,
+    round_no: int,
+    files: Dict[str, str],
+    *,
+    base_round: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Store this round's file contents ({rel: content}) and list the candidate."""
+    flow_status["candidate_store"] = str(store.root)
+    rec = {
+        "round": round_no,
+        "base_round": base_round,
+        "files": {rel: store.put(content, Path(rel).suffix) for rel, content in files.items()},
+    }
+    flow_status.setdefault("candidates", []).append(rec)
+    return rec
+
+
+def candidate(flow_status: Dict[str, Any], round_no: Optional[int]) -> Optional[Dict[str, Any]]:
+    for rec in flow_status.get("candidates") or []:
+        if rec.get("round") == round_no:
+            return rec
+    return None
+
+
+def scored_candidates(flow_status: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Candidates joined with their round's progress record (unscored rounds are skipped)."""
+    progress = {rec.get("round"): rec for rec in flow_status.get("progress") or []}
+    out = []
+    for rec in flow_status.get("candidates") or []:
+        score = progress.get(rec.get("round"))
+        if score is not None:
+            out.append({**rec, "score": {k: v for k, v in score.items() if k != "round"}})
+    return out
+
+
+def best_candidate(flow_status: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    scored = scored_candidates(flow_status)
+    if not scored:
+        return None
+    return min(scored, key=lambda rec: (round_score(rec["score"]), -int(rec["round"])))
@@ -0,0 +1,118 @@
+"""
+Cost-aware ordering of dataset cases.
+
+Durations come from a JSONL sweep history (one case_summary record per line,
+appended by run_dataset.py). Cases without history are estimated from their
+spec + testbench size, scaled by what the history says a byte costs. Cases
+are then ordered longest-expected-first (LPT), which keeps a few slow cases
+from being left for the end of a sweep.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import statistics
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Used only when there is no history at all.
+_DEFAULT_BASE_S = 30.0
+_DEFAULT_S_PER_KB = 2.0
+
+
+@dataclass
+class CaseEstimate:
+    case: str
+    seconds: float
+    rounds: Optional[float]
+    source: str  # "history" | "size"
+
+
+def append_history(path: Path, record: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def load_history(path: Path, *, last_n: int = 5) -> Dict[str, Dict[str, float]]:
+    """case -> {"seconds", "rounds", "runs"} averaged over the last `last_n` successful runs."""
+    runs: Dict[str, List[Dict[str, Any]]] = {}
+    if not path.exists():
+        return {}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        try:
+            rec = json.loads(line)
+        except ValueError:
+            continue
+        if rec.get("error") or not isinstance(rec.get("wall_s"), (int, float)):
+            continue
+        runs.setdefault(str(rec.get("case")), []).append(rec)
+
+    out: Dict[str, Dict[str, float]] = {}
+    for case, recs in runs.items():
+        recent = recs[-last_n:]
+        rounds = [r["rounds"] for r in recent if isinstance(r.get("rounds"), int)]
+        out[case] = {
+            "seconds": statistics.fmean(r["wall_s"] for r in recent),
+            "rounds": statistics.fmean(rounds) if rounds else 0.0,
+            "runs": float(len(recent)),
+        }
+    return out
+
+
+def estimate_cases(
+    cases: Iterable[str],
+    history: Dict[str, Dict[str, float]],
+    size_of: Callable[[str], int],
+) -> List[CaseEstimate]:
+    cases = list(cases)
+    sizes: Dict[str, int] = {}
+
+    def _size(case: str) -> int:
+        if case not in sizes:
+            try:
+                sizes[case] = size_of(case)
+            except Exception:
+                sizes[case] = 0
+        return sizes[case]
+
+    # Calibrate seconds-per-KB from cases that have both history and a size.
+    rates = []
+    for case in cases:
+        h = history.get(case)
+        if h and _size(case) > 0:
+            rates.append(h["seconds"] / (_size(case) / 1024))
+    s_per_kb = statistics.median(rates) if rates else _DEFAULT_S_PER_KB
+    base_s = 0.0 if rates else _DEFAULT_BASE_S
+
+    out: List[CaseEstimate] = []
+    for case in cases:
+        h = history.get(case)
+        if h:
+            out.append(CaseEstimate(case, h["seconds"], h["rounds"], "history"))
+        else:
+            out.append(CaseEstimate(case, base_s + s_per_kb * _size(case) / 1024, None, "size"))
+    return out
+
+
+def order_longest_first(estimates: List[CaseEstimate]) -> List[CaseEstimate]:
+    # More historical rounds breaks ties; the sort is stable so remaining ties keep problems.txt order.
+    return sorted(estimates, key=lambda e: (-e.seconds, -(e.rounds or 0.0)))
+
+
+def predict_makespan(estimates: List[CaseEstimate], workers: int = 1) -> float:
+    """
+    Makespan of list-scheduling the cases in the given order onto `workers`
+    identical workers (each free worker takes the next case), which is how
+    both --jobs and queue workers consume an ordered case list.
+    """
+    if workers <= 1:
+        return sum(e.seconds for e in estimates)
+    loads = [0.0] * workers
+    for e in estimates:
+        least = heapq.heappop(loads)
+        heapq.heappush(loads, least + e.seconds)
+    return max(loads)
+
@@ -0,0 +1,242 @@
+"""
+Several OpenAI-compatible endpoints behind one IFlowClient.
+
+Each request goes to an endpoint picked at random with probability
+proportional to
+
+    weight / (latency EWMA * (1 + requests in flight)) * (1 - error-rate EWMA)
+
+so slow, busy or failing endpoints get less traffic without being starved of
+the samples that would show they recovered. After `max_failures` consecutive
+retryable failures an endpoint is taken out for `cooldown_s` (doubling on each
+further trip, up to `max_cooldown_s`); a background health check (GET
+<base_url>/models) brings it back early, otherwise it gets one trial request
+when the cooldown ends. IFlowClient retries a failed request on the next
+endpoint (failover), so one rate-limited or dead endpoint does not stall the
+sweep.
+
+Endpoint spec (IFLOW_ENDPOINTS / --llm-endpoints), comma-separated:
+    base_url[|api_key][|weight]
+An api_key of "$NAME" is read from the environment; an omitted key uses the
+client's default key (IFLOW_API_KEY).
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+import urllib.request
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+_ALPHA = 0.3  # EWMA smoothing for latency and error rate
+_RETRYABLE_STATUS = (408, 409, 425, 429)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Connection errors, timeouts, rate limits and 5xx move on to another endpoint; 4xx do not."""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        name = type(exc).__name__
+        return name in ("APIConnectionError", "APITimeoutError") or isinstance(exc, (ConnectionError, TimeoutError))
+    return int(status) in _RETRYABLE_STATUS or int(status) >= 500
+
+
+class Endpoint:
+    def __init__(self, base_url: str, api_key: str, *, weight: float = 1.0, name: Optional[str] = None):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.weight = max(0.0, float(weight))
+        self.name = name or self.base_url
+        self.latency_s: Optional[float] = None  # EWMA of successful request latency
+        self.error_rate = 0.0                   # EWMA of failures (1) vs successes (0)
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.down_until = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.failovers = 0  # requests that failed here and were retried elsewhere
+        self.max_retries: Optional[int] = None  # openai client retries; None = openai's default
+        self._sync_client: Optional["OpenAI"] = None
+        self._async_client: Optional["AsyncOpenAI"] = None
+        self._lock = threading.Lock()
+
+    @property
+    def sync_client(self) -> "OpenAI":
+        if self._sync_client is None:
+            with self._lock:
+                if self._sync_client is None:
+                    from openai import OpenAI
+
+                    self._sync_client = OpenAI(base_url=self.base_url, api_key=self.api_key, **self._client_kwargs())
+        return self._sync_client
+
+    @property
+    def async_client(self) -> "AsyncOpenAI":
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    from openai import AsyncOpenAI
+
+                    self._async_client = AsyncOpenAI(base_url=self.base_url, api_key=self.api_key, **self._client_kwargs())
+        return self._async_client
+
+    def _client_kwargs(self) -> Dict[str, Any]:
+        return {} if self.max_retries is None else {"max_retries": self.max_retries}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "endpoint": self.name,
+            "calls": self.calls,
+            "errors": self.errors,
+            "failovers": self.failovers,
+            "latency_s": round(self.latency_s, 3) if self.latency_s is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "down": self.down_until > time.monotonic(),
+        }
+
+
+def parse_endpoints(spec: str, default_key: Optional[str]) -> List[Endpoint]:
+    out: List[Endpoint] = []
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        parts = [p.strip() for p in item.split("|")]
+        url = parts[0]
+        key = parts[1] if len(parts) > 1 and parts[1] else default_key
+        if key and key.startswith("$"):
+            key = os.getenv(key[1:])
+        if not key:
+            raise ValueError(f"No API key for endpoint {url!r} (give url|key or set IFLOW_API_KEY)")
+        weight = float(parts[2]) if len(parts) > 2 and parts[2] else 1.0
+        out.append(Endpoint(url, key, weight=weight))
+    return out
+
+
+class EndpointPool:
+    def __init__(
+        self,
+        endpoints: Iterable[Endpoint],
+        *,
+        max_failures: int = 3,
+        cooldown_s: float = 30.0,
+        max_cooldown_s: float = 300.0,
+        health_interval_s: float = 0.0,
+        health_timeout_s: float = 5.0,
+        seed: Optional[int] = None,
+    ):
+        self.endpoints = list(endpoints)
+        if not self.endpoints:
+            raise ValueError("EndpointPool needs at least one endpoint")
+        self.max_failures = max(1, max_failures)
+        self.cooldown_s = cooldown_s
+        self.max_cooldown_s = max_cooldown_s
+        self.health_timeout_s = health_timeout_s
+        if len(self.endpoints) > 1:
+            # Fail over to another endpoint instead of retrying the same one inside openai.
+            for ep in self.endpoints:
+                if ep.max_retries is None:
+                    ep.max_retries = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if health_interval_s > 0 and len(self.endpoints) > 1:
+            self._thread = threading.Thread(
+                target=self._health_loop, args=(health_interval_s,), name="llm-health", daemon=True
+            )
+            self._thread.start()
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    # ------------------------- routing -------------------------
+
+    def _score(self, ep: Endpoint, default_latency: float) -> float:
+        latency = ep.latency_s if ep.latency_s is not None else default_latency
+        return ep.weight / (max(latency, 1e-3) * (1 + ep.in_flight)) * max(0.05, 1.0 - ep.error_rate)
+
+    def acquire(self, exclude: Iterable[Endpoint] = ()) -> Optional[Endpoint]:
+        """Pick an endpoint for one request (counted in flight until release())."""
+        skip = set(map(id, exclude))
+        with self._lock:
+            now = time.monotonic()
+            candidates = [ep for ep in self.endpoints if id(ep) not in skip and ep.weight > 0]
+            if not candidates:
+                return None
+            up = [ep for ep in candidates if ep.down_until <= now]
+            if not up:
+                # Everything left is cooling down: use the one that comes back first.
+                up = [min(candidates, key=lambda ep: ep.down_until)]
+            known = [ep.latency_s for ep in self.endpoints if ep.latency_s is not None]
+            default_latency = sum(known) / len(known) if known else 1.0
+            scores = [self._score(ep, default_latency) for ep in up]
+            ep = self._rng.choices(up, weights=scores)[0] if sum(scores) > 0 else up[0]
+            ep.in_flight += 1
+            ep.calls += 1
+        return ep
+
+    def release(
+        self,
+        ep: Endpoint,
+        *,
+        ok: bool,
+        latency_s: float,
+        retryable: bool = True,
+        failed_over: bool = False,
+    ) -> None:
+        with self._lock:
+            ep.in_flight -= 1
+            ep.failovers += int(failed_over)
+            if ok:
+                ep.latency_s = latency_s if ep.latency_s is None else (1 - _ALPHA) * ep.latency_s + _ALPHA * latency_s
+                ep.error_rate *= 1 - _ALPHA
+                ep.consecutive_failures = 0
+                ep.trips = 0
+                ep.down_until = 0.0
+                return
+            ep.errors += 1
+            if not retryable:
+                # The request was bad, not the endpoint.
+                return
+            ep.error_rate = (1 - _ALPHA) * ep.error_rate + _ALPHA
+            ep.consecutive_failures += 1
+            if ep.consecutive_failures >= self.max_failures:
+                cooldown = min(self.max_cooldown_s, self.cooldown_s * (2 ** ep.trips))
+                ep.trips += 1
+                ep.consecutive_failures = 0
+                ep.down_until = time.monotonic() + cooldown
+                print(f"[llm] endpoint {ep.name} marked down for {cooldown:.0f}s")
+
+    # ------------------------- health checks -------------------------
+
+    def check(self, ep: Endpoint) -> bool:
+        req = urllib.request.Request(f"{ep.base_url}/models", headers={"Authorization": f"Bearer {ep.api_key}"})
+        try:
+            with urllib.request.urlopen(req, timeout=self.health_timeout_s) as resp:
+                return 200 <= resp.status < 300
+        except Exception:
+            return False
+
+    def _health_loop(self, interval_s: float) -> None:
+        while not self._stop.wait(interval_s):
+            now = time.monotonic()
+            for ep in [ep for ep in self.endpoints if ep.down_until > now]:
+                if self.check(ep):
+                    with self._lock:
+                        ep.down_until = 0.0
+                        ep.consecutive_failures = 0
+                    print(f"[llm] endpoint {ep.name} healthy again")
+
+    def close(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [ep.stats() for ep in self.endpoints]
@@ -0,0 +1,205 @@
+"""
+Hedged LLM requests: when a call has been outstanding longer than the
+`percentile` latency of recent calls, send the same request once more and
+take whichever answer arrives first.
+
+Latencies of individual attempts are kept in a sliding window (the last
+`window` attempts, losers included once they finish), so the hedge delay
+follows the current provider latency. No hedging happens until `min_samples`
+attempts are known, and at most `max_ratio` of calls are hedged, which caps
+the extra token spend. Async calls cancel the losing request. Sync calls
+cannot interrupt an HTTP request in flight (closing the client only turns the
+answer into a connection error once the server has sent it, so the tokens
+are spent and their count lost); the loser is abandoned instead: it finishes
+in a background thread, its answer is dropped, and `on_abandoned` gets the
+late result so the caller can still count its token usage.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set, TypeVar
+
+_T = TypeVar("_T")
+
+
+class HedgePolicy:
+    def __init__(
+        self,
+        *,
+        percentile: float = 0.95,
+        window: int = 256,
+        min_samples: int = 20,
+        min_delay_s: float = 1.0,
+        max_ratio: float = 0.1,
+    ):
+        if not 0.0 < percentile < 1.0:
+            raise ValueError(f"hedge percentile must be in (0, 1), got {percentile}")
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay_s = min_delay_s
+        self.max_ratio = max_ratio
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedged = 0     # calls where a second request was sent
+        self.hedge_won = 0  # ... and the second request answered first
+        self.cancelled = 0  # losing requests cancelled (async) or abandoned (sync)
+        self.abandoned_done = 0  # abandoned sync losers that still ran to completion
+        self.wasted_tokens = 0   # ... and the tokens they used (see note_wasted)
+
+    # ------------------------- latency tracking -------------------------
+
+    def observe(self, latency_s: float) -> None:
+        with self._lock:
+            self._samples.append(latency_s)
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait before hedging this call, or None to not hedge it."""
+        with self._lock:
+            self.calls += 1
+            if self.hedged >= self.max_ratio * self.calls:
+                return None
+            return self._current_delay()
+
+    def _current_delay(self) -> Optional[float]:
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return max(self.min_delay_s, ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            delay = self._current_delay()
+            return {
+                "calls": self.calls,
+                "hedged": self.hedged,
+                "hedge_won": self.hedge_won,
+                "cancelled": self.cancelled,
+                "abandoned_done": self.abandoned_done,
+                "wasted_tokens": self.wasted_tokens,
+                "percentile": self.percentile,
+                "current_delay_s": round(delay, 3) if delay is not None else None,
+            }
+
+    def _count(self, **deltas: int) -> None:
+        with self._lock:
+            for k, v in deltas.items():
+                setattr(self, k, getattr(self, k) + v)
+
+    def note_wasted(self, tokens: int) -> None:
+        """Add the token usage of an abandoned request that ran to completion anyway."""
+        self._count(wasted_tokens=int(tokens))
+
+    # ------------------------- sync -------------------------
+
+    def _start(self, fn: Callable[[], _T]) -> "Future[_T]":
+        """Run one attempt in its own daemon thread (an abandoned loser must not block exit)."""
+        fut: "Future[_T]" = Future()
+
+        def _run() -> None:
+            if not fut.set_running_or_notify_cancel():
+                return
+            t0 = time.monotonic()
+            try:
+                result = fn()
+            except BaseException as e:
+                fut.set_exception(e)
+                return
+            self.observe(time.monotonic() - t0)
+            fut.set_result(result)
+
+        threading.Thread(target=_run, name="llm-hedge", daemon=True).start()
+        return fut
+
+    def _abandon(self, losers: Set["Future[_T]"], on_abandoned: Optional[Callable[[_T], None]]) -> None:
+        self._count(cancelled=len(losers))
+
+        def _late(fut: "Future[_T]") -> None:
+            if fut.exception() is not None:
+                return
+            self._count(abandoned_done=1)
+            if on_abandoned is not None:
+                on_abandoned(fut.result())
+
+        for fut in losers:
+            fut.add_done_callback(_late)
+
+    def run(self, fn: Callable[[], _T], on_abandoned: Optional[Callable[[_T], None]] = None) -> _T:
+        """Call `fn`, hedged; `on_abandoned` receives the result of a losing attempt if it still finishes."""
+        delay = self.delay()
+        if delay is None:
+            t0 = time.monotonic()
+            result = fn()
+            self.observe(time.monotonic() - t0)
+            return result
+
+        primary = self._start(fn)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        self._count(hedged=1)
+        print(f"[llm] no answer after {delay:.1f}s; sending a hedged request")
+        hedge = self._start(fn)
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut.exception() is not None:
+                    error = fut.exception()
+                    continue
+                if fut is hedge:
+                    self._count(hedge_won=1)
+                self._abandon(pending, on_abandoned)
+                return fut.result()
+        assert error is not None
+        raise error
+
+    # ------------------------- async -------------------------
+
+    async def arun(self, fn: Callable[[], Awaitable[_T]]) -> _T:
+        import asyncio
+
+        async def _timed() -> _T:
+            t0 = time.monotonic()
+            result = await fn()
+            self.observe(time.monotonic() - t0)
+            return result
+
+        delay = self.delay()
+        if delay is None:
+            return await _timed()
+
+        primary = asyncio.ensure_future(_timed())
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        self._count(hedged=1)
+        print(f"[llm] no answer after {delay:.1f}s; sending a hedged request")
+        hedge = asyncio.ensure_future(_timed())
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if task is hedge:
+                        self._count(hedge_won=1)
+                    return task.result()
+        finally:
+            if pending:
+                self._count(cancelled=len(pending))
+                for task in pending:
+                    task.cancel()
+        assert error is not None
+        raise error
+
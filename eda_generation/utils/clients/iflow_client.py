@@ -4,52 +4,210 @@ Used to call iFlow platform AI model services
 """
 
 import os
+import threading
+import time
 from typing import (
+    TYPE_CHECKING,
     Optional,
     Dict,
     Any,
     List,
+    Sequence,
     Union,
     Iterator,
     AsyncIterator,
+    Awaitable,
+    Callable,
+    TypeVar,
 )
-from openai import OpenAI, AsyncOpenAI
-from pydantic import BaseModel
 
+from utils.clients.endpoint_pool import Endpoint, EndpointPool, is_retryable, parse_endpoints
+from utils.clients.hedging import HedgePolicy
+from utils.clients.transcript import MODES as TRANSCRIPT_MODES, TranscriptStore
 
-class Message(BaseModel):
-    """Message model"""
-    role: str  # "system", "user", "assistant"
-    content: str
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+DEFAULT_BASE_URL = "https://apis.iflow.cn/v1"
+DEFAULT_HEALTH_INTERVAL_S = 30.0
+
+_T = TypeVar("_T")
+_env_hedge: Optional[HedgePolicy] = None
+_env_hedge_lock = threading.Lock()
+
+
+def _env_hedge_policy() -> Optional[HedgePolicy]:
+    """HedgePolicy from IFLOW_HEDGE_PERCENTILE, shared by all clients of the process (one latency history)."""
+    global _env_hedge
+    pct = os.getenv("IFLOW_HEDGE_PERCENTILE")
+    if not pct or float(pct) <= 0:
+        return None
+    with _env_hedge_lock:
+        if _env_hedge is None:
+            _env_hedge = HedgePolicy(percentile=float(pct))
+        return _env_hedge
+
+
+def __getattr__(name: str) -> Any:
+    # openai/pydantic take ~0.5 s to import, so they are only loaded on first use:
+    # Message (a pydantic model) here, the OpenAI clients in IFlowClient.sync_client/async_client.
+    if name == "Message":
+        from pydantic import BaseModel
+
+        class Message(BaseModel):
+            """Message model"""
+            role: str  # "system", "user", "assistant"
+            content: str
+
+        globals()["Message"] = Message
+        return Message
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class IFlowClient:
     """iFlow API Client class"""
 
-    def __init__(self, api_key: Optional[str] = None, base_url: str = "https://apis.iflow.cn/v1"):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        transcript_mode: Optional[str] = None,
+        transcript_dir: Optional[str] = None,
+        endpoints: Optional[Union[str, Sequence[Endpoint]]] = None,
+        health_interval_s: Optional[float] = None,
+        hedge: Optional[HedgePolicy] = None,
+    ):
         """
         Initialize iFlow Client.
 
         Args:
             api_key: iFlow API key, if not provided will get from environment variable IFLOW_API_KEY
-            base_url: API base URL, default is iFlow API address
+            base_url: API base URL, if not provided will get from environment variable IFLOW_BASE_URL,
+                falling back to the iFlow API address
+            transcript_mode: "live" (default), "record" (save every request/response pair) or
+                "replay" (serve saved responses, no network); env IFLOW_TRANSCRIPT_MODE
+            transcript_dir: Where transcripts are stored; env IFLOW_TRANSCRIPT_DIR
+            endpoints: Several OpenAI-compatible endpoints to balance and fail over between,
+                "url[|key][|weight],..." or Endpoint objects (see endpoint_pool.py);
+                env IFLOW_ENDPOINTS. Overrides base_url.
+            health_interval_s: Seconds between health checks of endpoints marked down;
+                env IFLOW_HEALTH_INTERVAL, 0 = only retry them after their cooldown
+            hedge: Send a duplicate non-streaming request when one is slower than the policy's
+                latency percentile (see hedging.py); env IFLOW_HEDGE_PERCENTILE (e.g. 0.95)
+                enables it with default settings. Off by default.
         """
-        self.api_key = api_key or os.getenv("IFLOW_API_KEY")
-        if not self.api_key:
-            raise ValueError(
-                "iFlow API key not provided, please set api_key parameter "
-                "or IFLOW_API_KEY environment variable"
-            )
+        self.transcript_mode = (transcript_mode or os.getenv("IFLOW_TRANSCRIPT_MODE") or "live").lower()
+        if self.transcript_mode not in TRANSCRIPT_MODES:
+            raise ValueError(f"Unknown transcript_mode {self.transcript_mode!r}, expected one of {TRANSCRIPT_MODES}")
+        self.transcript: Optional[TranscriptStore] = None
+        if self.transcript_mode != "live":
+            tdir = transcript_dir or os.getenv("IFLOW_TRANSCRIPT_DIR")
+            if not tdir:
+                raise ValueError(
+                    f"transcript_mode={self.transcript_mode} requires transcript_dir "
+                    "or IFLOW_TRANSCRIPT_DIR environment variable"
+                )
+            self.transcript = TranscriptStore(tdir)
 
-        self.base_url = base_url
-        self.sync_client = OpenAI(
-            base_url=self.base_url,
-            api_key=self.api_key,
-        )
-        self.async_client = AsyncOpenAI(
-            base_url=self.base_url,
-            api_key=self.api_key,
-        )
+        self.api_key = api_key or os.getenv("IFLOW_API_KEY")
+        if not self.api_key and self.transcript_mode == "replay":
+            # Replay never touches the network, so no key is needed.
+            self.api_key = "replay"
+
+        spec = endpoints if endpoints is not None else os.getenv("IFLOW_ENDPOINTS")
+        if isinstance(spec, str):
+            eps = parse_endpoints(spec, self.api_key)
+        else:
+            eps = list(spec or [])
+        if not eps:
+            if not self.api_key:
+                raise ValueError(
+                    "iFlow API key not provided, please set api_key parameter "
+                    "or IFLOW_API_KEY environment variable"
+                )
+            eps = [Endpoint(base_url or os.getenv("IFLOW_BASE_URL") or DEFAULT_BASE_URL, self.api_key)]
+        if health_interval_s is None:
+            health_interval_s = float(os.getenv("IFLOW_HEALTH_INTERVAL") or DEFAULT_HEALTH_INTERVAL_S)
+        self.pool = EndpointPool(eps, health_interval_s=health_interval_s if self.transcript_mode != "replay" else 0.0)
+        self.base_url = eps[0].base_url
+        self.api_key = self.api_key or eps[0].api_key
+        self.hedge = hedge if hedge is not None else _env_hedge_policy()
+        # Running token totals for this client; the usage of a single call is per thread
+        # (see last_usage), since --jobs/--pipeline share one client.
+        self._local = threading.local()
+        self.usage_totals: Dict[str, int] = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+        self._usage_lock = threading.Lock()
+
+    @property
+    def last_usage(self) -> Dict[str, int]:
+        """Token usage of this thread's most recent non-streaming call; {} if that call failed."""
+        return getattr(self._local, "usage", {})
+
+    @property
+    def sync_client(self) -> "OpenAI":
+        """OpenAI client of the first endpoint, created (and openai imported) on first use."""
+        return self.pool.endpoints[0].sync_client
+
+    @property
+    def async_client(self) -> "AsyncOpenAI":
+        return self.pool.endpoints[0].async_client
+
+    def endpoint_stats(self) -> List[Dict[str, Any]]:
+        return self.pool.stats()
+
+    def hedge_stats(self) -> Optional[Dict[str, Any]]:
+        return self.hedge.stats() if self.hedge is not None else None
+
+    # ---------- endpoint routing ----------
+
+    def _with_failover(self, call: Callable[["OpenAI"], _T]) -> _T:
+        """Run `call` on a pool endpoint, moving on to the next one on retryable errors."""
+        tried: List[Endpoint] = []
+        last_exc: Optional[Exception] = None
+        while True:
+            ep = self.pool.acquire(exclude=tried)
+            if ep is None:
+                raise last_exc or RuntimeError("No LLM endpoint available")
+            t0 = time.monotonic()
+            try:
+                result = call(ep.sync_client)
+            except Exception as e:
+                tried.append(ep)
+                last_exc = e
+                retry = is_retryable(e) and len(tried) < len(self.pool)
+                self.pool.release(
+                    ep, ok=False, latency_s=time.monotonic() - t0, retryable=is_retryable(e), failed_over=retry
+                )
+                if not retry:
+                    raise
+                print(f"[llm] {ep.name} failed ({type(e).__name__}: {e}); failing over")
+                continue
+            self.pool.release(ep, ok=True, latency_s=time.monotonic() - t0)
+            return result
+
+    async def _awith_failover(self, call: Callable[["AsyncOpenAI"], Awaitable[_T]]) -> _T:
+        tried: List[Endpoint] = []
+        last_exc: Optional[Exception] = None
+        while True:
+            ep = self.pool.acquire(exclude=tried)
+            if ep is None:
+                raise last_exc or RuntimeError("No LLM endpoint available")
+            t0 = time.monotonic()
+            try:
+                result = await call(ep.async_client)
+            except Exception as e:
+                tried.append(ep)
+                last_exc = e
+                retry = is_retryable(e) and len(tried) < len(self.pool)
+                self.pool.release(
+                    ep, ok=False, latency_s=time.monotonic() - t0, retryable=is_retryable(e), failed_over=retry
+                )
+                if not retry:
+                    raise
+                print(f"[llm] {ep.name} failed ({type(e).__name__}: {e}); failing over")
+                continue
+            self.pool.release(ep, ok=True, latency_s=time.monotonic() - t0)
+            return result
 
     # ---------- internal helpers ----------
 
@@ -69,6 +227,95 @@ class IFlowClient:
         # For OpenAI v1 client, `delta.content` may be str | None
         return getattr(delta, "content", None)
 
+    @staticmethod
+    def _extract_usage(response: Any) -> Dict[str, int]:
+        """
+        Read token usage from a ChatCompletion, including prompt-cache hits.
+
+        OpenAI-compatible providers report cache hits as
+        usage.prompt_tokens_details.cached_tokens; some use usage.prompt_cache_hit_tokens.
+        """
+        usage = getattr(response, "usage", None)
+        if not usage:
+            return {}
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None) if details else None
+        if cached is None:
+            cached = getattr(usage, "prompt_cache_hit_tokens", None)
+        return {
+            "prompt_tokens": int(getattr(usage, "prompt_tokens", 0) or 0),
+            "completion_tokens": int(getattr(usage, "completion_tokens", 0) or 0),
+            "cached_tokens": int(cached or 0),
+        }
+
+    def _note_usage(self, usage: Dict[str, int]) -> None:
+        self._local.usage = usage
+        self._add_usage(usage)
+
+    def _note_abandoned(self, response: Any) -> None:
+        """Count a hedged request that lost the race but still ran to completion (its answer is dropped)."""
+        usage = self._extract_usage(response)
+        self._add_usage(usage)
+        if self.hedge is not None:
+            self.hedge.note_wasted(usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0))
+
+    def _add_usage(self, usage: Dict[str, int]) -> None:
+        with self._usage_lock:
+            self.usage_totals["calls"] += 1
+            for k in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+                self.usage_totals[k] += int(usage.get(k, 0))
+
+    # ---------- transcripts ----------
+
+    def _replay(self, transcript_key: Optional[str], request: Dict[str, Any]) -> Optional[str]:
+        """Return the recorded response in replay mode, None otherwise."""
+        if self.transcript_mode != "replay" or self.transcript is None:
+            return None
+        key = transcript_key or "unkeyed"
+        seq = self.transcript.next_seq(key)
+        rec = self.transcript.load(key, seq)
+        if rec.get("request", {}).get("messages") != request.get("messages"):
+            print(f"[llm] replay {key}#{seq}: prompt differs from recording, serving recorded response")
+        self._note_usage(rec.get("usage") or {})
+        return str(rec.get("response") or "")
+
+    def _record(
+        self,
+        transcript_key: Optional[str],
+        request: Dict[str, Any],
+        response: str,
+        started: float,
+        usage: Optional[Dict[str, int]] = None,
+    ) -> None:
+        if self.transcript_mode != "record" or self.transcript is None:
+            return
+        key = transcript_key or "unkeyed"
+        seq = self.transcript.next_seq(key)
+        self.transcript.save(
+            key,
+            seq,
+            request=request,
+            response=response,
+            elapsed_s=time.monotonic() - started,
+            usage=usage,
+        )
+
+    @staticmethod
+    def _request_record(
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int],
+        kwargs: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        return {
+            "messages": messages,
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "kwargs": kwargs,
+        }
+
     # ---------- sync API ----------
 
     @staticmethod
@@ -87,6 +334,7 @@ class IFlowClient:
         temperature: float = 0.7,
         max_tokens: Optional[int] = 16384,
         stream: bool = False,
+        transcript_key: Optional[str] = None,
         **kwargs: Any,
     ) -> Union[str, Iterator[str]]:
         """
@@ -99,6 +347,7 @@ class IFlowClient:
             temperature: Temperature parameter, controls output randomness
             max_tokens: Maximum output token count
             stream: Whether to use streaming output
+            transcript_key: Record/replay slot for this call, e.g. transcript_key(case, round)
             **kwargs: Other parameters passed to API
 
         Returns:
@@ -106,37 +355,58 @@ class IFlowClient:
             - If stream=True: returns an iterator of text chunks (str).
         """
         messages = self._normalize_messages(messages)
+        request = self._request_record(messages, model, temperature, max_tokens, kwargs)
+        self._local.usage = {}
+        replayed = self._replay(transcript_key, request)
+        if replayed is not None:
+            return iter([replayed]) if stream else replayed
+        started = time.monotonic()
 
         if not stream:
-            # Non-streaming: normal one-shot completion
-            response = self.sync_client.chat.completions.create(
+            # Non-streaming: normal one-shot completion (hedged if a policy is set)
+            def _call() -> Any:
+                return self._with_failover(
+                    lambda client: client.chat.completions.create(
+                        messages=messages,
+                        model=model,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        stream=False,
+                        **kwargs,
+                    )
+                )
+
+            response = self.hedge.run(_call, self._note_abandoned) if self.hedge is not None else _call()
+            if response and response.choices and len(response.choices) > 0:
+                text = response.choices[0].message.content or ""
+                usage = self._extract_usage(response)
+                self._note_usage(usage)
+                self._record(transcript_key, request, text, started, usage)
+                return text
+            raise RuntimeError("Invalid response from API: no choices returned")
+
+        # Streaming mode: return an iterator of incremental chunks
+        # (failover covers opening the stream, not errors part-way through it)
+        stream_resp = self._with_failover(
+            lambda client: client.chat.completions.create(
                 messages=messages,
                 model=model,
                 temperature=temperature,
                 max_tokens=max_tokens,
-                stream=False,
+                stream=True,
                 **kwargs,
             )
-            if response and response.choices and len(response.choices) > 0:
-                return response.choices[0].message.content or ""
-            raise RuntimeError("Invalid response from API: no choices returned")
-
-        # Streaming mode: return an iterator of incremental chunks
-        stream_resp = self.sync_client.chat.completions.create(
-            messages=messages,
-            model=model,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            stream=True,
-            **kwargs,
         )
 
         def _iter_text() -> Iterator[str]:
+            pieces: List[str] = []
             for chunk in stream_resp:
                 content = self._extract_content_from_chunk(chunk)
                 if content:
+                    pieces.append(content)
                     # Yield incremental piece of text
                     yield content
+            self._record(transcript_key, request, "".join(pieces), started)
 
         return _iter_text()
 
@@ -149,6 +419,7 @@ class IFlowClient:
         temperature: float = 0.7,
         max_tokens: Optional[int] = 1000,
         stream: bool = False,
+        transcript_key: Optional[str] = None,
         **kwargs: Any,
     ) -> Union[str, AsyncIterator[str]]:
         """
@@ -160,6 +431,7 @@ class IFlowClient:
             temperature: Temperature parameter
             max_tokens: Maximum output token count
             stream: Whether to use streaming output
+            transcript_key: Record/replay slot for this call
             **kwargs: Other parameters passed to API
 
         Returns:
@@ -167,36 +439,62 @@ class IFlowClient:
             - If stream=True: returns an async iterator of text chunks (str).
         """
         messages = self._normalize_messages(messages)
+        request = self._request_record(messages, model, temperature, max_tokens, kwargs)
+        self._local.usage = {}
+        replayed = self._replay(transcript_key, request)
+        if replayed is not None:
+            if not stream:
+                return replayed
+
+            async def _aiter_replayed() -> AsyncIterator[str]:
+                yield replayed
+
+            return _aiter_replayed()
+        started = time.monotonic()
 
         if not stream:
             # Non-streaming async call
-            response = await self.async_client.chat.completions.create(
+            def _acall() -> Awaitable[Any]:
+                return self._awith_failover(
+                    lambda client: client.chat.completions.create(
+                        messages=messages,
+                        model=model,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        stream=False,
+                        **kwargs,
+                    )
+                )
+
+            response = await (self.hedge.arun(_acall) if self.hedge is not None else _acall())
+            if response and response.choices and len(response.choices) > 0:
+                text = response.choices[0].message.content or ""
+                usage = self._extract_usage(response)
+                self._note_usage(usage)
+                self._record(transcript_key, request, text, started, usage)
+                return text
+            raise RuntimeError("Invalid response from API: no choices returned")
+
+        # Streaming async call: first create the stream, then async-iterate
+        stream_resp = await self._awith_failover(
+            lambda client: client.chat.completions.create(
                 messages=messages,
                 model=model,
                 temperature=temperature,
                 max_tokens=max_tokens,
-                stream=False,
+                stream=True,
                 **kwargs,
             )
-            if response and response.choices and len(response.choices) > 0:
-                return response.choices[0].message.content or ""
-            raise RuntimeError("Invalid response from API: no choices returned")
-
-        # Streaming async call: first create the stream, then async-iterate
-        stream_resp = await self.async_client.chat.completions.create(
-            messages=messages,
-            model=model,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            stream=True,
-            **kwargs,
         )
 
         async def _aiter_text() -> AsyncIterator[str]:
+            pieces: List[str] = []
             async for chunk in stream_resp:
                 content = self._extract_content_from_chunk(chunk)
                 if content:
+                    pieces.append(content)
                     yield content
+            self._record(transcript_key, request, "".join(pieces), started)
 
         return _aiter_text()
 
@@ -0,0 +1,79 @@
+"""
+LLM transcript store for record/replay runs.
+
+Layout under the transcript root:
+    <case>/round<NN>_<seq>.json   # {"key", "seq", "request", "response", "elapsed_s", "usage"}
+A key is "<case>/round<NN>" (see transcript_key); seq counts calls made under
+the same key in one process, so a retry within a round gets its own slot.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+MODES = ("live", "record", "replay")
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def transcript_key(case: Optional[str], round_no: Optional[int]) -> str:
+    case_part = _UNSAFE.sub("_", case or "unkeyed")
+    return f"{case_part}/round{int(round_no or 0):02d}"
+
+
+class TranscriptStore:
+    def __init__(self, root: str | Path):
+        self.root = Path(root).expanduser().resolve()
+        self._seq: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def next_seq(self, key: str) -> int:
+        with self._lock:
+            n = self._seq.get(key, 0)
+            self._seq[key] = n + 1
+            return n
+
+    def path_for(self, key: str, seq: int) -> Path:
+        return self.root / f"{key}_{seq}.json"
+
+    def save(
+        self,
+        key: str,
+        seq: int,
+        *,
+        request: Dict[str, Any],
+        response: str,
+        elapsed_s: float,
+        usage: Optional[Dict[str, int]] = None,
+    ) -> Path:
+        path = self.path_for(key, seq)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".tmp{os.getpid()}")
+        tmp.write_text(
+            json.dumps(
+                {
+                    "key": key,
+                    "seq": seq,
+                    "request": request,
+                    "response": response,
+                    "elapsed_s": elapsed_s,
+                    "usage": usage or {},
+                },
+                ensure_ascii=False,
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+        tmp.replace(path)
+        return path
+
+    def load(self, key: str, seq: int) -> Dict[str, Any]:
+        path = self.path_for(key, seq)
+        if not path.exists():
+            raise KeyError(f"No recorded LLM response for {key} (call #{seq}) under {self.root}")
+        return json.loads(path.read_text(encoding="utf-8"))
@@ -0,0 +1,280 @@
+"""
+Dataset manifest: case -> prompt/ref/test files, sizes, content hashes and
+the RefModule port list, built from a single listing of the dataset root.
+
+The manifest is cached as JSON next to problems.txt (<problems>.manifest.json)
+and reused while the dataset directory and problems file keep their mtimes;
+otherwise it is rebuilt, re-hashing only files whose size/mtime changed.
+Files edited in place do not touch the directory mtime, so resolve() also
+stats the three files of the case it returns and re-hashes them on change.
+If the dataset mount is read-only the manifest is only kept in memory.
+
+Hashes are full sha256 hex digests of the file bytes, usable as stable cache
+keys for whatever was evaluated against a case.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.rtl_context import strip_rtl
+
+VERSION = 1
+
+# Same names (and preference order) the per-case probing used to try.
+_PATTERNS: Dict[str, Tuple[str, ...]] = {
+    "prompt": ("{case}_prompt", "{case}_prompt.txt"),
+    "ref": ("{case}_ref.sv", "{case}_ref.v", "{case}_ref"),
+    "test": ("{case}_test.sv", "{case}_test.v", "{case}_test"),
+}
+
+_DECL = re.compile(
+    r"^(input|output|inout)\b\s*(?:(?:wire|reg|logic|var)\b\s*)?(signed\b\s*)?(\[[^\]]*\])?\s*(.*)$",
+    re.DOTALL,
+)
+_IDENT = re.compile(r"[A-Za-z_][A-Za-z0-9_$]*")
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _range_width(rng: Optional[str]) -> Optional[int]:
+    if not rng:
+        return 1
+    m = re.fullmatch(r"\[\s*(\d+)\s*:\s*(\d+)\s*\]", rng)
+    return abs(int(m.group(1)) - int(m.group(2))) + 1 if m else None
+
+
+def module_ports(text: str, module: str = "RefModule") -> List[Dict[str, Any]]:
+    """
+    Port list of `module` as [{"name", "direction", "range", "width"}], in header order.
+
+    Handles ANSI headers (`input [3:0] a, b`) and non-ANSI ones with the
+    directions declared in the body. `width` is None for parameterized ranges.
+    """
+    src = strip_rtl(text, "comments")
+    m = re.search(rf"\bmodule\s+{re.escape(module)}\b\s*(#\s*\((?:[^()]|\([^()]*\))*\)\s*)?\(", src)
+    if not m:
+        return []
+    depth, i = 1, m.end()
+    while i < len(src) and depth:
+        depth += {"(": 1, ")": -1}.get(src[i], 0)
+        i += 1
+    header = src[m.end() : i - 1]
+    end = src.find("endmodule", i)
+    body = src[i : end if end >= 0 else len(src)]
+
+    ports: List[Dict[str, Any]] = []
+    direction: Optional[str] = None
+    rng: Optional[str] = None
+    for item in header.split(","):
+        item = " ".join(item.split())
+        if not item:
+            continue
+        d = _DECL.match(item)
+        if d:
+            direction, rng, item = d.group(1), d.group(3), d.group(4)
+        names = _IDENT.findall(item.split("=")[0])
+        if names:
+            ports.append({"name": names[-1], "direction": direction, "range": rng})
+
+    if any(p["direction"] is None for p in ports):
+        declared: Dict[str, Tuple[str, Optional[str]]] = {}
+        for stmt in body.split(";"):
+            d = _DECL.match(" ".join(stmt.split()))
+            if d:
+                for name in d.group(4).split(","):
+                    ids = _IDENT.findall(name.split("=")[0])
+                    if ids:
+                        declared[ids[-1]] = (d.group(1), d.group(3))
+        for p in ports:
+            if p["direction"] is None and p["name"] in declared:
+                p["direction"], p["range"] = declared[p["name"]]
+
+    for p in ports:
+        p["width"] = _range_width(p["range"])
+    return ports
+
+
+def manifest_path(problems_path: Path) -> Path:
+    return problems_path.with_name(problems_path.stem + ".manifest.json")
+
+
+class DatasetManifest:
+    def __init__(self, dataset_root: Path, problems_path: Path, *, path: Optional[Path] = None):
+        self.dataset_root = Path(dataset_root)
+        self.problems_path = Path(problems_path)
+        self.path = Path(path) if path is not None else manifest_path(self.problems_path)
+        self.cases: List[str] = []
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._stamp: Dict[str, Any] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    # ------------------------- build / load -------------------------
+
+    def _current_stamp(self) -> Dict[str, Any]:
+        return {
+            "version": VERSION,
+            "dataset_root": str(self.dataset_root),
+            "dataset_mtime_ns": os.stat(self.dataset_root).st_mtime_ns,
+            "problems_mtime_ns": os.stat(self.problems_path).st_mtime_ns,
+        }
+
+    def load(self) -> "DatasetManifest":
+        """Use the cached manifest if still current, else (re)build and save it."""
+        stamp = self._current_stamp()
+        cached: Dict[str, Any] = {}
+        try:
+            cached = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            pass
+        if cached and {k: cached.get(k) for k in stamp} == stamp:
+            self.cases = list(cached.get("cases") or [])
+            self.entries = dict(cached.get("entries") or {})
+            self._stamp = stamp
+            print(f"[manifest] {len(self.cases)} case(s) from {self.path}")
+            return self
+        self.build(stamp, previous=cached.get("entries") or {} if cached.get("version") == VERSION else {})
+        self.save()
+        return self
+
+    def build(self, stamp: Optional[Dict[str, Any]] = None, *, previous: Optional[Dict[str, Any]] = None) -> None:
+        self._stamp = stamp or self._current_stamp()
+        self.cases = [ln.strip() for ln in self.problems_path.read_text(encoding="utf-8").splitlines() if ln.strip()]
+        with os.scandir(self.dataset_root) as it:
+            names = {e.name for e in it if e.is_file()}
+        previous = previous or {}
+        rehashed = 0
+        entries: Dict[str, Dict[str, Any]] = {}
+        for case in self.cases:
+            prev = previous.get(case) or {}
+            entry: Dict[str, Any] = {}
+            for kind, patterns in _PATTERNS.items():
+                name = next((p.format(case=case) for p in patterns if p.format(case=case) in names), None)
+                if name is None:
+                    continue
+                old = prev.get(kind) or {}
+                info, changed = self._file_info(name, old if old.get("name") == name else None)
+                entry[kind] = info
+                rehashed += int(changed)
+                if kind == "ref":
+                    entry["ports"] = self._ports(name) if changed or "ports" not in prev else prev["ports"]
+            entries[case] = entry
+        self.entries = entries
+        self._dirty = True
+        print(f"[manifest] indexed {len(self.cases)} case(s) under {self.dataset_root} ({rehashed} file(s) hashed)")
+
+    def _file_info(self, name: str, old: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], bool]:
+        st = os.stat(self.dataset_root / name)
+        if old and old.get("size") == st.st_size and old.get("mtime_ns") == st.st_mtime_ns:
+            return old, False
+        return {
+            "name": name,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha256": file_sha256(self.dataset_root / name),
+        }, True
+
+    def _ports(self, ref_name: str) -> List[Dict[str, Any]]:
+        try:
+            return module_ports((self.dataset_root / ref_name).read_text(encoding="utf-8", errors="replace"))
+        except OSError:
+            return []
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {**self._stamp, "cases": self.cases, "entries": self.entries}
+            tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            try:
+                tmp.write_text(json.dumps(payload, indent=1), encoding="utf-8")
+                os.replace(tmp, self.path)
+                if self.path.parent.resolve() == self.dataset_root.resolve():
+                    # Creating the manifest changed the directory mtime it is stamped with; an
+                    # in-place rewrite of the existing file does not.
+                    self._stamp["dataset_mtime_ns"] = payload["dataset_mtime_ns"] = os.stat(self.dataset_root).st_mtime_ns
+                    self.path.write_text(json.dumps(payload, indent=1), encoding="utf-8")
+                self._dirty = False
+            except OSError as e:
+                print(f"[manifest] could not write {self.path} ({e}); keeping the index in memory only")
+                tmp.unlink(missing_ok=True)
+
+    # ------------------------- lookups -------------------------
+
+    def entry(self, case: str) -> Dict[str, Any]:
+        return self.entries.get(case) or {}
+
+    def resolve(self, case: str) -> Tuple[Path, Path, Path]:
+        """(prompt, ref, test) paths of a case; the three files are re-checked by size/mtime."""
+        entry = self.entry(case)
+        missing = [kind for kind in _PATTERNS if kind not in entry]
+        if missing:
+            raise FileNotFoundError(f"Case {case}: missing files: {', '.join(missing)}")
+        with self._lock:
+            for kind in _PATTERNS:
+                try:
+                    info, changed = self._file_info(entry[kind]["name"], entry[kind])
+                except FileNotFoundError:
+                    raise FileNotFoundError(f"Case {case}: {entry[kind]['name']} disappeared since the manifest was built")
+                if changed:
+                    entry[kind] = info
+                    if kind == "ref":
+                        entry["ports"] = self._ports(info["name"])
+                    self._dirty = True
+        return tuple(self.dataset_root / entry[kind]["name"] for kind in _PATTERNS)  # type: ignore[return-value]
+
+    def size(self, case: str) -> int:
+        """prompt + test bytes (the scheduler's size heuristic), without touching the files."""
+        entry = self.entry(case)
+        return sum(int((entry.get(kind) or {}).get("size") or 0) for kind in ("prompt", "test"))
+
+    def hashes(self, case: str) -> Dict[str, str]:
+        entry = self.entry(case)
+        return {kind: entry[kind]["sha256"] for kind in _PATTERNS if kind in entry}
+
+    def ports(self, case: str) -> List[Dict[str, Any]]:
+        return list(self.entry(case).get("ports") or [])
+
+
+def load_manifest(dataset_root: Path, problems_path: Path, *, path: Optional[Path] = None) -> DatasetManifest:
+    return DatasetManifest(dataset_root, problems_path, path=path).load()
+
+
+def _format_ports(ports: Iterable[Dict[str, Any]]) -> str:
+    return ", ".join(f"{p['direction'] or '?'} {p['range'] + ' ' if p['range'] else ''}{p['name']}" for p in ports)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build (or refresh) the dataset manifest and print it.")
+    parser.add_argument("dataset_root")
+    parser.add_argument("--problems", default=None, help="problems.txt (default: <dataset_root>/problems.txt)")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the cached manifest.")
+    args = parser.parse_args()
+
+    root = Path(args.dataset_root).expanduser().resolve()
+    problems = Path(args.problems).expanduser().resolve() if args.problems else root / "problems.txt"
+    man = DatasetManifest(root, problems)
+    if args.rebuild:
+        man.build()
+        man.save()
+    else:
+        man.load()
+    for c in man.cases:
+        e = man.entry(c)
+        files = " ".join(f"{k}={e[k]['sha256'][:12]}" if k in e else f"{k}=MISSING" for k in _PATTERNS)
+        print(f"{c}: {files} ports=({_format_ports(man.ports(c))})")
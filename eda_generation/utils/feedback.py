@@ -0,0 +1,304 @@
+"""
+Compact records for the per-case shared state.
+
+review_feedback / verify_feedback and their issue and failed-case entries used
+to be plain dicts holding whole log tails; with many flows in one process
+(--jobs, --pipeline, queue workers) that adds up. The records here keep the
+same read interface (fb.get("issues"), it["message"], "passed" in fb) on
+__slots__ storage, clip free-text fields, and intern the strings that repeat
+across entries (severity, file).
+
+Large text goes to the content-addressed blob store the candidates already
+use (utils/candidates.py): a LogTail keeps only its last lines in memory and
+reads the rest back on demand, and Blob stands in for the raw LLM output.
+Identical logs of different rounds share one blob. Feedback kept per round
+for rollback (shared["candidate_feedback"]) is stashed there as JSON and only
+read back when a round is actually restored.
+
+json.dumps(..., default=jsonable) serializes any of them.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from utils.candidates import CandidateStore
+
+MAX_MESSAGE_CHARS = 2000
+MAX_LINE_CHARS = 400
+MAX_CONTEXT_LINES = 16
+TAIL_LINES_IN_MEMORY = 40
+SPILL_CHARS = 4096  # text longer than this goes to the blob store
+
+_UNSET: Any = object()
+
+
+def clip(text: Any, limit: int) -> str:
+    s = "" if text is None else str(text)
+    if len(s) <= limit:
+        return s
+    return s[:limit] + f" ...[{len(s) - limit} more chars]"
+
+
+def _intern(text: Any) -> str:
+    return sys.intern("" if text is None else str(text))
+
+
+class Record(Mapping):
+    """Read-only-looking Mapping over the subclass's __slots__; unset slots are absent keys."""
+
+    __slots__ = ()
+
+    def __init__(self, **fields: Any):
+        for key, value in fields.items():
+            self[key] = value
+
+    def _normalize(self, key: str, value: Any) -> Any:
+        return value
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.__slots__:
+            value = getattr(self, key, _UNSET)
+            if value is not _UNSET:
+                return value
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in self.__slots__:
+            raise KeyError(f"{type(self).__name__} has no field {key!r}")
+        setattr(self, key, self._normalize(key, value))
+
+    def __iter__(self) -> Iterator[str]:
+        return (k for k in self.__slots__ if getattr(self, k, _UNSET) is not _UNSET)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: jsonable(v) for k, v in self.items()}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Issue(Record):
+    """One lint issue or compile error: severity, file, line, message, rule_id, context lines."""
+
+    __slots__ = ("severity", "file", "line", "message", "rule_id", "context")
+
+    def __init__(
+        self,
+        *,
+        severity: str = "Error",
+        file: str = "",
+        line: Optional[int] = None,
+        message: str = "",
+        rule_id: Optional[str] = None,
+        context: Iterable[str] = (),
+    ):
+        super().__init__(severity=severity, file=file, line=line, message=message, rule_id=rule_id, context=context)
+
+    def _normalize(self, key: str, value: Any) -> Any:
+        if key in ("severity", "file"):
+            return _intern(value)
+        if key == "message":
+            return clip(value, MAX_MESSAGE_CHARS)
+        if key == "context":
+            return tuple(clip(c, MAX_LINE_CHARS) for c in list(value or ())[:MAX_CONTEXT_LINES])
+        return value
+
+
+class FailedCase(Record):
+    """One failing test case / sample reported by the simulation."""
+
+    __slots__ = ("case", "message", "signals", "expected_behavior", "raw")
+
+    def __init__(
+        self,
+        *,
+        case: Optional[str] = None,
+        message: str = "",
+        signals: Iterable[str] = (),
+        expected_behavior: Optional[str] = None,
+        raw: str = "",
+    ):
+        super().__init__(case=case, message=message, signals=signals, expected_behavior=expected_behavior, raw=raw)
+
+    def _normalize(self, key: str, value: Any) -> Any:
+        if key == "raw" and value == getattr(self, "message", None):
+            return self.message
+        if key in ("message", "raw"):
+            return clip(value, MAX_LINE_CHARS)
+        if key == "expected_behavior" and value is not None:
+            return clip(value, MAX_LINE_CHARS)
+        if key == "signals":
+            return tuple(_intern(s) for s in value or ())
+        return value
+
+
+class Feedback(Record):
+    """shared["review_feedback"] / shared["verify_feedback"]; fields a stage does not report are absent."""
+
+    __slots__ = (
+        "phase",
+        "tool",
+        "passed",
+        "skipped",
+        "reason",
+        "compile_passed",
+        "issues",
+        "compile_errors",
+        "failed_cases",
+        "mismatch_summary",
+        "first_divergence",
+        "artifacts",
+        "raw_log_tail",
+    )
+
+    def _normalize(self, key: str, value: Any) -> Any:
+        if key in ("phase", "tool"):
+            return _intern(value)
+        if key in ("issues", "compile_errors"):
+            return tuple(v if isinstance(v, Issue) else Issue(**v) for v in value or ())
+        if key == "failed_cases":
+            return tuple(v if isinstance(v, FailedCase) else FailedCase(**v) for v in value or ())
+        if key == "raw_log_tail" and isinstance(value, Mapping):
+            return LogTail.restore(value)
+        if key == "raw_log_tail" and not isinstance(value, LogTail):
+            return LogTail(list(value or ()))
+        return value
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "Feedback":
+        return cls(**{k: v for k, v in data.items() if k in cls.__slots__})
+
+
+class Blob:
+    """Reference to text kept in the blob store; str(blob) reads it back."""
+
+    __slots__ = ("path", "chars")
+
+    def __init__(self, path: Path, chars: int):
+        self.path = Path(path)
+        self.chars = chars
+
+    def text(self) -> str:
+        return self.path.read_text(encoding="utf-8")
+
+    def __str__(self) -> str:
+        return self.text()
+
+    def __len__(self) -> int:
+        return self.chars
+
+    def __repr__(self) -> str:
+        return f"Blob({str(self.path)!r}, chars={self.chars})"
+
+
+def spill(text: str, store: Optional[CandidateStore], suffix: str = ".txt") -> str | Blob:
+    """`text` itself if short (or no store), else a Blob in `store`."""
+    if store is None or len(text) <= SPILL_CHARS:
+        return text
+    return Blob(store.path(store.put(text, suffix)), len(text))
+
+
+def blob_text(value: Any) -> str:
+    return "" if value is None else str(value)
+
+
+class LogTail(Sequence):
+    """
+    The last lines of a tool log. Only the last `keep` lines stay in memory;
+    the whole tail is spilled to the blob store and read back when an index
+    or slice reaches further (e.g. scanning all of it for Hint: lines).
+    """
+
+    __slots__ = ("total", "blob", "_recent")
+
+    def __init__(self, lines: List[str], *, store: Optional[CandidateStore] = None, keep: int = TAIL_LINES_IN_MEMORY):
+        self.total = len(lines)
+        self.blob: Optional[Path] = None
+        if store is not None and len(lines) > keep and sum(len(s) for s in lines) > SPILL_CHARS:
+            self.blob = store.path(store.put("\n".join(lines), ".log"))
+            lines = lines[-keep:]
+        self._recent = tuple(clip(s, MAX_LINE_CHARS) for s in lines)
+
+    @classmethod
+    def restore(cls, data: Mapping) -> "LogTail":
+        """Inverse of jsonable(log_tail)."""
+        tail = cls(list(data.get("tail") or ()))
+        tail.total = int(data.get("lines") or len(tail._recent))
+        tail.blob = Path(data["blob"]) if data.get("blob") else None
+        return tail
+
+    def lines(self) -> List[str]:
+        if self.blob is None or len(self._recent) == self.total:
+            return list(self._recent)
+        try:
+            return self.blob.read_text(encoding="utf-8").split("\n")[-self.total :]
+        except OSError:
+            return list(self._recent)
+
+    def __len__(self) -> int:
+        return self.total
+
+    def __getitem__(self, index: Any) -> Any:
+        first_recent = self.total - len(self._recent)
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.total)
+            if step > 0 and (start >= first_recent or start >= stop):
+                return [self._recent[i - first_recent] for i in range(start, stop, step)]
+            return self.lines()[index]
+        i = index + self.total if index < 0 else index
+        if not 0 <= i < self.total:
+            raise IndexError(index)
+        return self._recent[i - first_recent] if i >= first_recent else self.lines()[i]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.lines())
+
+    def __repr__(self) -> str:
+        return f"LogTail(lines={self.total}, in_memory={len(self._recent)}, blob={str(self.blob) if self.blob else None!r})"
+
+
+def spill_store(shared: Dict[str, Any]) -> CandidateStore:
+    """The case's blob store: the candidate store if CodeAgent set one, else <project_root>/build/candidates."""
+    root = (shared.get("flow_status") or {}).get("candidate_store")
+    if not root:
+        root = Path(shared.get("project_root") or ".") / "build" / "candidates"
+    return CandidateStore(root)
+
+
+def stash_feedback(store: CandidateStore, **feedback: Any) -> Blob:
+    """Write {"review_feedback": ..., "verify_feedback": ...} to the blob store."""
+    text = json.dumps(feedback, ensure_ascii=False, default=jsonable)
+    return Blob(store.path(store.put(text, ".feedback.json")), len(text))
+
+
+def unstash_feedback(stashed: Any) -> Dict[str, Any]:
+    """Inverse of stash_feedback(); plain dicts (older snapshots) are returned as they are."""
+    if not isinstance(stashed, Blob):
+        return dict(stashed or {})
+    data = json.loads(stashed.text())
+    return {k: Feedback.from_dict(v) if isinstance(v, Mapping) else v for k, v in data.items()}
+
+
+def jsonable(obj: Any) -> Any:
+    """json.dumps default= hook for the records above."""
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    if isinstance(obj, LogTail):
+        return {"lines": obj.total, "tail": list(obj._recent), "blob": str(obj.blob) if obj.blob else None}
+    if isinstance(obj, Blob):
+        return {"blob": str(obj.path), "chars": obj.chars}
+    if isinstance(obj, (tuple, list)):
+        return [jsonable(v) for v in obj]
+    if isinstance(obj, dict):
+        return {k: jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, Path):
+        return str(obj)
+    return obj
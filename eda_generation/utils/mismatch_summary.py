@@ -0,0 +1,138 @@
+"""
+Group simulation mismatches by output signal.
+
+Testbenches report mismatches in a few shapes:
+  - "Hint: Output 'out' has 5 mismatches. First mismatch occurred at time 40."
+  - "Sample 3 mismatch: out expected=1 got=0"
+  - "Mismatch at time 40: out exp 1'b1 got 1'b0" / "out = 0 (expected 1)"
+Instead of one feedback record per line, each signal gets a count, the first and
+last failing position, and a few expected-vs-got examples.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+_HINT_RE = re.compile(
+    r"Output\s+'(?P<sig>\w+)'\s+has\s+(?P<n>\d+)\s+mismatch(?:es)?"
+    r"(?:.*?first\s+mismatch\s+occurred\s+at\s+time\s+(?P<t>\d+))?",
+    re.IGNORECASE,
+)
+_SAMPLE_RE = re.compile(r"\bSample\s+(?P<idx>\d+)\b", re.IGNORECASE)
+_TIME_RE = re.compile(r"(?:\btime\s*[=:]?\s*|@\s*|\bt\s*=\s*)(?P<t>\d+)", re.IGNORECASE)
+_VALUE = r"[\w'.]+"
+_PAIR_RES = [
+    # out expected=1 got=0 / out: exp 1 got 0 / out exp=1, got=0
+    re.compile(
+        rf"\b(?P<sig>[A-Za-z_]\w*)\s*:?\s*(?:expected|exp)\s*[=:]?\s*(?P<exp>{_VALUE})\s*,?\s*(?:but\s+)?got\s*[=:]?\s*(?P<got>{_VALUE})",
+        re.IGNORECASE,
+    ),
+    # out = 0 (expected 1)
+    re.compile(
+        rf"\b(?P<sig>[A-Za-z_]\w*)\s*=\s*(?P<got>{_VALUE})\s*\(\s*(?:expected|exp)\s*[=:]?\s*(?P<exp>{_VALUE})\s*\)",
+        re.IGNORECASE,
+    ),
+]
+_NOT_SIGNALS = {"mismatch", "sample", "time", "value", "output", "at", "but", "and"}
+
+
+def _position(line: str) -> Dict[str, int]:
+    pos: Dict[str, int] = {}
+    m = _SAMPLE_RE.search(line)
+    if m:
+        pos["sample"] = int(m.group("idx"))
+    m = _TIME_RE.search(line)
+    if m:
+        pos["time"] = int(m.group("t"))
+    return pos
+
+
+def _new(sig: str) -> Dict[str, Any]:
+    return {
+        "signal": sig,
+        "count": 0,
+        "reported": None,  # count from the testbench's own per-output hint, if any
+        "first_time": None,
+        "last_time": None,
+        "first_sample": None,
+        "last_sample": None,
+        "examples": [],
+    }
+
+
+def _span(rec: Dict[str, Any], key: str, value: Optional[int]) -> None:
+    if value is None:
+        return
+    first, last = f"first_{key}", f"last_{key}"
+    if rec[first] is None or value < rec[first]:
+        rec[first] = value
+    if rec[last] is None or value > rec[last]:
+        rec[last] = value
+
+
+def summarize_mismatches(lines: Iterable[str], *, examples: int = 3) -> List[Dict[str, Any]]:
+    """Per-signal mismatch groups, most mismatches first."""
+    groups: Dict[str, Dict[str, Any]] = {}
+
+    for line in lines:
+        s = str(line).strip()
+        if not s:
+            continue
+
+        m = _HINT_RE.search(s)
+        if m:
+            rec = groups.setdefault(m.group("sig"), _new(m.group("sig")))
+            rec["reported"] = int(m.group("n"))
+            if m.group("t") is not None:
+                _span(rec, "time", int(m.group("t")))
+            continue
+
+        if "mismatch" not in s.lower() and not re.search(r"\bexp(?:ected)?\b", s, re.IGNORECASE):
+            continue
+
+        pos = _position(s)
+        for pat in _PAIR_RES:
+            for pm in pat.finditer(s):
+                sig = pm.group("sig")
+                if sig.lower() in _NOT_SIGNALS:
+                    continue
+                rec = groups.setdefault(sig, _new(sig))
+                rec["count"] += 1
+                _span(rec, "time", pos.get("time"))
+                _span(rec, "sample", pos.get("sample"))
+                if len(rec["examples"]) < examples:
+                    ex: Dict[str, Any] = {"expected": pm.group("exp"), "got": pm.group("got")}
+                    ex.update(pos)
+                    rec["examples"].append(ex)
+
+    out = []
+    for rec in groups.values():
+        if rec["reported"] is not None:
+            rec["count"] = max(rec["count"], rec["reported"])
+        if rec["count"] > 0:
+            out.append(rec)
+    return sorted(out, key=lambda r: -r["count"])
+
+
+def format_mismatch_summary(groups: List[Dict[str, Any]], *, max_signals: int = 16) -> List[str]:
+    """One compact line per signal, e.g. "out: 5 mismatches, t=40..120, e.g. sample 3 exp=1 got=0"."""
+    lines: List[str] = []
+    for rec in groups[:max_signals]:
+        parts = [f"{rec['signal']}: {rec['count']} mismatches"]
+        first, last = rec.get("first_time"), rec.get("last_time")
+        if first is not None:
+            parts.append(f"t={first}" if first == last else f"t={first}..{last}")
+        first, last = rec.get("first_sample"), rec.get("last_sample")
+        if first is not None:
+            parts.append(f"sample {first}" if first == last else f"samples {first}..{last}")
+        exs = []
+        for ex in rec.get("examples") or []:
+            at = f"sample {ex['sample']} " if "sample" in ex else (f"t={ex['time']} " if "time" in ex else "")
+            exs.append(f"{at}exp={ex['expected']} got={ex['got']}")
+        if exs:
+            parts.append("e.g. " + "; ".join(exs))
+        lines.append(", ".join(parts))
+    if len(groups) > max_signals:
+        lines.append(f"... {len(groups) - max_signals} more signals with mismatches")
+    return lines
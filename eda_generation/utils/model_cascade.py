@@ -0,0 +1,81 @@
+"""
+Model cascade for CodeAgent: a ladder of models from fast/cheap to strong/slow.
+
+Round 1 uses the first model; after every `escalate_after` failed rounds the
+next one is used, and the last model is kept for all remaining rounds. Each
+CodeAgent call is listed in flow_status["llm_rounds"] as {"round", "model",
+"latency_s"}; model_stats() turns that plus the round scores into per-model
+rounds / passed / latency for the case summary, and merge_model_stats() adds
+those up over a sweep.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from utils.progress import round_score
+
+DEFAULT_MODEL = "default"  # the client's own default model (no ladder configured)
+
+
+def model_for_round(ladder: Sequence[str], round_no: int, escalate_after: int = 1) -> Optional[str]:
+    if not ladder:
+        return None
+    step = max(1, int(escalate_after))
+    return ladder[min((max(1, round_no) - 1) // step, len(ladder) - 1)]
+
+
+def parse_ladder(text: str) -> Tuple[str, ...]:
+    return tuple(m.strip() for m in (text or "").split(",") if m.strip())
+
+
+def model_stats(flow_status: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Per model: rounds generated, rounds whose candidate passed every check, LLM seconds."""
+    passed_rounds = {
+        rec.get("round")
+        for rec in flow_status.get("progress") or []
+        if round_score(rec) == (0.0, 0.0, 0.0)
+    }
+    out: Dict[str, Dict[str, Any]] = {}
+    for rec in flow_status.get("llm_rounds") or []:
+        st = out.setdefault(rec.get("model") or DEFAULT_MODEL, {"rounds": 0, "passed": 0, "latency_s": 0.0})
+        st["rounds"] += 1
+        st["passed"] += int(rec.get("round") in passed_rounds)
+        st["latency_s"] = round(st["latency_s"] + float(rec.get("latency_s") or 0.0), 3)
+    return out
+
+
+def solved_by(flow_status: Dict[str, Any]) -> Optional[str]:
+    """Model of the first round whose candidate passed, if any."""
+    round_models = {rec.get("round"): rec.get("model") or DEFAULT_MODEL for rec in flow_status.get("llm_rounds") or []}
+    for rec in flow_status.get("progress") or []:
+        if round_score(rec) == (0.0, 0.0, 0.0) and rec.get("round") in round_models:
+            return round_models[rec.get("round")]
+    return None
+
+
+def merge_model_stats(summaries: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    total: Dict[str, Dict[str, Any]] = {}
+    for s in summaries:
+        for model, st in (s.get("llm_models") or {}).items():
+            t = total.setdefault(model, {"rounds": 0, "passed": 0, "latency_s": 0.0, "cases_solved": 0})
+            t["rounds"] += int(st.get("rounds") or 0)
+            t["passed"] += int(st.get("passed") or 0)
+            t["latency_s"] += float(st.get("latency_s") or 0.0)
+        if s.get("solved_by"):
+            t = total.setdefault(s["solved_by"], {"rounds": 0, "passed": 0, "latency_s": 0.0, "cases_solved": 0})
+            t["cases_solved"] += 1
+    return total
+
+
+def format_model_report(total: Dict[str, Dict[str, Any]], ladder: Sequence[str] = ()) -> List[str]:
+    order = [m for m in ladder if m in total] + sorted(m for m in total if m not in ladder)
+    lines = [f"{'model':<28}{'rounds':>8}{'passed':>8}{'pass_rate':>11}{'mean_s':>9}{'solved':>8}"]
+    for m in order:
+        t = total[m]
+        n = t["rounds"]
+        lines.append(
+            f"{m:<28}{n:>8}{t['passed']:>8}{(t['passed'] / n if n else 0.0):>11.2%}"
+            f"{(t['latency_s'] / n if n else 0.0):>9.2f}{t['cases_solved']:>8}"
+        )
+    return lines
@@ -0,0 +1,75 @@
+"""
+Helpers for observing PocketFlow nodes without changing their code.
+
+PocketFlow copies each node (shallow) before running it, so wrapping the
+prep/exec/post attributes on the original node instances is enough for every
+round of the flow to go through the wrapper.
+"""
+
+from __future__ import annotations
+
+import functools
+from contextlib import AbstractContextManager
+from typing import Any, Callable, Iterator, Set
+
+from pocketflow import BaseNode, Flow
+
+PHASES = ("prep", "exec", "post")
+
+# factory(node_name, phase) -> context manager entered around that phase call
+PhaseWrapper = Callable[[str, str], AbstractContextManager]
+
+
+def iter_flow_nodes(flow: Flow) -> Iterator[BaseNode]:
+    """
+    Yield every node reachable from flow.start_node exactly once, including nodes
+    a composite node runs itself (its `inner_nodes`, e.g. ParallelCheckNode).
+    """
+    seen: Set[int] = set()
+    stack = [flow.start_node] if flow.start_node is not None else []
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        yield node
+        stack.extend(reversed(list(node.successors.values())))
+        stack.extend(reversed(list(getattr(node, "inner_nodes", ()))))
+
+
+def node_name(node: BaseNode) -> str:
+    """Short stage name used in reports, e.g. CodeAgentNode -> code_agent."""
+    name = type(node).__name__
+    if name.endswith("Node"):
+        name = name[: -len("Node")]
+    out = []
+    for i, ch in enumerate(name):
+        if ch.isupper() and i > 0:
+            out.append("_")
+        out.append(ch.lower())
+    return "".join(out)
+
+
+def wrap_node_phases(flow: Flow, wrapper: PhaseWrapper) -> Flow:
+    """Run every node's prep/exec/post inside `wrapper(node_name, phase)`."""
+    for node in iter_flow_nodes(flow):
+        wrap_phases(node, wrapper)
+    return flow
+
+
+def wrap_phases(node: BaseNode, wrapper: PhaseWrapper) -> BaseNode:
+    """Same as wrap_node_phases for a single node (e.g. one driven directly by a step script)."""
+    name = node_name(node)
+    for phase in PHASES:
+        original = getattr(node, phase)
+        setattr(node, phase, _wrapped(original, name, phase, wrapper))
+    return node
+
+
+def _wrapped(fn: Callable[..., Any], name: str, phase: str, wrapper: PhaseWrapper) -> Callable[..., Any]:
+    @functools.wraps(fn)
+    def _call(*args: Any, **kwargs: Any) -> Any:
+        with wrapper(name, phase):
+            return fn(*args, **kwargs)
+
+    return _call
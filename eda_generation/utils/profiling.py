@@ -0,0 +1,175 @@
+"""
+Per-node profiling of flow runs (--profile).
+
+Every node phase (prep/exec/post) runs under cProfile, with tracemalloc for
+memory. Profiles accumulate per (case, stage) across rounds; finish_case()
+writes <out_dir>/<case>/<stage>.prof (open with pstats or snakeviz) and
+<out_dir>/<case>/phases.json (calls, wall seconds, net allocated KB and peak KB
+per stage.phase). report() merges all .prof files into
+<out_dir>/profile_top.txt: top-N by cumulative time overall and by own time
+per stage.
+
+Only one profiler can be active per process (CPython 3.12+ enforces it), so
+while one phase is being profiled, phases that start concurrently in other
+threads (--jobs, --pipeline, --parallel-checks) are only timed and counted as
+"unprofiled" (on 3.12+ the profiled phase may in turn pick up calls made by
+other threads). Use a single job for clean, complete profiles.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import contextlib
+import functools
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from pocketflow import BaseNode, Flow
+
+from utils.node_hooks import wrap_node_phases, wrap_phases
+
+
+class NodeProfiler:
+    def __init__(self, out_dir: str | Path, *, top_n: int = 30, memory: bool = True):
+        self.out_dir = Path(out_dir).expanduser()
+        self.top_n = top_n
+        self.memory = memory
+        self._profile_lock = threading.Lock()  # held while a cProfile.Profile is enabled
+        self._lock = threading.Lock()
+        self._profiles: Dict[Tuple[str, str], cProfile.Profile] = {}
+        self._phases: Dict[str, Dict[str, Dict[str, float]]] = {}
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    # ------------------------- instrumentation -------------------------
+
+    def hook(self, case: str, then: Optional[Callable[[Flow], Any]] = None) -> Callable[[Flow], Flow]:
+        """flow_hook for run_case; `then` is applied after, i.e. around the profiled phases."""
+
+        def _hook(flow: Flow) -> Flow:
+            self.attach(flow, case=case)
+            if then is not None:
+                then(flow)
+            return flow
+
+        return _hook
+
+    def attach(self, flow: Flow, *, case: str) -> Flow:
+        return wrap_node_phases(flow, functools.partial(self._phase, case))
+
+    def attach_node(self, node: BaseNode, *, case: str) -> BaseNode:
+        return wrap_phases(node, functools.partial(self._phase, case))
+
+    @contextlib.contextmanager
+    def _phase(self, case: str, stage: str, phase: str) -> Iterator[None]:
+        with self._lock:
+            prof = self._profiles.setdefault((case, stage), cProfile.Profile())
+        owned = self._profile_lock.acquire(blocking=False)
+        if owned:
+            try:
+                prof.enable()
+            except ValueError:  # another profiler (e.g. an outer cProfile run) is active
+                self._profile_lock.release()
+                owned = False
+        mem0 = tracemalloc.get_traced_memory()[0] if self.memory else 0
+        if owned and self.memory:
+            tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            cur, peak = tracemalloc.get_traced_memory() if self.memory else (0, 0)
+            if owned:
+                prof.disable()
+                self._profile_lock.release()
+            with self._lock:
+                st = self._phases.setdefault(case, {}).setdefault(
+                    f"{stage}.{phase}",
+                    {"calls": 0, "seconds": 0.0, "alloc_net_kb": 0.0, "peak_kb": 0.0, "unprofiled": 0},
+                )
+                st["calls"] += 1
+                st["seconds"] += dt
+                st["alloc_net_kb"] += (cur - mem0) / 1024
+                if owned:
+                    st["peak_kb"] = max(st["peak_kb"], (peak - mem0) / 1024)
+                else:
+                    st["unprofiled"] += 1
+
+    # ------------------------- output -------------------------
+
+    def finish_case(self, case: str) -> None:
+        """Write this case's profiles and phase stats, and drop them from memory."""
+        with self._lock:
+            profiles = {stage: p for (c, stage), p in self._profiles.items() if c == case}
+            for stage in profiles:
+                del self._profiles[(case, stage)]
+            phases = self._phases.pop(case, {})
+        case_dir = self.out_dir / case
+        case_dir.mkdir(parents=True, exist_ok=True)
+        for stage, prof in profiles.items():
+            prof.create_stats()
+            if prof.stats:  # empty when every phase of the stage ran unprofiled
+                prof.dump_stats(str(case_dir / f"{stage}.prof"))
+        rounded = {k: {m: round(v, 3) for m, v in st.items()} for k, st in phases.items()}
+        (case_dir / "phases.json").write_text(json.dumps(rounded, indent=2), encoding="utf-8")
+
+    def report(self) -> Optional[Path]:
+        """Merge every case's profiles into profile_top.txt and print the per-phase totals."""
+        with self._lock:
+            pending = sorted({c for c, _ in self._profiles} | set(self._phases))
+        for case in pending:
+            self.finish_case(case)
+
+        by_stage: Dict[str, List[str]] = {}
+        for f in sorted(self.out_dir.glob("*/*.prof")):
+            by_stage.setdefault(f.stem, []).append(str(f))
+        if not by_stage:
+            print(f"[profile] no profiles under {self.out_dir}")
+            return None
+
+        totals: Dict[str, Dict[str, float]] = {}
+        for f in self.out_dir.glob("*/phases.json"):
+            try:
+                data = json.loads(f.read_text(encoding="utf-8"))
+            except ValueError:
+                continue
+            for key, st in data.items():
+                t = totals.setdefault(key, {"calls": 0, "seconds": 0.0, "alloc_net_kb": 0.0, "peak_kb": 0.0, "unprofiled": 0})
+                for m in ("calls", "seconds", "alloc_net_kb", "unprofiled"):
+                    t[m] += st.get(m, 0)
+                t["peak_kb"] = max(t["peak_kb"], st.get("peak_kb", 0))
+
+        out = self.out_dir / "profile_top.txt"
+        with out.open("w", encoding="utf-8") as fh:
+            fh.write(f"{'stage.phase':<30}{'calls':>8}{'seconds':>12}{'net_KB':>12}{'peak_KB':>12}{'unprof':>8}\n")
+            for key, t in sorted(totals.items(), key=lambda kv: -kv[1]["seconds"]):
+                fh.write(
+                    f"{key:<30}{int(t['calls']):>8}{t['seconds']:>12.3f}{t['alloc_net_kb']:>12.1f}"
+                    f"{t['peak_kb']:>12.1f}{int(t['unprofiled']):>8}\n"
+                )
+
+            files = [p for paths in by_stage.values() for p in paths]
+            fh.write(f"\n===== all stages: top {self.top_n} by cumulative time ({len(files)} profiles) =====\n")
+            self._print_stats(files, "cumulative", fh)
+            for stage, paths in sorted(by_stage.items()):
+                fh.write(f"\n===== {stage}: top {self.top_n} by own time ({len(paths)} case(s)) =====\n")
+                self._print_stats(paths, "tottime", fh)
+
+        for key, t in sorted(totals.items(), key=lambda kv: -kv[1]["seconds"])[:10]:
+            print(
+                f"[profile] {key:<28} calls={int(t['calls'])} seconds={t['seconds']:.3f} "
+                f"net_kb={t['alloc_net_kb']:.1f} peak_kb={t['peak_kb']:.1f}"
+            )
+        print(f"[profile] report: {out}")
+        return out
+
+    def _print_stats(self, paths: List[str], sort: str, stream: Any) -> None:
+        stats = pstats.Stats(*paths, stream=stream)
+        stats.files = []  # skip pstats' one-line-per-input-file header
+        stats.strip_dirs().sort_stats(sort).print_stats(self.top_n)
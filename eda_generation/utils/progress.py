@@ -0,0 +1,51 @@
+"""
+Per-round repair progress and plateau detection.
+
+Each round's lint error count (review), compile error count and mismatch total
+(verify) are recorded in flow_status["progress"]. Rounds are compared
+lexicographically -- lint errors, then compile errors, then mismatches, lower
+is better, a stage that did not run counts as worst -- and a case has stalled
+when its most recent rounds all failed to beat the best round before them.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+_KEYS = ("lint_errors", "compile_errors", "mismatches")
+_WORST = float("inf")
+
+
+def record_round(flow_status: Dict[str, Any], round_no: int, **metrics: Optional[int]) -> Dict[str, Any]:
+    """Merge this stage's metrics into the current round's record (created if needed)."""
+    history: List[Dict[str, Any]] = flow_status.setdefault("progress", [])
+    if history and history[-1].get("round") == round_no:
+        rec = history[-1]
+    else:
+        rec = {"round": round_no}
+        history.append(rec)
+    rec.update({k: int(v) for k, v in metrics.items() if v is not None})
+    return rec
+
+
+def llm_round(flow_status: Dict[str, Any]) -> int:
+    """The current round counted in LLM rounds; a warm-start round replaying a cached design is 0."""
+    return max(0, int(flow_status.get("round", 0)) - int(flow_status.get("cached_rounds", 0)))
+
+
+def round_score(rec: Dict[str, Any]) -> Tuple[float, ...]:
+    return tuple(float(rec[k]) if rec.get(k) is not None else _WORST for k in _KEYS)
+
+
+def stalled_rounds(history: List[Dict[str, Any]]) -> int:
+    """Number of trailing rounds that did not improve on the best earlier round."""
+    best: Optional[Tuple[float, ...]] = None
+    streak = 0
+    for rec in history:
+        s = round_score(rec)
+        if best is None or s < best:
+            best = s
+            streak = 0
+        else:
+            streak += 1
+    return streak
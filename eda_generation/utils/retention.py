@@ -0,0 +1,203 @@
+"""
+Artifact retention for per-case working copies.
+
+run_case() reuses one project_root per job, so build/ (simv, duplicated
+compile/run logs, SpyGlass reports, the candidate blobs) and the appended
+debug.log / shared.log grow with every case, and SpyGlass leaves its
+review_proj* project trees next to the RTL. With a policy other than "off",
+apply_retention() runs after each case's results are exported:
+
+  - the SpyGlass project trees are removed from project_root;
+  - if the case is kept, build/ is moved to <archive_root>/<case>/ (replacing
+    an older archive of the same case) without simv, with files identical to
+    another one (e.g. run_out_full.log vs sim_run.log) dropped and listed in
+    the retention.json marker as "same_as", and logs/reports gzip-compressed;
+  - build/ is then emptied, so the next case starts clean.
+
+"failed" keeps failed (and errored) cases plus the `keep_last` most recent
+passing ones; "all" keeps every case, "none" keeps nothing. Older passing
+archives beyond `keep_last` are pruned after each case ("all" with
+keep_last=0 never prunes).
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+POLICIES = ("off", "failed", "all", "none")
+MARKER = "retention.json"
+
+# Rebuilt by the next verify round; never worth keeping.
+_DROP_NAMES = ("simv",)
+_COMPRESS_SUFFIXES = (".log", ".txt", ".rpt", ".json", ".vcd", ".tcl")
+_SPYGLASS_GLOBS = ("review_proj", "review_proj_s*", "review_proj*.prj")
+
+
+@dataclass
+class RetentionPolicy:
+    mode: str = "off"
+    archive_root: Optional[str] = None   # default: <results_root>/artifacts
+    keep_last: int = 0                   # passing cases kept in addition to failed ones
+    compress: bool = True
+    compress_min_bytes: int = 1024
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+
+def dir_size(path: Path) -> int:
+    total = 0
+    for dirpath, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _remove(path: Path) -> None:
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def prune_spyglass(project_root: Path) -> int:
+    """Remove SpyGlass project trees; returns the number of entries removed."""
+    n = 0
+    for pattern in _SPYGLASS_GLOBS:
+        for p in project_root.glob(pattern):
+            _remove(p)
+            n += 1
+    return n
+
+
+def compress_tree(root: Path, *, min_bytes: int = 1024) -> Tuple[int, int]:
+    """gzip text artifacts in place (<name>.gz); returns (bytes before, bytes after) of the files compressed."""
+    before = after = 0
+    for dirpath, _dirs, files in os.walk(root):
+        for name in files:
+            src = Path(dirpath) / name
+            if src.suffix not in _COMPRESS_SUFFIXES or name == MARKER:
+                continue
+            try:
+                size = src.stat().st_size
+                if size < min_bytes:
+                    continue
+                dst = src.with_name(name + ".gz")
+                with open(src, "rb") as fin, gzip.open(dst, "wb", compresslevel=6) as fout:
+                    shutil.copyfileobj(fin, fout)
+                src.unlink()
+            except OSError:
+                continue
+            before += size
+            after += dst.stat().st_size
+    return before, after
+
+
+def dedupe_tree(root: Path) -> Dict[str, str]:
+    """Remove files whose content equals an earlier one; returns {removed rel path: kept rel path}."""
+    by_hash: Dict[Tuple[int, str], str] = {}
+    same_as: Dict[str, str] = {}
+    for dirpath, dirs, files in os.walk(root):
+        dirs.sort()
+        for name in sorted(files):
+            p = Path(dirpath) / name
+            try:
+                data = p.read_bytes()
+            except OSError:
+                continue
+            if not data:
+                continue
+            key = (len(data), hashlib.sha256(data).hexdigest())
+            rel = p.relative_to(root).as_posix()
+            if key in by_hash:
+                p.unlink()
+                same_as[rel] = by_hash[key]
+            else:
+                by_hash[key] = rel
+    return same_as
+
+
+def _archives(archive_root: Path) -> List[Dict[str, Any]]:
+    out = []
+    if not archive_root.is_dir():
+        return out
+    for d in archive_root.iterdir():
+        try:
+            meta = json.loads((d / MARKER).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        out.append({**meta, "path": d})
+    return out
+
+
+def prune_archives(archive_root: Path, keep_last: int) -> int:
+    """Drop passing-case archives beyond the `keep_last` most recent; returns how many were removed."""
+    passed = sorted(
+        (a for a in _archives(archive_root) if a.get("passed")),
+        key=lambda a: float(a.get("finished_at") or 0.0),
+        reverse=True,
+    )
+    for a in passed[keep_last:]:
+        _remove(a["path"])
+    return len(passed[keep_last:])
+
+
+def apply_retention(
+    policy: RetentionPolicy,
+    *,
+    case: str,
+    passed: bool,
+    project_root: Path,
+    results_root: Path,
+    build_dir: str = "build",
+) -> Dict[str, Any]:
+    """Archive or drop one case's artifacts per `policy`; returns what was done."""
+    if not policy.enabled:
+        return {}
+    if policy.mode not in POLICIES:
+        raise ValueError(f"unknown retention policy {policy.mode!r} (expected one of {', '.join(POLICIES)})")
+
+    build = project_root / build_dir
+    archive_root = Path(policy.archive_root).expanduser() if policy.archive_root else results_root / "artifacts"
+    stats: Dict[str, Any] = {"policy": policy.mode, "spyglass_pruned": prune_spyglass(project_root)}
+    stats["build_bytes"] = dir_size(build) if build.exists() else 0
+
+    keep = policy.mode == "all" or (policy.mode == "failed" and (not passed or policy.keep_last > 0))
+    if keep and build.exists():
+        dest = archive_root / case
+        _remove(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(build), str(dest))
+        for name in _DROP_NAMES:
+            for p in dest.rglob(name):
+                _remove(p)
+        same_as = dedupe_tree(dest)
+        if policy.compress:
+            compress_tree(dest, min_bytes=policy.compress_min_bytes)
+        (dest / MARKER).write_text(
+            json.dumps({"case": case, "passed": passed, "finished_at": time.time(), "same_as": same_as}, indent=1),
+            encoding="utf-8",
+        )
+        stats["archived"] = str(dest)
+        stats["archived_bytes"] = dir_size(dest)
+    elif build.exists():
+        _remove(build)
+
+    if policy.mode == "failed" or (policy.mode == "all" and policy.keep_last > 0):
+        stats["archives_pruned"] = prune_archives(archive_root, policy.keep_last)
+    return stats
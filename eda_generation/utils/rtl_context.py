@@ -0,0 +1,285 @@
+"""
+Token-budgeted RTL context for CodeAgentNode prompts.
+
+RtlContextBuilder keeps an index of the RTL tree (re-reading a file only when
+its mtime/size changes and re-listing a directory only when its own mtime
+changes), ranks files by how often the current review/verify feedback names
+them, and packs them into a token budget. Patch targets (the files a PATCH
+answer returns whole) are always sent verbatim; the other, read-only files are
+comment-stripped, and those that do not fit are reduced to excerpts around the
+lines named in feedback, or listed as omitted.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+STRIP_MODES = ("none", "comments", "aggressive")
+
+_BLOCK_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_LINE_COMMENT = re.compile(r"//[^\n]*")
+_STRING = re.compile(r'"(?:\\.|[^"\\\n])*"')
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap tokenizer-free estimate (~4 chars/token for code)."""
+    return (len(text) + 3) // 4
+
+
+def strip_rtl(text: str, mode: str = "comments") -> str:
+    """
+    Remove comments and redundant whitespace from Verilog source.
+
+    "comments" keeps the line structure so line numbers in feedback still
+    match; "aggressive" also drops blank lines and indentation.
+    """
+    if mode == "none":
+        return text
+
+    # Protect string literals ("//" inside $display strings is common).
+    strings: List[str] = []
+
+    def _keep(m: re.Match) -> str:
+        strings.append(m.group(0))
+        return f"\x00{len(strings) - 1}\x00"
+
+    s = _STRING.sub(_keep, text)
+    s = _BLOCK_COMMENT.sub(lambda m: "\n" * m.group(0).count("\n"), s)
+    s = _LINE_COMMENT.sub("", s)
+    s = re.sub(r"\x00(\d+)\x00", lambda m: strings[int(m.group(1))], s)
+
+    lines = [ln.rstrip() for ln in s.splitlines()]
+    if mode == "aggressive":
+        lines = [ln.strip() for ln in lines if ln.strip()]
+    return "\n".join(lines).rstrip("\n") + "\n"
+
+
+@dataclass
+class _Entry:
+    mtime_ns: int
+    size: int
+    text: str
+    stripped: str
+    tokens: int
+
+
+@dataclass
+class PackedContext:
+    text: str
+    tokens: int
+    targets: List[str] = field(default_factory=list)
+    included: List[str] = field(default_factory=list)
+    excerpted: List[str] = field(default_factory=list)
+    omitted: List[str] = field(default_factory=list)
+
+
+class RtlContextBuilder:
+    def __init__(
+        self,
+        *,
+        root: Path,
+        rtl_dir: str,
+        allowed_exts: Tuple[str, ...],
+        token_budget: int = 12000,
+        strip_mode: str = "comments",
+        excerpt_radius: int = 6,
+    ):
+        if strip_mode not in STRIP_MODES:
+            raise ValueError(f"Unknown strip_mode {strip_mode!r}, expected one of {STRIP_MODES}")
+        self._root = root
+        self._rtl_root = (root / rtl_dir).resolve()
+        self._exts = allowed_exts
+        self._budget = token_budget
+        self._strip = strip_mode
+        self._radius = excerpt_radius
+        self._files: Dict[str, _Entry] = {}
+        self._dirs: Dict[str, Tuple[int, List[str], List[str]]] = {}  # dir -> (mtime_ns, subdirs, files)
+
+    # ------------------------- Index -------------------------
+
+    def discover(self) -> List[str]:
+        """Relative paths of RTL files under rtl_dir (sorted), rescanning only changed directories."""
+        if not self._rtl_root.is_dir():
+            return []
+        out: List[str] = []
+        stack = [str(self._rtl_root)]
+        while stack:
+            d = stack.pop()
+            subdirs, files = self._list_dir(d)
+            stack.extend(subdirs)
+            out.extend(files)
+        out.sort()
+        return out
+
+    def _list_dir(self, d: str) -> Tuple[List[str], List[str]]:
+        try:
+            mtime = os.stat(d).st_mtime_ns
+        except OSError:
+            self._dirs.pop(d, None)
+            return [], []
+        cached = self._dirs.get(d)
+        if cached and cached[0] == mtime:
+            return cached[1], cached[2]
+
+        subdirs: List[str] = []
+        files: List[str] = []
+        with os.scandir(d) as it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    subdirs.append(e.path)
+                elif e.is_file() and os.path.splitext(e.name)[1] in self._exts:
+                    files.append(str(Path(e.path).relative_to(self._root)).replace("\\", "/"))
+        self._dirs[d] = (mtime, subdirs, files)
+        return subdirs, files
+
+    def _entry(self, rel: str) -> Optional[_Entry]:
+        abs_path = (self._root / rel).resolve()
+        if abs_path.suffix not in self._exts:
+            return None
+        try:
+            st = abs_path.stat()
+        except OSError:
+            self._files.pop(rel, None)
+            return None
+        cached = self._files.get(rel)
+        if cached and cached.mtime_ns == st.st_mtime_ns and cached.size == st.st_size:
+            return cached
+        text = abs_path.read_text(encoding="utf-8", errors="ignore")
+        stripped = strip_rtl(text, self._strip)
+        entry = _Entry(st.st_mtime_ns, st.st_size, text, stripped, estimate_tokens(stripped))
+        self._files[rel] = entry
+        return entry
+
+    # ------------------------- Ranking -------------------------
+
+    def feedback_mentions(self, review_fb: Any, verify_fb: Any) -> Dict[str, Set[int]]:
+        """Map of file key (relative path or basename) -> line numbers named in feedback."""
+        mentions: Dict[str, Set[int]] = {}
+        items: List[Dict[str, Any]] = []
+        if isinstance(review_fb, Mapping) and review_fb.get("passed") is not True:
+            items.extend(review_fb.get("issues") or [])
+        if isinstance(verify_fb, Mapping) and verify_fb.get("passed") is not True:
+            items.extend(verify_fb.get("compile_errors") or [])
+        for it in items:
+            f = str(it.get("file") or "").strip()
+            if not f:
+                continue
+            ln = it.get("line")
+            lines = mentions.setdefault(self._key(f), set())
+            if isinstance(ln, int) and ln > 0:
+                lines.add(ln)
+        return mentions
+
+    def _key(self, path: str) -> str:
+        p = Path(path)
+        if p.is_absolute():
+            try:
+                return str(p.resolve().relative_to(self._root)).replace("\\", "/")
+            except ValueError:
+                return p.name
+        return os.path.normpath(path).replace("\\", "/")
+
+    def _lines_for(self, rel: str, mentions: Dict[str, Set[int]]) -> Optional[Set[int]]:
+        if rel in mentions:
+            return mentions[rel]
+        # Tools report paths relative to their own workdir; fall back to basename matching.
+        name = Path(rel).name
+        hits = [lines for key, lines in mentions.items() if Path(key).name == name]
+        if not hits:
+            return None
+        return set().union(*hits)
+
+    def rank(self, rel_paths: Iterable[str], mentions: Dict[str, Set[int]]) -> List[str]:
+        """Files named in feedback first (most named lines first); otherwise keep caller order."""
+        paths = list(dict.fromkeys(rel_paths))
+
+        def score(item: Tuple[int, str]) -> Tuple[int, int, int]:
+            idx, rel = item
+            lines = self._lines_for(rel, mentions)
+            if lines is None:
+                return (1, 0, idx)
+            return (0, -len(lines), idx)
+
+        return [rel for _, rel in sorted(enumerate(paths), key=score)]
+
+    # ------------------------- Packing -------------------------
+
+    def pack(
+        self,
+        rel_paths: List[str],
+        *,
+        review_fb: Any = None,
+        verify_fb: Any = None,
+        max_files: int = 32,
+        targets: Iterable[str] = (),
+    ) -> PackedContext:
+        """
+        `targets` are sent first, whole and unstripped (whatever the budget): a PATCH
+        answer returns them as complete files, so they must not lose comments or lines.
+        """
+        mentions = self.feedback_mentions(review_fb, verify_fb)
+        chunks: List[str] = []
+        packed = PackedContext(text="", tokens=0)
+        for rel in dict.fromkeys(targets):
+            entry = self._entry(rel)
+            if entry is None:
+                continue
+            chunk = f"### FILE: {rel} (patch target, verbatim)\n{entry.text.rstrip()}\n"
+            chunks.append(chunk)
+            packed.targets.append(rel)
+            packed.included.append(rel)
+            packed.tokens += estimate_tokens(chunk)
+
+        ranked = [rel for rel in self.rank(rel_paths, mentions) if rel not in packed.targets][:max_files]
+        for rel in ranked:
+            entry = self._entry(rel)
+            if entry is None:
+                continue
+            remaining = self._budget - packed.tokens
+            # Without targets the first (most relevant) file is still sent whole.
+            if entry.tokens <= remaining or not packed.included:
+                chunk = f"### FILE: {rel}\n{entry.stripped}\n"
+                chunks.append(chunk)
+                packed.included.append(rel)
+                packed.tokens += estimate_tokens(chunk)
+                continue
+
+            lines = self._lines_for(rel, mentions)
+            if lines:
+                # Excerpts need original line numbers, so never use the aggressive form here.
+                src = entry.stripped if self._strip != "aggressive" else strip_rtl(entry.text, "comments")
+                chunk = self._excerpt(rel, src, lines)
+                cost = estimate_tokens(chunk)
+                if cost <= remaining:
+                    chunks.append(chunk)
+                    packed.excerpted.append(rel)
+                    packed.tokens += cost
+                    continue
+            packed.omitted.append(rel)
+
+        if packed.omitted:
+            chunks.append("### OMITTED (token budget): " + ", ".join(packed.omitted) + "\n")
+        packed.text = "\n".join(chunks).strip()
+        return packed
+
+    def _excerpt(self, rel: str, text: str, lines: Set[int]) -> str:
+        src = text.splitlines()
+        keep: Set[int] = set()
+        for ln in lines:
+            lo = max(1, ln - self._radius)
+            hi = min(len(src), ln + self._radius)
+            keep.update(range(lo, hi + 1))
+
+        out = [f"### FILE: {rel} (excerpt around lines {', '.join(str(x) for x in sorted(lines))})"]
+        prev = 0
+        for i in sorted(keep):
+            if prev and i != prev + 1:
+                out.append("...")
+            out.append(f"{i}: {src[i - 1]}")
+            prev = i
+        return "\n".join(out) + "\n"
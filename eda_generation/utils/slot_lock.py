@@ -0,0 +1,54 @@
+"""
+Cross-process counting semaphore built on flock'd slot files.
+
+Slot i is held while <lock_dir>/slot_<i>.lock is locked. Locks are released by
+the kernel when the holder exits, so a crashed flow never leaks a license.
+Every process on a host that points at the same lock_dir shares the same N
+slots (flock is not reliable on NFS, so keep lock_dir on local disk).
+"""
+
+from __future__ import annotations
+
+import contextlib
+import fcntl
+import os
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+class SlotLimiter:
+    def __init__(self, lock_dir: str | Path, slots: int, *, poll_s: float = 0.5):
+        if slots < 1:
+            raise ValueError("slots must be >= 1")
+        self.lock_dir = Path(lock_dir)
+        self.slots = slots
+        self.poll_s = poll_s
+
+    @contextlib.contextmanager
+    def acquire(self, *, timeout_s: Optional[float] = None) -> Iterator[int]:
+        """Block until a slot is free and yield its index."""
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        deadline = None if timeout_s is None else time.monotonic() + timeout_s
+        # Start at a pid-dependent slot so processes do not all contend on slot 0.
+        start = os.getpid() % self.slots
+        while True:
+            for k in range(self.slots):
+                i = (start + k) % self.slots
+                fd = os.open(self.lock_dir / f"slot_{i}.lock", os.O_RDWR | os.O_CREAT, 0o666)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    os.close(fd)
+                    continue
+                try:
+                    os.ftruncate(fd, 0)
+                    os.write(fd, f"{os.getpid()}\n".encode())
+                    yield i
+                finally:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                    os.close(fd)
+                return
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"No free slot in {self.lock_dir} after {timeout_s}s")
+            time.sleep(self.poll_s)
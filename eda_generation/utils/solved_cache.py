@@ -0,0 +1,171 @@
+"""
+Persistent cache of solved specs, and near-duplicate lookup over them.
+
+A single SQLite file maps (normalized spec hash, RefModule + testbench hash)
+to the last TopModule that passed for it. run_case() warm-starts a case from
+an exact hit: CodeAgent's first round replays the cached design instead of
+calling the LLM, and the normal review/verify checks re-verify it (a design
+that no longer passes is repaired by the following rounds as usual).
+
+On a miss, specs are compared by MinHash over word 3-gram shingles with LSH
+banding (16 bands x 4 rows), and the most similar solved design above
+`threshold` estimated Jaccard similarity is handed to CodeAgent as extra,
+read-only context for its GEN round.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS solved (
+        key        TEXT PRIMARY KEY,   -- spec_hash:env_hash
+        spec_hash  TEXT NOT NULL,
+        env_hash   TEXT NOT NULL,
+        case_name  TEXT,
+        spec       TEXT NOT NULL,
+        design     TEXT NOT NULL,
+        signature  TEXT NOT NULL,      -- JSON list of MinHash values
+        updated    REAL
+    )
+    """,
+    "CREATE TABLE IF NOT EXISTS bands (band TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (band, key))",
+)
+
+NUM_PERM = 64
+BANDS = 16
+_ROWS = NUM_PERM // BANDS
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_WORD_RE = re.compile(r"[A-Za-z0-9_]+")
+
+
+def normalize_spec(spec: str) -> str:
+    """Whitespace- and line-ending-insensitive form of a spec (identifiers keep their case)."""
+    return "\n".join(" ".join(line.split()) for line in spec.replace("\r\n", "\n").strip().splitlines() if line.strip())
+
+
+def spec_hash(spec: str) -> str:
+    return hashlib.sha256(normalize_spec(spec).encode("utf-8")).hexdigest()[:16]
+
+
+def env_hash(*blobs: bytes) -> str:
+    """Hash of the evaluation environment (RefModule, testbench) a design passed against."""
+    return env_hash_from_sha256(*(hashlib.sha256(b).hexdigest() for b in blobs))
+
+
+def env_hash_from_sha256(*digests: str) -> str:
+    """env_hash() from the files' sha256 hex digests (e.g. the dataset manifest's)."""
+    h = hashlib.sha256()
+    for d in digests:
+        h.update(bytes.fromhex(d))
+    return h.hexdigest()[:16]
+
+
+def minhash(text: str, *, n: int = 3) -> List[int]:
+    words = [w.lower() for w in _WORD_RE.findall(text)]
+    shingles = {" ".join(words[i : i + n]) for i in range(max(1, len(words) - n + 1))} or {""}
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingles]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS]
+
+
+def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """Estimated Jaccard similarity of the two shingle sets."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / float(NUM_PERM)
+
+
+def _bands(sig: List[int]) -> List[str]:
+    return [
+        f"{i}:" + hashlib.blake2b(json.dumps(sig[i * _ROWS : (i + 1) * _ROWS]).encode(), digest_size=8).hexdigest()
+        for i in range(BANDS)
+    ]
+
+
+class SolvedCache:
+    def __init__(self, path: str | Path, *, timeout_s: float = 60.0):
+        self.path = Path(path).expanduser().resolve()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Shared by --jobs threads; sqlite3 connections are not, so calls are serialized.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=timeout_s, isolation_level=None, check_same_thread=False)
+        for stmt in _SCHEMA:
+            self._conn.execute(stmt)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def key(spec: str, ref: bytes, tb: bytes) -> str:
+        return f"{spec_hash(spec)}:{env_hash(ref, tb)}"
+
+    @staticmethod
+    def key_from_sha256(spec: str, ref_sha256: str, tb_sha256: str) -> str:
+        return f"{spec_hash(spec)}:{env_hash_from_sha256(ref_sha256, tb_sha256)}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT case_name, design FROM solved WHERE key = ?", (key,)).fetchone()
+        return {"key": key, "case": row[0], "design": row[1]} if row else None
+
+    def put(self, key: str, *, spec: str, design: str, case: Optional[str] = None) -> None:
+        sig = minhash(spec)
+        spec_h, env_h = key.split(":", 1)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO solved (key, spec_hash, env_hash, case_name, spec, design, signature, updated) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, spec_h, env_h, case, spec, design, json.dumps(sig), time.time()),
+                )
+                self._conn.execute("DELETE FROM bands WHERE key = ?", (key,))
+                self._conn.executemany("INSERT OR IGNORE INTO bands (band, key) VALUES (?, ?)", [(b, key) for b in _bands(sig)])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def similar(self, spec: str, *, threshold: float = 0.5, exclude_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Most similar solved spec (LSH candidates, ranked by estimated Jaccard), or None."""
+        sig = minhash(spec)
+        bands = _bands(sig)
+        with self._lock:
+            keys = {
+                r[0]
+                for r in self._conn.execute(
+                    f"SELECT DISTINCT key FROM bands WHERE band IN ({','.join('?' * len(bands))})", bands
+                )
+            }
+            keys.discard(exclude_key)
+            rows = [
+                self._conn.execute(
+                    "SELECT key, case_name, spec, design, signature FROM solved WHERE key = ?", (k,)
+                ).fetchone()
+                for k in keys
+            ]
+        best: Optional[Tuple[float, Any]] = None
+        for row in rows:
+            if row is None:
+                continue
+            sim = similarity(sig, json.loads(row[4]))
+            if sim >= threshold and (best is None or sim > best[0]):
+                best = (sim, row)
+        if best is None:
+            return None
+        sim, row = best
+        return {"key": row[0], "case": row[1], "spec": row[2], "design": row[3], "similarity": round(sim, 3)}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM solved").fetchone()[0])
@@ -0,0 +1,132 @@
+"""
+Staged sweep executor with per-resource pools.
+
+Many cases are kept in flight at once, but each node's exec() (the part that
+actually uses a resource) must first take a slot from the pool of the
+resource it needs:
+  code_agent          -> llm   (API concurrency)
+  review_agent        -> lint  (SpyGlass licenses)
+  verification_agent  -> sim   (CPU for iverilog/vvp)
+A case waiting on the network therefore holds only an LLM slot, and a case
+running vvp holds only a sim slot, so all three pools can stay busy.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from queue import SimpleQueue
+from typing import Any, Callable, Dict, Iterator, List
+
+from pocketflow import Flow
+
+from utils.node_hooks import wrap_node_phases
+
+STAGE_RESOURCES = {
+    "code_agent": "llm",
+    "review_agent": "lint",
+    "verification_agent": "sim",
+}
+
+
+@dataclass
+class PoolSizes:
+    llm: int = 8
+    lint: int = 1
+    sim: int = field(default_factory=lambda: os.cpu_count() or 4)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {"llm": self.llm, "lint": self.lint, "sim": self.sim}
+
+
+class _Pool:
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = max(1, size)
+        self._sem = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self.busy_s = 0.0
+        self.wait_s = 0.0
+        self.tasks = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+
+    @contextlib.contextmanager
+    def slot(self) -> Iterator[None]:
+        t0 = time.monotonic()
+        self._sem.acquire()
+        t1 = time.monotonic()
+        with self._lock:
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+        try:
+            yield
+        finally:
+            t2 = time.monotonic()
+            with self._lock:
+                self.in_use -= 1
+                self.tasks += 1
+                self.wait_s += t1 - t0
+                self.busy_s += t2 - t1
+            self._sem.release()
+
+
+class StagedExecutor:
+    def __init__(self, sizes: PoolSizes, *, max_in_flight: int = 0):
+        self.pools = {name: _Pool(name, n) for name, n in sizes.as_dict().items()}
+        # Enough cases in flight to keep every pool busy at the same time.
+        self.max_in_flight = max_in_flight or sum(p.size for p in self.pools.values())
+
+    @contextlib.contextmanager
+    def _gate(self, node: str, phase: str) -> Iterator[None]:
+        resource = STAGE_RESOURCES.get(node)
+        if phase != "exec" or resource is None:
+            yield
+            return
+        with self.pools[resource].slot():
+            yield
+
+    def attach(self, flow: Flow) -> Flow:
+        """flow_hook for run_case: route each node's exec through its resource pool."""
+        return wrap_node_phases(flow, self._gate)
+
+    def run(
+        self,
+        cases: List[str],
+        run_one: Callable[[int, str, Path], Dict[str, Any]],
+        *,
+        project_root: Path,
+    ) -> List[Dict[str, Any]]:
+        """
+        Run all cases with up to max_in_flight at once. `run_one(idx, case, root)` must pass
+        `flow_hook=self.attach` to run_case; each in-flight case gets its own working copy.
+        """
+        roots: SimpleQueue = SimpleQueue()
+        for i in range(self.max_in_flight):
+            roots.put(project_root / f"slot_{i}")
+
+        def _job(idx: int, case: str) -> Dict[str, Any]:
+            root = roots.get()
+            try:
+                return run_one(idx, case, root)
+            finally:
+                roots.put(root)
+
+        t0 = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            results = list(pool.map(_job, range(1, len(cases) + 1), cases))
+        self.report(time.monotonic() - t0)
+        return results
+
+    def report(self, wall_s: float) -> None:
+        for p in self.pools.values():
+            util = p.busy_s / (p.size * wall_s) * 100 if wall_s > 0 else 0.0
+            print(
+                f"[pipeline] pool={p.name} size={p.size} tasks={p.tasks} peak={p.peak_in_use} "
+                f"utilization={util:.0f}% busy={p.busy_s:.1f}s wait={p.wait_s:.1f}s"
+            )
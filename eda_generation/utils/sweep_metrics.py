@@ -0,0 +1,261 @@
+"""
+Live sweep metrics: a JSONL event stream and a periodically rewritten
+OpenMetrics textfile (for node_exporter's textfile collector, or just `cat`).
+
+Events (one JSON object per line, "event" is the kind):
+  case_start, case_end       -- per case, case_end carries the case_summary
+  stage_begin, stage_end     -- around each node's exec, with duration_s
+  route                      -- the action a node's post returned
+  llm_usage                  -- tokens, model and latency of one CodeAgent call
+Metrics: cases started/finished by result, cases in flight, pass rate, per-stage
+phase latency histograms, exec calls in flight per stage (code_agent = LLM
+calls), routes taken, LLM tokens, per-model LLM calls/seconds/cases solved and
+the time of the last event (to spot stalls).
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pocketflow import Flow
+
+from utils.node_hooks import PHASES, iter_flow_nodes, node_name
+
+# Seconds; covers post/prep (ms) up to long LLM calls and SpyGlass runs.
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+_TOKEN_KINDS = ("prompt_tokens", "completion_tokens", "cached_tokens")
+
+
+class _Histogram:
+    def __init__(self) -> None:
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, v: float) -> None:
+        self.total += 1
+        self.sum += v
+        for i, le in enumerate(LATENCY_BUCKETS):
+            if v <= le:
+                self.counts[i] += 1
+
+
+class SweepMetrics:
+    def __init__(
+        self,
+        *,
+        events_path: Optional[str | Path] = None,
+        textfile_path: Optional[str | Path] = None,
+        interval_s: float = 15.0,
+        worker: Optional[str] = None,
+    ):
+        self.events_path = Path(events_path).expanduser() if events_path else None
+        self.textfile_path = Path(textfile_path).expanduser() if textfile_path else None
+        self.interval_s = interval_s
+        self.worker = worker
+        self._lock = threading.Lock()
+        self._events = None
+        if self.events_path is not None:
+            self.events_path.parent.mkdir(parents=True, exist_ok=True)
+            self._events = self.events_path.open("a", encoding="utf-8")
+
+        self.cases_started = 0
+        self.cases_finished: Dict[str, int] = {"passed": 0, "failed": 0, "error": 0}
+        self.stage_seconds: Dict[Tuple[str, str], _Histogram] = {}
+        self.in_flight: Dict[str, int] = {}
+        self.routes: Dict[Tuple[str, str], int] = {}
+        self.tokens: Dict[str, int] = {k: 0 for k in _TOKEN_KINDS}
+        self.models: Dict[str, Dict[str, float]] = {}  # model -> calls / seconds / solved
+        self.last_event_ts = time.time()
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------- lifecycle -------------------------
+
+    def start(self) -> "SweepMetrics":
+        if self.textfile_path is not None:
+            self._thread = threading.Thread(target=self._writer_loop, name="sweep-metrics", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.write_textfile()
+        with self._lock:
+            if self._events is not None:
+                self._events.close()
+                self._events = None
+
+    def _writer_loop(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.write_textfile()
+            except OSError as e:
+                print(f"[metrics] textfile write failed: {e}")
+
+    # ------------------------- events -------------------------
+
+    def event(self, kind: str, **fields: Any) -> None:
+        rec: Dict[str, Any] = {"ts": round(time.time(), 3), "event": kind}
+        if self.worker:
+            rec["worker"] = self.worker
+        rec.update(fields)
+        with self._lock:
+            self.last_event_ts = rec["ts"]
+            if self._events is not None:
+                self._events.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                self._events.flush()
+
+    def case_started(self, case: str) -> None:
+        with self._lock:
+            self.cases_started += 1
+        self.event("case_start", case=case)
+
+    def case_finished(self, summary: Dict[str, Any]) -> None:
+        result = "error" if summary.get("error") else ("passed" if summary.get("passed") else "failed")
+        with self._lock:
+            self.cases_finished[result] += 1
+            if summary.get("solved_by"):
+                self._model(summary["solved_by"])["solved"] += 1
+        self.event("case_end", result=result, **summary)
+
+    # ------------------------- flow instrumentation -------------------------
+
+    def hook(self, case: str, then: Optional[Callable[[Flow], Any]] = None) -> Callable[[Flow], Flow]:
+        """flow_hook for run_case; `then` (e.g. StagedExecutor.attach) is applied around it."""
+
+        def _hook(flow: Flow) -> Flow:
+            self.attach(flow, case=case)
+            if then is not None:
+                then(flow)
+            return flow
+
+        return _hook
+
+    def attach(self, flow: Flow, *, case: str) -> Flow:
+        for node in iter_flow_nodes(flow):
+            name = node_name(node)
+            for phase in PHASES:
+                setattr(node, phase, self._observed(getattr(node, phase), case, name, phase))
+        return flow
+
+    def _observed(self, fn: Callable[..., Any], case: str, stage: str, phase: str) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def _call(*args: Any, **kwargs: Any) -> Any:
+            if phase == "exec":
+                with self._lock:
+                    self.in_flight[stage] = self.in_flight.get(stage, 0) + 1
+                self.event("stage_begin", case=case, stage=stage)
+            t0 = time.monotonic()
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+            finally:
+                dt = time.monotonic() - t0
+                with self._lock:
+                    self.stage_seconds.setdefault((stage, phase), _Histogram()).observe(dt)
+                    if phase == "exec":
+                        self.in_flight[stage] -= 1
+                if phase == "exec":
+                    self.event("stage_end", case=case, stage=stage, duration_s=round(dt, 3), ok=ok)
+            if phase == "exec" and isinstance(result, dict) and isinstance(result.get("usage"), dict):
+                self._note_usage(case, result["usage"], result.get("model"), result.get("latency_s"))
+            if phase == "post" and isinstance(result, str):
+                with self._lock:
+                    self.routes[(stage, result)] = self.routes.get((stage, result), 0) + 1
+                self.event("route", case=case, stage=stage, route=result)
+            return result
+
+        return _call
+
+    def _model(self, model: str) -> Dict[str, float]:
+        return self.models.setdefault(model, {"calls": 0, "seconds": 0.0, "solved": 0})
+
+    def _note_usage(self, case: str, usage: Dict[str, Any], model: Optional[str], latency_s: Optional[float]) -> None:
+        with self._lock:
+            for k in _TOKEN_KINDS:
+                self.tokens[k] += int(usage.get(k) or 0)
+            if model:
+                st = self._model(model)
+                st["calls"] += 1
+                st["seconds"] += float(latency_s or 0.0)
+        if not usage and not model:
+            return
+        self.event(
+            "llm_usage",
+            case=case,
+            model=model,
+            latency_s=latency_s,
+            **{k: int(usage.get(k) or 0) for k in _TOKEN_KINDS},
+        )
+
+    # ------------------------- OpenMetrics -------------------------
+
+    def render(self) -> str:
+        with self._lock:
+            lines: List[str] = []
+
+            def family(name: str, kind: str, help_: str) -> None:
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"# HELP {name} {help_}")
+
+            finished = sum(self.cases_finished.values())
+            family("eda_cases_started", "counter", "Cases started.")
+            lines.append(f"eda_cases_started_total {self.cases_started}")
+            family("eda_cases_finished", "counter", "Cases finished, by result.")
+            for result, n in self.cases_finished.items():
+                lines.append(f'eda_cases_finished_total{{result="{result}"}} {n}')
+            family("eda_cases_in_flight", "gauge", "Cases started but not finished.")
+            lines.append(f"eda_cases_in_flight {self.cases_started - finished}")
+            family("eda_pass_rate", "gauge", "Passed / finished cases.")
+            lines.append(f"eda_pass_rate {self.cases_finished['passed'] / finished if finished else 0.0:.4f}")
+
+            family("eda_stage_seconds", "histogram", "Node phase latency.")
+            for (stage, phase), h in sorted(self.stage_seconds.items()):
+                lbl = f'stage="{stage}",phase="{phase}"'
+                for le, n in zip(LATENCY_BUCKETS, h.counts):
+                    lines.append(f'eda_stage_seconds_bucket{{{lbl},le="{le}"}} {n}')
+                lines.append(f'eda_stage_seconds_bucket{{{lbl},le="+Inf"}} {h.total}')
+                lines.append(f"eda_stage_seconds_sum{{{lbl}}} {h.sum:.6f}")
+                lines.append(f"eda_stage_seconds_count{{{lbl}}} {h.total}")
+
+            family("eda_stage_in_flight", "gauge", "Node exec calls running now (code_agent = LLM calls).")
+            for stage, n in sorted(self.in_flight.items()):
+                lines.append(f'eda_stage_in_flight{{stage="{stage}"}} {n}')
+            family("eda_routes", "counter", "Routes returned by node post.")
+            for (stage, route), n in sorted(self.routes.items()):
+                lines.append(f'eda_routes_total{{stage="{stage}",route="{route}"}} {n}')
+            family("eda_llm_tokens", "counter", "LLM tokens used by CodeAgent.")
+            for k, n in self.tokens.items():
+                lines.append(f'eda_llm_tokens_total{{kind="{k.replace("_tokens", "")}"}} {n}')
+            family("eda_llm_model_calls", "counter", "CodeAgent LLM calls, by model.")
+            for m, st in sorted(self.models.items()):
+                lines.append(f'eda_llm_model_calls_total{{model="{m}"}} {int(st["calls"])}')
+            family("eda_llm_model_seconds", "counter", "CodeAgent LLM call seconds, by model.")
+            for m, st in sorted(self.models.items()):
+                lines.append(f'eda_llm_model_seconds_total{{model="{m}"}} {st["seconds"]:.3f}')
+            family("eda_llm_model_solved", "counter", "Cases whose passing candidate came from this model.")
+            for m, st in sorted(self.models.items()):
+                lines.append(f'eda_llm_model_solved_total{{model="{m}"}} {int(st["solved"])}')
+            family("eda_last_event_timestamp_seconds", "gauge", "Unix time of the last sweep event.")
+            lines.append(f"eda_last_event_timestamp_seconds {self.last_event_ts:.3f}")
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self) -> None:
+        if self.textfile_path is None:
+            return
+        self.textfile_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.textfile_path.with_name(f".{self.textfile_path.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.render(), encoding="utf-8")
+        os.replace(tmp, self.textfile_path)
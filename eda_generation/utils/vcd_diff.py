@@ -0,0 +1,202 @@
+"""
+Streaming VCD reader that finds where the DUT first diverges from the reference.
+
+Testbenches instantiate RefModule and TopModule side by side and drive their
+outputs onto `<name>_ref` / `<name>_dut` wires in the testbench scope. The file
+is read token by token and only the current value of each watched testbench
+signal is kept (plus a short window of recent timestamps), so memory does not
+grow with the dump size and reading stops at the first divergence.
+
+A reference bit that is x/z is a don't-care, as in the testbenches' own
+`!==`-with-mask comparison.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+_SKIP_TYPES = {"integer", "real", "realtime", "event", "parameter", "time"}
+_CLOCK_NAMES = ("clk", "clock")
+
+
+@dataclass
+class _Var:
+    name: str
+    width: int
+    top_level: bool
+
+
+def _tokens(path: Path) -> Iterator[str]:
+    with path.open("r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            yield from line.split()
+
+
+def _normalize(bits: str, width: int) -> str:
+    bits = bits.lower()
+    if len(bits) >= width:
+        return bits[-width:]
+    pad = bits[0] if bits and bits[0] in "xz" else "0"
+    return pad * (width - len(bits)) + bits
+
+
+def _diverges(ref: str, dut: str) -> bool:
+    return any(r in "01" and d != r for r, d in zip(ref, dut))
+
+
+def format_value(bits: str, width: int) -> str:
+    if width == 1:
+        return bits
+    if width <= 8 or any(c in "xz" for c in bits):
+        return f"{width}'b{bits}"
+    return f"{width}'h{int(bits, 2):0{(width + 3) // 4}x}"
+
+
+def _read_header(tokens: Iterator[str], tb_top: Optional[str]) -> Dict[str, List[_Var]]:
+    """id code -> vars; only variables of the testbench scope (and any clock) are kept."""
+    ids: Dict[str, List[_Var]] = {}
+    scopes: List[str] = []
+    tb_depth: Optional[int] = None
+
+    for tok in tokens:
+        if tok == "$enddefinitions":
+            break
+        if tok == "$scope":
+            _kind, name = next(tokens), next(tokens)
+            scopes.append(name)
+            if tb_depth is None and (tb_top is None or name == tb_top):
+                tb_depth = len(scopes)
+        elif tok == "$upscope":
+            if scopes:
+                if tb_depth == len(scopes):
+                    tb_depth = -1  # testbench scope closed; ignore later top-level scopes
+                scopes.pop()
+        elif tok == "$var":
+            vtype, width, code, name = next(tokens), next(tokens), next(tokens), next(tokens)
+            in_tb = tb_depth is not None and tb_depth > 0 and len(scopes) >= tb_depth
+            top_level = in_tb and len(scopes) == tb_depth
+            is_clock = in_tb and name.lower() in _CLOCK_NAMES
+            if vtype not in _SKIP_TYPES and (top_level or is_clock):
+                ids.setdefault(code, []).append(_Var(name, int(width), top_level))
+        # Skip the rest of the declaration ($date/$version/$timescale/$comment bodies too).
+        if tok.startswith("$") and tok != "$end":
+            for t in tokens:
+                if t == "$end":
+                    break
+    return ids
+
+
+def first_divergence(path: str | Path, *, tb_top: Optional[str] = None, window: int = 4) -> Dict[str, Any]:
+    """
+    Returns {"found": True, "time", "cycle", "signals": [{signal, ref, dut}], "inputs", "trace", "vcd"}
+    or {"found": False, "reason"}.
+    """
+    path = Path(path)
+    if not path.exists():
+        return {"found": False, "reason": f"no VCD at {path}"}
+
+    tokens = _tokens(path)
+    ids = _read_header(tokens, tb_top)
+
+    names: Dict[str, _Var] = {}
+    for vs in ids.values():
+        for v in vs:
+            names.setdefault(v.name, v)
+    pairs: List[Tuple[str, str, str]] = []
+    for n in names:
+        if n.endswith("_ref") and f"{n[:-4]}_dut" in names:
+            pairs.append((n[:-4], n, f"{n[:-4]}_dut"))
+    if not pairs:
+        return {"found": False, "pairs": 0, "reason": "no <name>_ref/<name>_dut signal pairs in the VCD"}
+    paired = {n for _, r, d in pairs for n in (r, d)}
+    inputs = [
+        n for n, v in names.items() if v.top_level and n not in paired and "mismatch" not in n.lower()
+    ]
+    clock = next((n for n in names if n.lower() in _CLOCK_NAMES), None)
+
+    values: Dict[str, str] = {n: "x" * v.width for n, v in names.items()}
+    recent: Deque[Dict[str, Any]] = deque(maxlen=max(0, window))
+    cycle = 0
+
+    def _val(n: str) -> str:
+        return _normalize(values[n], names[n].width)
+
+    def _snapshot(t: int) -> Dict[str, Any]:
+        return {
+            "time": t,
+            "inputs": {n: format_value(_val(n), names[n].width) for n in inputs},
+            "outputs": {
+                base: {"ref": format_value(_val(r), names[r].width), "dut": format_value(_val(d), names[d].width)}
+                for base, r, d in pairs
+            },
+        }
+
+    def _check(t: int) -> Optional[Dict[str, Any]]:
+        bad = []
+        for base, r, d in pairs:
+            w = max(names[r].width, names[d].width)
+            ref, dut = _normalize(values[r], w), _normalize(values[d], w)
+            if _diverges(ref, dut):
+                bad.append({"signal": base, "ref": format_value(ref, w), "dut": format_value(dut, w)})
+        if not bad:
+            recent.append(_snapshot(t))
+            return None
+        snap = _snapshot(t)
+        return {
+            "found": True,
+            "time": t,
+            "cycle": cycle if clock else None,
+            "signals": bad,
+            "inputs": snap["inputs"],
+            "trace": list(recent),
+            "vcd": str(path),
+        }
+
+    def _set(code: str, bits: str) -> None:
+        nonlocal cycle
+        for v in ids.get(code, ()):
+            if v.name == clock and values[v.name][-1:] == "0" and bits[-1:] == "1":
+                cycle += 1
+            values[v.name] = bits
+
+    now: Optional[int] = None
+    for tok in tokens:
+        c = tok[0]
+        if c == "#":
+            t = int(tok[1:])
+            if now is not None and t != now:
+                hit = _check(now)
+                if hit:
+                    return hit
+            now = t
+        elif c in "bBrR":
+            code = next(tokens, "")
+            if c in "bB":
+                _set(code, tok[1:])
+        elif c in "01xXzZ":
+            _set(tok[1:], c.lower())
+        # $dumpvars/$dumpall/$dumpon/$dumpoff/$end only bracket value changes.
+
+    if now is not None:
+        hit = _check(now)
+        if hit:
+            return hit
+    return {"found": False, "pairs": len(pairs), "reason": "outputs never diverge in the VCD"}
+
+
+def format_divergence(div: Dict[str, Any]) -> List[str]:
+    """Feedback lines: the divergence itself, then the preceding timestamps of the trace."""
+    if not div.get("found"):
+        return []
+    at = f"t={div['time']}" + (f" (cycle {div['cycle']})" if div.get("cycle") is not None else "")
+    outs = "; ".join(f"{s['signal']} ref={s['ref']} dut={s['dut']}" for s in div.get("signals") or [])
+    ins = " ".join(f"{k}={v}" for k, v in (div.get("inputs") or {}).items())
+    lines = [f"first divergence at {at}: {outs}" + (f" | inputs {ins}" if ins else "")]
+    for snap in div.get("trace") or []:
+        ins = " ".join(f"{k}={v}" for k, v in snap["inputs"].items())
+        outs = " ".join(f"{k} ref={v['ref']} dut={v['dut']}" for k, v in snap["outputs"].items())
+        lines.append(f"  before, t={snap['time']}: {ins} | {outs}")
+    return lines
@@ -0,0 +1,172 @@
+"""
+Shared work queue for multi-host dataset sweeps.
+
+A single SQLite file (on storage every host can reach) holds one row per case.
+Workers claim a case under a lease; a worker that crashes stops renewing its
+lease and the case becomes claimable again once the lease expires. Claims use
+BEGIN IMMEDIATE so only one worker can take a given case. The coordinator
+marks the queue as published once its cases are in, so a worker started
+before it waits instead of taking the empty queue for a finished one.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    case_name   TEXT PRIMARY KEY,
+    seq         INTEGER NOT NULL,
+    state       TEXT NOT NULL DEFAULT 'pending',   -- pending | leased | done | failed
+    worker      TEXT,
+    lease_until REAL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    result      TEXT,
+    updated     REAL
+)
+"""
+_META_SCHEMA = "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+@dataclass
+class Job:
+    case: str
+    attempts: int
+
+
+class WorkQueue:
+    def __init__(self, path: str | Path, *, max_attempts: int = 3, timeout_s: float = 60.0):
+        self.path = Path(path).expanduser().resolve()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        self._conn = sqlite3.connect(str(self.path), timeout=timeout_s, isolation_level=None)
+        # WAL does not work over network filesystems; keep the default rollback journal.
+        self._conn.execute(_SCHEMA)
+        self._conn.execute(_META_SCHEMA)
+        # Queues from before the marker existed: publish() is one transaction, so any row means it ran.
+        self._conn.execute(
+            "INSERT OR IGNORE INTO meta (key, value) SELECT 'published', MIN(updated) FROM jobs HAVING COUNT(*) > 0"
+        )
+
+    def close(self) -> None:
+        self._conn.close()
+
+    # ------------------------- coordinator -------------------------
+
+    def publish(self, cases: Iterable[str], *, reset: bool = False) -> int:
+        """Add cases (in order) that are not queued yet; with reset, requeue everything."""
+        now = time.time()
+        added = 0
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            if reset:
+                self._conn.execute("DELETE FROM jobs")
+                self._conn.execute("DELETE FROM meta")
+            base = self._conn.execute("SELECT COALESCE(MAX(seq), -1) + 1 FROM jobs").fetchone()[0]
+            for i, case in enumerate(cases):
+                cur = self._conn.execute(
+                    "INSERT OR IGNORE INTO jobs (case_name, seq, updated) VALUES (?, ?, ?)",
+                    (case, base + i, now),
+                )
+                added += cur.rowcount
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('published', ?)", (str(now),))
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def counts(self) -> Dict[str, int]:
+        out = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        for state, n in self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"):
+            out[state] = n
+        return out
+
+    def results(self) -> List[Dict[str, Any]]:
+        rows = self._conn.execute(
+            "SELECT case_name, state, worker, attempts, result FROM jobs ORDER BY seq"
+        ).fetchall()
+        return [
+            {
+                "case": c,
+                "state": s,
+                "worker": w,
+                "attempts": a,
+                "result": json.loads(r) if r else None,
+            }
+            for c, s, w, a, r in rows
+        ]
+
+    def published(self) -> bool:
+        return self._conn.execute("SELECT 1 FROM meta WHERE key='published'").fetchone() is not None
+
+    def finished(self) -> bool:
+        """All published cases are done or failed; False until the coordinator has published."""
+        c = self.counts()
+        return c["pending"] == 0 and c["leased"] == 0 and self.published()
+
+    def expire_leases(self) -> int:
+        """Fail leases that expired after max_attempts claims (a poison case must not loop forever)."""
+        now = time.time()
+        cur = self._conn.execute(
+            "UPDATE jobs SET state='failed', result=?, updated=? "
+            "WHERE state='leased' AND lease_until < ? AND attempts >= ?",
+            (json.dumps({"error": "lease expired too many times"}), now, now, self.max_attempts),
+        )
+        return cur.rowcount
+
+    # ------------------------- worker -------------------------
+
+    def claim(self, worker: str, *, lease_s: float) -> Optional[Job]:
+        """Lease the next pending case (or one whose lease expired); None if nothing is claimable."""
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.expire_leases()
+            row = self._conn.execute(
+                "SELECT case_name, attempts FROM jobs "
+                "WHERE state='pending' OR (state='leased' AND lease_until < ?) "
+                "ORDER BY seq LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                self._conn.execute("COMMIT")
+                return None
+            case, attempts = row
+            self._conn.execute(
+                "UPDATE jobs SET state='leased', worker=?, lease_until=?, attempts=attempts+1, updated=? "
+                "WHERE case_name=?",
+                (worker, now + lease_s, now, case),
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        return Job(case=case, attempts=attempts + 1)
+
+    def renew(self, case: str, worker: str, *, lease_s: float) -> bool:
+        """Extend a lease; False if the case was taken over by someone else."""
+        cur = self._conn.execute(
+            "UPDATE jobs SET lease_until=?, updated=? WHERE case_name=? AND worker=? AND state='leased'",
+            (time.time() + lease_s, time.time(), case, worker),
+        )
+        return cur.rowcount == 1
+
+    def complete(self, case: str, worker: str, *, ok: bool, result: Dict[str, Any]) -> bool:
+        cur = self._conn.execute(
+            "UPDATE jobs SET state=?, result=?, lease_until=NULL, updated=? "
+            "WHERE case_name=? AND worker=? AND state='leased'",
+            ("done" if ok else "failed", json.dumps(result, ensure_ascii=False), time.time(), case, worker),
+        )
+        return cur.rowcount == 1